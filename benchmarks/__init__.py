@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks für DKV-Checker
+
+  daten.py         synthetische Flotten: DKV-CSV, DKV-PDF, historie.json, fahrzeuge.json
+  bench_flotte.py  Laufzeiten der Kernfunktionen bei 100 / 1.000 / 10.000 Fahrzeugen
+  bench_i18n.py    Micro-Benchmark für i18n.t()
+"""
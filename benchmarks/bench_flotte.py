@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark der Kernfunktionen bei 100 / 1.000 / 10.000 Fahrzeugen
+
+Je Flottengröße werden mit benchmarks/daten.py synthetische Daten erzeugt und gemessen:
+  parse_dkv_csv                CSV des letzten Monats der Flotte
+  parse_dkv_pdf                PDF mit --pdf-zeilen Zeilen (PDF-Parsing skaliert mit den Seiten)
+  berechne_verbrauch_historie  ganze Historie
+  pruefe_auffaelligkeiten      ganze Historie
+  speichere_historie           inkl. Neuberechnung des Verbrauchs, wie in der App
+  email_rendern                Betreff und HTML für jedes Fahrzeug mit Auffälligkeiten
+
+Jede Messung läuft --wiederholungen mal; berichtet werden Minimum und Median. Gespeichert
+wird in ein temporäres Datenverzeichnis (DKV_DATA_DIR), echte Daten bleiben unberührt.
+
+Aufruf:  python benchmarks/bench_flotte.py [--fahrzeuge 100 1000 10000] [--json ergebnis.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+PROJEKT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJEKT_DIR)
+# Vor dem Import von dkv_core setzen: die Dateipfade werden beim Import festgelegt
+os.environ["DKV_DATA_DIR"] = tempfile.mkdtemp(prefix="dkv-bench-")
+
+import pandas as pd  # noqa: E402
+
+from benchmarks.daten import STICHTAG, als_csv, als_historie, als_pdf, erzeuge_flotte  # noqa: E402
+from dkv_core import (  # noqa: E402
+    DEFAULT_EMAIL_VORLAGE,
+    berechne_verbrauch_historie,
+    erstelle_auffaelligkeiten_email,
+    erstelle_email_betreff,
+    parse_dkv_csv,
+    parse_dkv_pdf,
+    pruefe_auffaelligkeiten,
+    speichere_historie,
+)
+
+
+def miss(funktion, wiederholungen):
+    """Laufzeiten in Sekunden (Minimum, Median) und das Ergebnis des letzten Laufs"""
+    dauern = []
+    for _ in range(wiederholungen):
+        start = time.perf_counter()
+        ergebnis = funktion()
+        dauern.append(time.perf_counter() - start)
+    return {"min_s": round(min(dauern), 6), "median_s": round(statistics.median(dauern), 6)}, ergebnis
+
+def emails_rendern(auffaelligkeiten, fahrzeuge_config):
+    besitzer = {fz["kennzeichen"]: fz["besitzer_name"] for fz in fahrzeuge_config["fahrzeuge"]}
+    je_fahrzeug = {}
+    for a in auffaelligkeiten:
+        je_fahrzeug.setdefault(a["fahrzeug"], []).append(a)
+    for kennzeichen, liste in je_fahrzeug.items():
+        erstelle_email_betreff(kennzeichen, liste, DEFAULT_EMAIL_VORLAGE)
+        erstelle_auffaelligkeiten_email(besitzer.get(kennzeichen, ""), kennzeichen, liste, DEFAULT_EMAIL_VORLAGE)
+    return len(je_fahrzeug)
+
+def bench_flotte(fahrzeuge, tankungen, pdf_zeilen, wiederholungen, seed=1):
+    """Alle Messungen für eine Flottengröße"""
+    zeilen, fahrzeuge_config = erzeuge_flotte(fahrzeuge, tankungen, seed=seed)
+    historie = als_historie(zeilen)
+    letzter_monat = zeilen[zeilen["Datum"] >= pd.Timestamp(STICHTAG - 30)]
+    csv_text = als_csv(letzter_monat)
+    pdf_bytes = als_pdf(letzter_monat.head(pdf_zeilen))
+
+    messungen = {}
+    messungen["parse_dkv_csv"], df = miss(lambda: parse_dkv_csv(csv_text), wiederholungen)
+    messungen["parse_dkv_csv"]["zeilen"] = len(df)
+    messungen["parse_dkv_pdf"], df = miss(lambda: parse_dkv_pdf(pdf_bytes), wiederholungen)
+    messungen["parse_dkv_pdf"]["zeilen"] = len(df)
+    messungen["berechne_verbrauch_historie"], _ = miss(lambda: berechne_verbrauch_historie(historie), wiederholungen)
+    messungen["pruefe_auffaelligkeiten"], auffaelligkeiten = miss(
+        lambda: pruefe_auffaelligkeiten(historie, fahrzeuge_config), wiederholungen)
+    messungen["pruefe_auffaelligkeiten"]["auffaelligkeiten"] = len(auffaelligkeiten)
+    messungen["speichere_historie"], _ = miss(lambda: speichere_historie(historie), wiederholungen)
+    messungen["speichere_historie"]["bytes"] = os.path.getsize(os.path.join(os.environ["DKV_DATA_DIR"], "historie.json"))
+    messungen["email_rendern"], anzahl = miss(lambda: emails_rendern(auffaelligkeiten, fahrzeuge_config), wiederholungen)
+    messungen["email_rendern"]["emails"] = anzahl
+
+    return {"fahrzeuge": fahrzeuge, "tankvorgaenge": len(historie["tankvorgaenge"]), "messungen": messungen}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fahrzeuge", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--tankungen", type=int, default=24, help="Tankvorgänge je Fahrzeug in der Historie")
+    parser.add_argument("--pdf-zeilen", type=int, default=400)
+    parser.add_argument("--wiederholungen", type=int, default=3)
+    parser.add_argument("--json", help="Ergebnis als JSON in diese Datei schreiben (- für stdout)")
+    args = parser.parse_args()
+
+    ergebnis = {
+        "erstellt": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "plattform": platform.platform(),
+        "parameter": {"tankungen": args.tankungen, "pdf_zeilen": args.pdf_zeilen,
+                      "wiederholungen": args.wiederholungen},
+        "ergebnisse": []
+    }
+    try:
+        for fahrzeuge in args.fahrzeuge:
+            lauf = bench_flotte(fahrzeuge, args.tankungen, args.pdf_zeilen, args.wiederholungen)
+            ergebnis["ergebnisse"].append(lauf)
+            if args.json != "-":
+                print(f"{fahrzeuge} Fahrzeuge, {lauf['tankvorgaenge']} Tankvorgänge")
+                for name, messung in lauf["messungen"].items():
+                    print(f"  {name:<28} {messung['median_s'] * 1000:10.1f} ms (min {messung['min_s'] * 1000:.1f} ms)")
+    finally:
+        shutil.rmtree(os.environ["DKV_DATA_DIR"], ignore_errors=True)
+
+    if args.json == "-":
+        json.dump(ergebnis, sys.stdout, ensure_ascii=False, indent=2)
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(ergebnis, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-Benchmark für i18n.t()
+
+Simuliert einen kompletten Seitenaufbau: jeder Übersetzungsschlüssel, der in
+dkv_checker.py über _() oder t() abgefragt wird, wird einmal nachgeschlagen
+(Texte mit Platzhaltern mit Beispielwerten formatiert).
+
+Aufruf:  python benchmarks/bench_i18n.py [--runden 2000]
+"""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+PROJEKT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJEKT_DIR)
+
+from i18n import SPRACHEN, t  # noqa: E402
+
+BEISPIEL_WERTE = {"count": 3, "files": 2, "name": "Max", "rolle": "Admin", "typ": "km?",
+                  "kennzeichen": "B-XY 1234", "datum": "01.01.2026", "passwort": "x"}
+
+
+def seiten_schluessel():
+    """Alle Schlüssel, die die App pro Rerun abfragt"""
+    with open(os.path.join(PROJEKT_DIR, "dkv_checker.py"), encoding="utf-8") as f:
+        quelltext = f.read()
+    return sorted(set(re.findall(r"""\b(?:_|t)\(\s*["']([a-z_]+(?:\.[a-z_]+)+)["']""", quelltext)))
+
+
+def seite_rendern(schluessel, lang):
+    for key in schluessel:
+        t(key, lang)
+        t(key, lang, **BEISPIEL_WERTE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runden", type=int, default=2000)
+    args = parser.parse_args()
+
+    schluessel = seiten_schluessel()
+    print(f"{len(schluessel)} Schlüssel pro Seitenaufbau, {args.runden} Runden")
+    for lang in SPRACHEN:
+        dauer = timeit.timeit(lambda: seite_rendern(schluessel, lang), number=args.runden)
+        pro_seite = dauer / args.runden * 1000
+        pro_lookup = dauer / (args.runden * len(schluessel) * 2) * 1e6
+        print(f"{lang}: {pro_seite:.3f} ms/Seite, {pro_lookup:.3f} µs/Lookup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetische DKV-Daten für Benchmarks
+
+Erzeugt eine Flotte mit plausiblen Tankvorgängen (Verbrauch, Tankvolumen, Preise je
+Tankstelle, einzelne fehlende km-Stände und Tippfehler, AdBlue-Zeilen) und schreibt sie
+als DKV-CSV, DKV-PDF (Tabellenlayout wie von parse_dkv_pdf erwartet), historie.json und
+fahrzeuge.json. Gleicher seed, gleiche Daten.
+
+Aufruf:  python benchmarks/daten.py ZIELVERZEICHNIS [--fahrzeuge 1000] [--tankungen 24]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+PROJEKT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJEKT_DIR)
+
+from dkv_core import berechne_verbrauch_historie, erstelle_eintraege, filtere_kraftstoff  # noqa: E402
+
+STICHTAG = np.datetime64("2026-01-01")
+STAEDTE = ["HH", "HB", "KI", "HL", "OS", "OL", "FL", "MUC", "BER", "WOB"]
+TANKSTELLEN = [f"{marke} {ort}" for marke in ("ARAL", "SHELL", "ESSO", "TOTAL", "JET", "STAR")
+               for ort in ("HAMBURG", "BREMEN", "KIEL", "LUEBECK", "HANNOVER")]
+WARENARTEN = {"DIESEL": 1.65, "SUPER E10": 1.75}
+
+# Spalten der DKV-CSV (Auszug, in dieser Reihenfolge)
+CSV_SPALTEN = ["Kennzeichen", "km-Stand", "Lieferdatum", "Lieferzeit", "Menge", "Warenart", "Wert incl. USt", "Name"]
+# PDF: Spaltenbreiten (pt) der Tabelle; parse_dkv_pdf liest Spalte 0, 1, 3 und 10
+PDF_SPALTEN = [250, 60, 25, 40, 40, 40, 40, 40, 40, 40, 50]
+PDF_ZEILENHOEHE = 12
+
+
+def kennzeichen(anzahl):
+    """Eindeutige Kennzeichen "HH-AB 101" (Format, das parse_dkv_pdf erkennt)"""
+    buchstaben = "ABCDEFGHKLMNPRSTUVWXYZ"
+    return [f"{STAEDTE[i % len(STAEDTE)]}-{buchstaben[i % 22]}{buchstaben[i // 22 % 22]} {100 + i // len(STAEDTE)}"
+            for i in range(anzahl)]
+
+def erzeuge_flotte(fahrzeuge, tankungen=24, tage=365, seed=1, fehlerquote=0.01, adblue_quote=0.05):
+    """
+    Tankvorgänge einer synthetischen Flotte.
+
+    Args:
+        fahrzeuge: Anzahl Fahrzeuge
+        tankungen: Tankvorgänge je Fahrzeug im Zeitraum
+        tage: Zeitraum bis STICHTAG
+        fehlerquote: Anteil fehlender km-Stände, ebenso viele Tippfehler (Ziffer zu viel)
+        adblue_quote: Anteil zusätzlicher AdBlue-Zeilen (werden beim Import herausgefiltert)
+
+    Returns:
+        (zeilen, fahrzeuge_config): zeilen mit den Spalten von parse_dkv_csv,
+        fahrzeuge_config im Format von fahrzeuge.json
+    """
+    rng = np.random.default_rng(seed)
+    n = fahrzeuge * tankungen
+    kz = np.array(kennzeichen(fahrzeuge), dtype=object)
+    verbrauch = rng.uniform(5, 12, fahrzeuge)
+    tank = rng.choice([50, 60, 70, 80, 90], fahrzeuge)
+    ware = np.where(rng.random(fahrzeuge) < 0.8, "DIESEL", "SUPER E10")
+    fz = np.repeat(np.arange(fahrzeuge), tankungen)
+
+    # Zeitpunkte in Minuten seit Beginn, je Fahrzeug aufsteigend (Tankstellen 6-22 Uhr)
+    minuten = np.sort(rng.integers(0, tage, (fahrzeuge, tankungen)) * 1440
+                      + rng.integers(6 * 60, 22 * 60, (fahrzeuge, tankungen)), axis=1).ravel()
+    menge = np.round(tank[fz] * rng.uniform(0.4, 0.95, n), 2)
+    strecke = (menge / (verbrauch[fz] * rng.normal(1, 0.08, n)) * 100).reshape(fahrzeuge, tankungen)
+    km = np.round(rng.integers(5_000, 250_000, fahrzeuge)[:, None] + np.cumsum(strecke, axis=1)).ravel()
+
+    # Fehlende km-Stände und eine Ziffer zu viel
+    fehler = rng.random(n)
+    km = np.where(fehler < fehlerquote, 0, km)
+    km = np.where((fehler >= fehlerquote) & (fehler < 2 * fehlerquote), km * 10 + rng.integers(0, 10, n), km)
+
+    station = rng.integers(0, len(TANKSTELLEN), n)
+    stations_faktor = rng.uniform(0.95, 1.05, len(TANKSTELLEN))
+    preis = np.array([WARENARTEN[w] for w in ware])[fz] * stations_faktor[station] * rng.normal(1, 0.01, n)
+
+    zeilen = pd.DataFrame({
+        "Kennzeichen": kz[fz],
+        "Datum": pd.to_datetime(STICHTAG - tage + minuten // 1440),
+        "Zeit": [f"{m // 60 % 24:02d}:{m % 60:02d}" for m in minuten.tolist()],
+        "km_Stand": km.astype(float),
+        "Menge_Liter": menge,
+        "Warenart": ware[fz],
+        "Betrag_EUR": np.round(menge * preis, 2),
+        "Tankstelle": np.array(TANKSTELLEN, dtype=object)[station]
+    })
+
+    adblue = zeilen[rng.random(n) < adblue_quote].copy()
+    adblue["Warenart"] = "ADBLUE"
+    adblue["Menge_Liter"] = np.round(rng.uniform(5, 20, len(adblue)), 2)
+    adblue["Betrag_EUR"] = np.round(adblue["Menge_Liter"] * 0.9, 2)
+    zeilen = pd.concat([zeilen, adblue]).sort_values(["Kennzeichen", "Datum", "Zeit"], kind="stable")
+
+    fahrzeuge_config = {"fahrzeuge": [
+        {"kennzeichen": k, "besitzer_name": f"Fahrer {i + 1}", "besitzer_email": f"fahrer{i + 1}@example.com",
+         "verbrauch_min": round(v * 0.5, 1), "verbrauch_max": round(v * 1.6, 1), "tankvolumen": int(t)}
+        for i, (k, v, t) in enumerate(zip(kz, verbrauch, tank))
+    ]}
+    return zeilen.reset_index(drop=True), fahrzeuge_config
+
+def _zahl(wert, stellen=2):
+    return f"{wert:.{stellen}f}".replace(".", ",")
+
+def als_csv(zeilen):
+    """Zeilen als Text einer DKV-CSV (Kopfzeile, vier Zeilen Kopfbereich, Datenzeilen)"""
+    ausgabe = [";".join(CSV_SPALTEN), "DKV Euro Service", "Abrechnung", "Kunde 0000000", ""]
+    for kz, km, datum, zeit, menge, ware, betrag, name in zip(
+            zeilen["Kennzeichen"], zeilen["km_Stand"], zeilen["Datum"].dt.strftime("%d.%m.%Y"), zeilen["Zeit"],
+            zeilen["Menge_Liter"], zeilen["Warenart"], zeilen["Betrag_EUR"], zeilen["Tankstelle"]):
+        ausgabe.append(f"{kz};{km:.0f};{datum};{zeit};{_zahl(menge)};{ware};{_zahl(betrag)};{name}")
+    return "\n".join(ausgabe) + "\n"
+
+def _pdf_text(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def _pdf_seite(tabelle):
+    """Inhaltsstream einer Seite: jede Zelle als Rechteck (Tabellenlinien für pdfplumber) plus Text"""
+    befehle = ["0.5 w"]
+    y = 595 - 30
+    for zeile in tabelle:
+        y -= PDF_ZEILENHOEHE
+        x = 20
+        for breite, zelle in zip(PDF_SPALTEN, zeile):
+            befehle.append(f"{x} {y} {breite} {PDF_ZEILENHOEHE} re S")
+            if zelle:
+                befehle.append(f"BT /F1 6 Tf {x + 2} {y + 4} Td ({_pdf_text(zelle)}) Tj ET")
+            x += breite
+    return "\n".join(befehle).encode("latin-1")
+
+def als_pdf(zeilen, zeilen_pro_seite=40):
+    """
+    Zeilen als DKV-PDF (A4 quer, eine Tabelle je Seite).
+
+    Je Fahrzeug eine Kopfzeile "VEHICLE: <Kennzeichen> CARD ..." und eine TOTAL-Zeile;
+    Datenzeilen mit "Lieferdatum Tankstelle Stationsnummer Zeit km" in Spalte 0, Produkt in
+    Spalte 1, Menge in Spalte 3 und Bruttobetrag in Spalte 10.
+    """
+    leer = [""] * (len(PDF_SPALTEN) - 1)
+    tabelle = []
+    for kz, gruppe in zeilen.groupby("Kennzeichen", sort=False):
+        tabelle.append([f"VEHICLE: {kz} CARD 7040 0000 0000"] + leer)
+        for datum, zeit, km, ware, menge, betrag, name in zip(
+                gruppe["Datum"].dt.strftime("%d.%m.%Y"), gruppe["Zeit"], gruppe["km_Stand"], gruppe["Warenart"],
+                gruppe["Menge_Liter"], gruppe["Betrag_EUR"], gruppe["Tankstelle"]):
+            station = 1000000 + TANKSTELLEN.index(name) if name in TANKSTELLEN else 1000000
+            km_text = f" {km:.0f}" if km > 0 else ""
+            tabelle.append([f"{datum} {name} {station} {zeit}{km_text}", f"{ware} 0001", "L", _zahl(menge)]
+                           + [""] * 6 + [_zahl(betrag)])
+        tabelle.append([f"TOTAL: {kz}"] + leer)
+
+    kopf = ["Lieferdatum Tankstelle Station Zeit km", "Produkt", "", "Menge"] + [""] * 6 + ["Brutto"]
+    seiten = [[kopf] + tabelle[i:i + zeilen_pro_seite] for i in range(0, len(tabelle), zeilen_pro_seite)] or [[kopf]]
+
+    # Objekte: 1 Katalog, 2 Seitenbaum, 3 Schrift, dann je Seite Seite + Inhalt
+    objekte = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    seiten_nr = []
+    for tabelle_seite in seiten:
+        inhalt = _pdf_seite(tabelle_seite)
+        seiten_nr.append(len(objekte) + 1)
+        objekte.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 842 595] /Resources << /Font << /F1 3 0 R >> >> "
+                       f"/Contents {len(objekte) + 2} 0 R >>".encode("latin-1"))
+        objekte.append(b"<< /Length %d >>\nstream\n" % len(inhalt) + inhalt + b"\nendstream")
+    objekte[1] = f"<< /Type /Pages /Kids [{' '.join(f'{n} 0 R' for n in seiten_nr)}] /Count {len(seiten)} >>".encode("latin-1")
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    positionen = []
+    for nr, obj in enumerate(objekte, start=1):
+        positionen.append(len(pdf))
+        pdf += b"%d 0 obj\n" % nr + obj + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objekte) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % p for p in positionen)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objekte) + 1, xref)
+    return bytes(pdf)
+
+def als_historie(zeilen, dateiname="synthetisch.csv"):
+    """Kraftstoffzeilen als fertige Historie (Verbrauch berechnet, ein Import-Eintrag)"""
+    kraftstoff = filtere_kraftstoff(zeilen)
+    tankvorgaenge = erstelle_eintraege(kraftstoff, dateiname)
+    for t in tankvorgaenge:
+        t.update(quittiert=False, quittiert_kommentar="", quittiert_von="", quittiert_am="")
+    historie = {"tankvorgaenge": tankvorgaenge, "importe": [{
+        "datum": "2026-01-01 00:00", "dateiname": dateiname, "anzahl_vorgaenge": len(tankvorgaenge),
+        "sha256": "", "fingerprint": ""
+    }]}
+    return berechne_verbrauch_historie(historie)
+
+def schreibe_datensatz(ziel, fahrzeuge, tankungen=24, tage=365, seed=1, pdf_zeilen=400):
+    """
+    historie.json, fahrzeuge.json, dkv.csv (letzter Monat) und dkv.pdf (pdf_zeilen Zeilen) in ziel anlegen.
+
+    Returns:
+        {Dateiname: Anzahl Zeilen}
+    """
+    os.makedirs(ziel, exist_ok=True)
+    zeilen, fahrzeuge_config = erzeuge_flotte(fahrzeuge, tankungen, tage, seed)
+    historie = als_historie(zeilen)
+    letzter_monat = zeilen[zeilen["Datum"] >= pd.Timestamp(STICHTAG - 30)]
+
+    with open(os.path.join(ziel, "historie.json"), "w", encoding="utf-8") as f:
+        json.dump(historie, f, ensure_ascii=False)
+    with open(os.path.join(ziel, "fahrzeuge.json"), "w", encoding="utf-8") as f:
+        json.dump(fahrzeuge_config, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(ziel, "dkv.csv"), "w", encoding="utf-8") as f:
+        f.write(als_csv(letzter_monat))
+    with open(os.path.join(ziel, "dkv.pdf"), "wb") as f:
+        f.write(als_pdf(letzter_monat.head(pdf_zeilen)))
+    return {"historie.json": len(historie["tankvorgaenge"]), "fahrzeuge.json": fahrzeuge,
+            "dkv.csv": len(letzter_monat), "dkv.pdf": min(len(letzter_monat), pdf_zeilen)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("ziel")
+    parser.add_argument("--fahrzeuge", type=int, default=1000)
+    parser.add_argument("--tankungen", type=int, default=24, help="Tankvorgänge je Fahrzeug")
+    parser.add_argument("--tage", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--pdf-zeilen", type=int, default=400)
+    args = parser.parse_args()
+
+    dateien = schreibe_datensatz(args.ziel, args.fahrzeuge, args.tankungen, args.tage, args.seed, args.pdf_zeilen)
+    for name, anzahl in dateien.items():
+        print(f"{name}: {anzahl}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,63 +1,127 @@
 import streamlit as st
 import streamlit.components.v1 as components
 import pandas as pd
+import numpy as np
 import altair as alt
-import json
-import os
-import re
-import hashlib
-import secrets
-import pdfplumber
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from io import StringIO, BytesIO
 from datetime import datetime
 import time
-import zipfile
 
 # Mehrsprachigkeit importieren
 from i18n import SPRACHEN, t
 
+# Kernfunktionen (Parsing, Analyse, Speicherung, Benutzer, E-Mail)
+from dkv_core import (
+    DEFAULT_EMAIL_VORLAGE,
+    HOTFOLDER_AKTIV,
+    LITER_FENSTER_STUNDEN,
+    METRIKEN_ADRESSE,
+    METRIKEN_PORT,
+    ROLLEN,
+    MetrikenServer,
+    aktualisiere_auffaelligkeiten,
+    aktualisiere_benutzer,
+    anzahl_offene_auffaelligkeiten,
+    auffaelligkeiten_als_liste,
+    authentifiziere_benutzer,
+    beende_abschnitt,
+    beende_lauf,
+    beginne_abschnitt,
+    beginne_lauf,
+    bekannte_inhalte,
+    berechne_datei_hash,
+    berechne_preisbasis,
+    berechne_verbrauch,
+    brich_profilierung_ab,
+    erstelle_auffaelligkeiten_email,
+    erstelle_backup,
+    erstelle_benutzer,
+    erstelle_email_betreff,
+    filtere_kraftstoff,
+    finde_benutzer,
+    generiere_temp_passwort,
+    hash_passwort,
+    hat_recht,
+    historie_sperre,
+    historie_stempel,
+    historie_tabelle,
+    hole_alle_kennzeichen_aus_historie,
+    hole_besitzer_fuer_kennzeichen,
+    lade_benutzer,
+    lade_email_vorlage,
+    lade_fahrzeuge,
+    lade_historie,
+    lade_smtp_config,
+    letzte_laeufe,
+    lese_verbrauchsgrenzen,
+    loesche_benutzer,
+    loesche_profil_ergebnis,
+    markiere_auffaelligkeiten,
+    messe,
+    preisbasis_historie,
+    profil_ergebnisse,
+    profilierung_status,
+    pruefe_passwort,
+    pruefe_tankvorgaenge,
+    pruefrahmen_aus_import,
+    pruefregeln_fehler,
+    sende_benachrichtigung,
+    sende_passwort_reset_email,
+    speichere_email_vorlage,
+    speichere_fahrzeuge,
+    speichere_historie,
+    speichere_manuellen_tankvorgang,
+    speichere_smtp_config,
+    starte_profilierung,
+    stelle_backup_wieder_her,
+    stufen_statistik,
+    teste_smtp_verbindung,
+    uebernehme_in_historie,
+    verbrauch_vorwerte_historie,
+    vergleiche_mit_historie,
+)
+from dkv_core.hotfolder import HotfolderDienst
+from dkv_core.importjobs import (
+    ImportJobDienst,
+    brich_job_ab,
+    erstelle_job,
+    lade_job,
+    lade_job_ergebnisse,
+    loesche_job,
+    offene_hashes,
+    offene_jobs,
+)
+
 # Konfiguration
 st.set_page_config(page_title="DKV Abrechnungs-Checker", layout="wide")
 
-# Datenverzeichnis (Standard: Projektverzeichnis, überschreibbar via Umgebungsvariable)
-DATA_DIR = os.environ.get("DKV_DATA_DIR", os.path.dirname(__file__))
-HISTORIE_DATEI = os.path.join(DATA_DIR, "historie.json")
-FAHRZEUGE_DATEI = os.path.join(DATA_DIR, "fahrzeuge.json")
-SMTP_CONFIG_DATEI = os.path.join(DATA_DIR, "smtp_config.json")
-EMAIL_VORLAGE_DATEI = os.path.join(DATA_DIR, "email_vorlage.json")
-BENUTZER_DATEI = os.path.join(DATA_DIR, "benutzer.json")
-
-# Rollen und ihre Rechte
-ROLLEN = {
-    "admin": {
-        "name": "Administrator",
-        "beschreibung": "Vollzugriff auf alle Funktionen",
-        "rechte": ["ansehen", "exportieren", "importieren", "bearbeiten", "email_senden",
-                   "fahrzeuge_verwalten", "historie_loeschen", "smtp_config", "vorlage_config", "benutzer_verwalten", "datensicherung"]
-    },
-    "manager": {
-        "name": "Manager",
-        "beschreibung": "Daten verwalten und E-Mails versenden",
-        "rechte": ["ansehen", "exportieren", "importieren", "bearbeiten", "email_senden", "fahrzeuge_verwalten"]
-    },
-    "viewer": {
-        "name": "Betrachter",
-        "beschreibung": "Nur Lesezugriff",
-        "rechte": ["ansehen", "exportieren"]
-    }
-}
-
-# Standard E-Mail-Vorlage
-DEFAULT_EMAIL_VORLAGE = {
-    "betreff": "DKV Checker: {anzahl_gesamt} Auffälligkeit(en) für {kennzeichen}",
-    "anrede": "Hallo {besitzer_name},",
-    "einleitung": "für Ihr Fahrzeug <strong>{kennzeichen}</strong> wurden folgende Auffälligkeiten festgestellt:",
-    "abschluss": "Bitte überprüfen und korrigieren Sie die betroffenen Tankvorgänge.",
-    "fusszeile": "Diese E-Mail wurde automatisch vom DKV Abrechnungs-Checker generiert."
-}
+# Optionaler Hotfolder-Dienst (DKV_HOTFOLDER=1): ein Hintergrund-Thread pro Prozess
+@st.cache_resource
+def _starte_hotfolder():
+    dienst = HotfolderDienst()
+    dienst.starte_im_hintergrund()
+    return dienst
+
+if HOTFOLDER_AKTIV:
+    _starte_hotfolder()
+
+# Import-Aufträge: Parsen im Hintergrund-Thread, überlebt Reruns und Neustarts
+@st.cache_resource
+def _starte_import_jobs():
+    dienst = ImportJobDienst()
+    dienst.starte_im_hintergrund()
+    return dienst
+
+import_jobs_dienst = _starte_import_jobs()
+
+# Optionale Metriken für Prometheus (DKV_METRIKEN_PORT): eigener lokaler Port, ein Server pro Prozess
+@st.cache_resource
+def _starte_metriken():
+    server = MetrikenServer(METRIKEN_ADRESSE, METRIKEN_PORT)
+    server.starte_im_hintergrund()
+    return server
+
+if METRIKEN_PORT:
+    _starte_metriken()
 
 # --- Session State initialisieren ---
 if "logged_in" not in st.session_state:
@@ -76,6 +140,13 @@ if "sprache" not in st.session_state:
     st.session_state["sprache"] = "de"
 if "pw_reset_cooldown" not in st.session_state:
     st.session_state["pw_reset_cooldown"] = 0
+if "upload_nr" not in st.session_state:
+    st.session_state["upload_nr"] = 0  # neuer Schlüssel leert den Uploader nach Übergabe an einen Import-Auftrag
+
+# Laufzeitmessung: ein Messlauf pro Rerun (Diagnose unter Einstellungen); profiliert wird
+# nur, wenn ein Administrator dort eine Profilierung der nächsten Reruns gestartet hat
+beginne_lauf(st.session_state["username"])
+beginne_abschnitt("rerun")
 
 # Hilfsfunktion für Übersetzungen mit aktueller Sprache
 def _(key, **kwargs):
@@ -90,828 +161,6 @@ def aktueller_benutzer_hat_recht(recht):
 
 # --- Hilfsfunktionen ---
 
-def parse_german_number(value):
-    """Deutsche Zahlen umwandeln (1.234,56 -> 1234.56)"""
-    if pd.isna(value) or value == "":
-        return None
-    if isinstance(value, (int, float)):
-        return float(value)
-    value = str(value).strip()
-    value = value.replace(".", "").replace(",", ".")
-    try:
-        return float(value)
-    except:
-        return None
-
-def lade_historie():
-    """Historie aus JSON laden"""
-    if os.path.exists(HISTORIE_DATEI):
-        with open(HISTORIE_DATEI, "r", encoding="utf-8") as f:
-            historie = json.load(f)
-            # Sicherstellen dass alle Felder existieren
-            for t in historie.get("tankvorgaenge", []):
-                if "km_differenz" not in t:
-                    t["km_differenz"] = None
-                if "verbrauch" not in t:
-                    t["verbrauch"] = None
-                if "quelldatei" not in t:
-                    t["quelldatei"] = ""  # Ältere Einträge ohne Quelldatei
-                # Quittierungs-Felder
-                if "quittiert" not in t:
-                    t["quittiert"] = False
-                if "quittiert_kommentar" not in t:
-                    t["quittiert_kommentar"] = ""
-                if "quittiert_von" not in t:
-                    t["quittiert_von"] = ""
-                if "quittiert_am" not in t:
-                    t["quittiert_am"] = ""
-            return historie
-    return {"tankvorgaenge": [], "importe": []}
-
-def speichere_historie(historie, neu_berechnen=True):
-    """Historie in JSON speichern, optional Verbrauch neu berechnen"""
-    if neu_berechnen and historie["tankvorgaenge"]:
-        historie = berechne_verbrauch_historie(historie)
-    with open(HISTORIE_DATEI, "w", encoding="utf-8") as f:
-        json.dump(historie, f, ensure_ascii=False, indent=2)
-
-def lade_fahrzeuge():
-    """Fahrzeug-Besitzer-Zuordnung aus JSON laden"""
-    if os.path.exists(FAHRZEUGE_DATEI):
-        with open(FAHRZEUGE_DATEI, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"fahrzeuge": []}
-
-def speichere_fahrzeuge(fahrzeuge):
-    """Fahrzeug-Besitzer-Zuordnung in JSON speichern"""
-    with open(FAHRZEUGE_DATEI, "w", encoding="utf-8") as f:
-        json.dump(fahrzeuge, f, ensure_ascii=False, indent=2)
-
-def lade_smtp_config():
-    """SMTP-Konfiguration aus JSON laden"""
-    if os.path.exists(SMTP_CONFIG_DATEI):
-        with open(SMTP_CONFIG_DATEI, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {
-        "server": "",
-        "port": 587,
-        "benutzer": "",
-        "passwort": "",
-        "absender_name": "DKV Checker",
-        "absender_email": "",
-        "tls": True
-    }
-
-def speichere_smtp_config(config):
-    """SMTP-Konfiguration in JSON speichern"""
-    with open(SMTP_CONFIG_DATEI, "w", encoding="utf-8") as f:
-        json.dump(config, f, ensure_ascii=False, indent=2)
-
-def lade_email_vorlage():
-    """E-Mail-Vorlage aus JSON laden"""
-    if os.path.exists(EMAIL_VORLAGE_DATEI):
-        with open(EMAIL_VORLAGE_DATEI, "r", encoding="utf-8") as f:
-            vorlage = json.load(f)
-            # Fehlende Felder mit Defaults ergänzen
-            for key, value in DEFAULT_EMAIL_VORLAGE.items():
-                if key not in vorlage:
-                    vorlage[key] = value
-            return vorlage
-    return DEFAULT_EMAIL_VORLAGE.copy()
-
-def speichere_email_vorlage(vorlage):
-    """E-Mail-Vorlage in JSON speichern"""
-    with open(EMAIL_VORLAGE_DATEI, "w", encoding="utf-8") as f:
-        json.dump(vorlage, f, ensure_ascii=False, indent=2)
-
-# --- Datensicherung ---
-BACKUP_DATEIEN = {
-    "historie.json": HISTORIE_DATEI,
-    "fahrzeuge.json": FAHRZEUGE_DATEI,
-    "smtp_config.json": SMTP_CONFIG_DATEI,
-    "email_vorlage.json": EMAIL_VORLAGE_DATEI,
-    "benutzer.json": BENUTZER_DATEI
-}
-
-def erstelle_backup():
-    """Erstellt ZIP-Datei mit allen Konfigurationsdateien"""
-    zip_buffer = BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-        for dateiname, dateipfad in BACKUP_DATEIEN.items():
-            if os.path.exists(dateipfad):
-                with open(dateipfad, "r", encoding="utf-8") as f:
-                    zf.writestr(dateiname, f.read())
-
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-    backup_name = f"dkv_backup_{timestamp}.zip"
-    return zip_buffer.getvalue(), backup_name
-
-def stelle_backup_wieder_her(zip_bytes):
-    """Stellt Backup aus ZIP-Datei wieder her"""
-    try:
-        zip_buffer = BytesIO(zip_bytes)
-        with zipfile.ZipFile(zip_buffer, "r") as zf:
-            # Prüfen welche Dateien im ZIP vorhanden sind
-            zip_dateien = zf.namelist()
-            gefundene_dateien = []
-
-            # JSON-Struktur validieren
-            for dateiname in zip_dateien:
-                if dateiname in BACKUP_DATEIEN:
-                    try:
-                        inhalt = zf.read(dateiname).decode("utf-8")
-                        json.loads(inhalt)  # Validierung
-                        gefundene_dateien.append(dateiname)
-                    except json.JSONDecodeError:
-                        return False, f"Ungültige JSON-Struktur in '{dateiname}'"
-
-            if not gefundene_dateien:
-                return False, "Keine gültigen Backup-Dateien im ZIP gefunden"
-
-            # Dateien extrahieren und speichern
-            for dateiname in gefundene_dateien:
-                inhalt = zf.read(dateiname).decode("utf-8")
-                dateipfad = BACKUP_DATEIEN[dateiname]
-                with open(dateipfad, "w", encoding="utf-8") as f:
-                    f.write(inhalt)
-
-            return True, f"{len(gefundene_dateien)} Datei(en) wiederhergestellt: {', '.join(gefundene_dateien)}"
-
-    except zipfile.BadZipFile:
-        return False, "Ungültige ZIP-Datei"
-    except Exception as e:
-        return False, f"Fehler beim Wiederherstellen: {str(e)}"
-
-# --- Passwort-Hashing ---
-def hash_passwort(passwort, salt=None):
-    """Erstellt einen sicheren Hash des Passworts mit PBKDF2"""
-    if salt is None:
-        salt = secrets.token_hex(32)
-    # PBKDF2 mit SHA-256, 100.000 Iterationen
-    pw_hash = hashlib.pbkdf2_hmac(
-        'sha256',
-        passwort.encode('utf-8'),
-        salt.encode('utf-8'),
-        100000
-    ).hex()
-    return f"{salt}${pw_hash}"
-
-def pruefe_passwort(passwort, gespeicherter_hash):
-    """Prüft ob das Passwort mit dem gespeicherten Hash übereinstimmt"""
-    if '$' not in gespeicherter_hash:
-        return False
-    salt, _ = gespeicherter_hash.split('$', 1)
-    return hash_passwort(passwort, salt) == gespeicherter_hash
-
-# --- Benutzerverwaltung ---
-def lade_benutzer():
-    """Benutzer aus JSON laden, erstellt Standard-Admin falls nicht vorhanden"""
-    if os.path.exists(BENUTZER_DATEI):
-        with open(BENUTZER_DATEI, "r", encoding="utf-8") as f:
-            return json.load(f)
-
-    # Standard-Admin erstellen beim ersten Start
-    standard_benutzer = {
-        "benutzer": [
-            {
-                "benutzername": "admin",
-                "passwort_hash": hash_passwort("admin"),
-                "rolle": "admin",
-                "name": "Administrator",
-                "email": "",
-                "aktiv": True,
-                "muss_passwort_aendern": True  # Erzwingt Passwortänderung beim ersten Login
-            }
-        ]
-    }
-    speichere_benutzer(standard_benutzer)
-    return standard_benutzer
-
-def speichere_benutzer(benutzer_daten):
-    """Benutzer in JSON speichern"""
-    with open(BENUTZER_DATEI, "w", encoding="utf-8") as f:
-        json.dump(benutzer_daten, f, ensure_ascii=False, indent=2)
-
-def finde_benutzer(benutzername):
-    """Findet einen Benutzer anhand des Benutzernamens"""
-    benutzer_daten = lade_benutzer()
-    for b in benutzer_daten.get("benutzer", []):
-        if b["benutzername"].lower() == benutzername.lower():
-            return b
-    return None
-
-def authentifiziere_benutzer(benutzername, passwort):
-    """Prüft Login-Daten und gibt Benutzer-Objekt oder None zurück"""
-    benutzer = finde_benutzer(benutzername)
-    if benutzer and benutzer.get("aktiv", True):
-        if pruefe_passwort(passwort, benutzer.get("passwort_hash", "")):
-            return benutzer
-    return None
-
-def hat_recht(rolle, recht):
-    """Prüft ob eine Rolle ein bestimmtes Recht hat"""
-    if rolle not in ROLLEN:
-        return False
-    return recht in ROLLEN[rolle].get("rechte", [])
-
-def aktualisiere_benutzer(benutzername, updates):
-    """Aktualisiert einen Benutzer mit den angegebenen Feldern"""
-    benutzer_daten = lade_benutzer()
-    for i, b in enumerate(benutzer_daten.get("benutzer", [])):
-        if b["benutzername"].lower() == benutzername.lower():
-            benutzer_daten["benutzer"][i].update(updates)
-            speichere_benutzer(benutzer_daten)
-            return True
-    return False
-
-def erstelle_benutzer(benutzername, passwort, rolle, name="", email=""):
-    """Erstellt einen neuen Benutzer"""
-    benutzer_daten = lade_benutzer()
-
-    # Prüfen ob Benutzername bereits existiert
-    if finde_benutzer(benutzername):
-        return False, "Benutzername bereits vergeben"
-
-    neuer_benutzer = {
-        "benutzername": benutzername,
-        "passwort_hash": hash_passwort(passwort),
-        "rolle": rolle,
-        "name": name,
-        "email": email,
-        "aktiv": True,
-        "muss_passwort_aendern": True
-    }
-    benutzer_daten["benutzer"].append(neuer_benutzer)
-    speichere_benutzer(benutzer_daten)
-    return True, "Benutzer erstellt"
-
-def loesche_benutzer(benutzername):
-    """Löscht einen Benutzer (außer den letzten Admin)"""
-    benutzer_daten = lade_benutzer()
-
-    # Zähle aktive Admins
-    admins = [b for b in benutzer_daten["benutzer"] if b["rolle"] == "admin" and b["aktiv"]]
-    benutzer = finde_benutzer(benutzername)
-
-    if benutzer and benutzer["rolle"] == "admin" and len(admins) <= 1:
-        return False, "Der letzte Administrator kann nicht gelöscht werden"
-
-    benutzer_daten["benutzer"] = [b for b in benutzer_daten["benutzer"]
-                                   if b["benutzername"].lower() != benutzername.lower()]
-    speichere_benutzer(benutzer_daten)
-    return True, "Benutzer gelöscht"
-
-def generiere_temp_passwort(laenge=10):
-    """Generiert ein temporäres Passwort"""
-    return secrets.token_urlsafe(laenge)[:laenge]
-
-def hole_besitzer_fuer_kennzeichen(fahrzeuge, kennzeichen):
-    """Gibt Besitzer-Daten für ein Kennzeichen zurück oder None"""
-    for f in fahrzeuge.get("fahrzeuge", []):
-        if f["kennzeichen"] == kennzeichen:
-            return f
-    return None
-
-def speichere_manuellen_tankvorgang(historie, eintrag):
-    """Speichert einen manuell erfassten Tankvorgang"""
-    eintrag["quelldatei"] = "MANUELL"
-    # Quittierungs-Felder initialisieren
-    eintrag["quittiert"] = False
-    eintrag["quittiert_kommentar"] = ""
-    eintrag["quittiert_von"] = ""
-    eintrag["quittiert_am"] = ""
-    historie["tankvorgaenge"].append(eintrag)
-    speichere_historie(historie)
-    return True
-
-def hole_alle_kennzeichen_aus_historie(historie):
-    """Gibt alle eindeutigen Kennzeichen aus der Historie zurück"""
-    kennzeichen = set()
-    for t in historie.get("tankvorgaenge", []):
-        if t.get("kennzeichen"):
-            kennzeichen.add(t["kennzeichen"])
-    return sorted(list(kennzeichen))
-
-def ersetze_platzhalter(text, platzhalter):
-    """Ersetzt Platzhalter in einem Text"""
-    for key, value in platzhalter.items():
-        text = text.replace("{" + key + "}", str(value))
-    return text
-
-def erstelle_auffaelligkeiten_email(besitzer_name, kennzeichen, auffaelligkeiten, vorlage=None):
-    """Erstellt HTML-E-Mail mit Auffälligkeiten für ein Fahrzeug"""
-    if vorlage is None:
-        vorlage = lade_email_vorlage()
-
-    fehler = [a for a in auffaelligkeiten if a["schwere"] == "fehler"]
-    warnungen = [a for a in auffaelligkeiten if a["schwere"] == "warnung"]
-
-    # Platzhalter-Werte
-    platzhalter = {
-        "besitzer_name": besitzer_name,
-        "kennzeichen": kennzeichen,
-        "anzahl_gesamt": len(auffaelligkeiten),
-        "anzahl_fehler": len(fehler),
-        "anzahl_warnungen": len(warnungen),
-        "datum_heute": datetime.now().strftime("%d.%m.%Y")
-    }
-
-    # Vorlagen-Texte mit Platzhaltern ersetzen
-    anrede = ersetze_platzhalter(vorlage.get("anrede", DEFAULT_EMAIL_VORLAGE["anrede"]), platzhalter)
-    einleitung = ersetze_platzhalter(vorlage.get("einleitung", DEFAULT_EMAIL_VORLAGE["einleitung"]), platzhalter)
-    abschluss = ersetze_platzhalter(vorlage.get("abschluss", DEFAULT_EMAIL_VORLAGE["abschluss"]), platzhalter)
-    fusszeile = ersetze_platzhalter(vorlage.get("fusszeile", DEFAULT_EMAIL_VORLAGE["fusszeile"]), platzhalter)
-
-    # Auffälligkeiten-Tabelle erstellen
-    tabellen_zeilen = ""
-    for a in sorted(auffaelligkeiten, key=lambda x: (x["datum"], x["zeit"]), reverse=True):
-        row_class = "fehler-row" if a["schwere"] == "fehler" else "warnung-row"
-        tabellen_zeilen += f"""
-                    <tr class="{row_class}">
-                        <td>{a['datum']}</td>
-                        <td>{a['zeit']}</td>
-                        <td>{a['typ']}</td>
-                        <td>{a['details']}</td>
-                    </tr>"""
-
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            h1 {{ color: #2c3e50; }}
-            .summary {{ background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin: 20px 0; }}
-            .summary-item {{ display: inline-block; margin-right: 30px; }}
-            .fehler {{ color: #c0392b; font-weight: bold; }}
-            .warnung {{ color: #d35400; font-weight: bold; }}
-            table {{ width: 100%; border-collapse: collapse; margin: 20px 0; }}
-            th, td {{ padding: 10px; text-align: left; border-bottom: 1px solid #ddd; }}
-            th {{ background-color: #34495e; color: white; }}
-            tr.fehler-row {{ background-color: #ffcccc; }}
-            tr.warnung-row {{ background-color: #ffe6cc; }}
-            .footer {{ margin-top: 30px; font-size: 12px; color: #7f8c8d; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>DKV Abrechnungs-Checker: Auffälligkeiten</h1>
-
-            <p>{anrede}</p>
-
-            <p>{einleitung}</p>
-
-            <div class="summary">
-                <span class="summary-item"><strong>Gesamt:</strong> {len(auffaelligkeiten)}</span>
-                <span class="summary-item"><span class="fehler">Fehler:</span> {len(fehler)}</span>
-                <span class="summary-item"><span class="warnung">Warnungen:</span> {len(warnungen)}</span>
-            </div>
-
-            <table>
-                <thead>
-                    <tr>
-                        <th>Datum</th>
-                        <th>Zeit</th>
-                        <th>Problem</th>
-                        <th>Details</th>
-                    </tr>
-                </thead>
-                <tbody>{tabellen_zeilen}
-                </tbody>
-            </table>
-
-            <p>{abschluss}</p>
-
-            <div class="footer">
-                <p>{fusszeile}</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    return html
-
-def erstelle_email_betreff(kennzeichen, auffaelligkeiten, vorlage=None):
-    """Erstellt den E-Mail-Betreff aus der Vorlage"""
-    if vorlage is None:
-        vorlage = lade_email_vorlage()
-
-    fehler = [a for a in auffaelligkeiten if a["schwere"] == "fehler"]
-    warnungen = [a for a in auffaelligkeiten if a["schwere"] == "warnung"]
-
-    platzhalter = {
-        "kennzeichen": kennzeichen,
-        "anzahl_gesamt": len(auffaelligkeiten),
-        "anzahl_fehler": len(fehler),
-        "anzahl_warnungen": len(warnungen),
-        "datum_heute": datetime.now().strftime("%d.%m.%Y")
-    }
-
-    betreff = ersetze_platzhalter(vorlage.get("betreff", DEFAULT_EMAIL_VORLAGE["betreff"]), platzhalter)
-    return betreff
-
-def _erstelle_smtp_verbindung(config, timeout=10):
-    """Erstellt SMTP-Verbindung basierend auf Port und TLS-Einstellung"""
-    port = config.get("port", 587)
-    if port == 465:
-        # Port 465: Implicit SSL/TLS (SMTPS)
-        server = smtplib.SMTP_SSL(config["server"], port, timeout=timeout)
-    elif config.get("tls", True):
-        # Port 587: STARTTLS
-        server = smtplib.SMTP(config["server"], port, timeout=timeout)
-        server.starttls()
-    else:
-        # Kein TLS (z.B. Port 25)
-        server = smtplib.SMTP(config["server"], port, timeout=timeout)
-    return server
-
-def teste_smtp_verbindung(config):
-    """Testet die SMTP-Verbindung und gibt (erfolg, nachricht) zurück"""
-    if not config.get("server"):
-        return False, "Kein SMTP-Server konfiguriert"
-
-    try:
-        server = _erstelle_smtp_verbindung(config, timeout=10)
-
-        if config.get("benutzer") and config.get("passwort"):
-            server.login(config["benutzer"], config["passwort"])
-
-        server.quit()
-        return True, "Verbindung erfolgreich!"
-    except smtplib.SMTPAuthenticationError:
-        return False, "Authentifizierung fehlgeschlagen. Bitte Benutzername und Passwort prüfen."
-    except smtplib.SMTPConnectError:
-        return False, f"Verbindung zu {config['server']}:{config.get('port', 587)} fehlgeschlagen."
-    except Exception as e:
-        return False, f"Fehler: {str(e)}"
-
-def sende_benachrichtigung(smtp_config, empfaenger_email, betreff, html_body):
-    """Sendet eine E-Mail und gibt (erfolg, nachricht) zurück"""
-    if not smtp_config.get("server"):
-        return False, "Kein SMTP-Server konfiguriert"
-
-    if not smtp_config.get("absender_email"):
-        return False, "Keine Absender-E-Mail konfiguriert"
-
-    try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = betreff
-        msg["From"] = f"{smtp_config.get('absender_name', 'DKV Checker')} <{smtp_config['absender_email']}>"
-        msg["To"] = empfaenger_email
-
-        # HTML-Version
-        html_part = MIMEText(html_body, "html", "utf-8")
-        msg.attach(html_part)
-
-        server = _erstelle_smtp_verbindung(smtp_config, timeout=30)
-
-        if smtp_config.get("benutzer") and smtp_config.get("passwort"):
-            server.login(smtp_config["benutzer"], smtp_config["passwort"])
-
-        server.sendmail(smtp_config["absender_email"], empfaenger_email, msg.as_string())
-        server.quit()
-
-        return True, f"E-Mail an {empfaenger_email} gesendet"
-    except Exception as e:
-        return False, f"Fehler beim Senden: {str(e)}"
-
-def sende_passwort_reset_email(benutzername, sprache="de"):
-    """Sendet ein temporäres Passwort per E-Mail. Gibt immer generische Meldung zurück (keine Username-Enumeration)."""
-    smtp_config = lade_smtp_config()
-    if not smtp_config.get("server") or not smtp_config.get("absender_email"):
-        return False, t("passwort_reset.smtp_nicht_konfiguriert", sprache)
-
-    benutzer = finde_benutzer(benutzername)
-    if not benutzer or not benutzer.get("email"):
-        # Generische Meldung — kein Hinweis ob Benutzer existiert
-        return True, t("passwort_reset.email_gesendet_info", sprache)
-
-    temp_pw = generiere_temp_passwort()
-    aktualisiere_benutzer(benutzername, {
-        "passwort_hash": hash_passwort(temp_pw),
-        "muss_passwort_aendern": True
-    })
-
-    name = benutzer.get("name", benutzername)
-    betreff = t("passwort_reset.betreff", sprache)
-    html_body = f"""
-    <html><body style="font-family: Arial, sans-serif;">
-    <h2>{t("passwort_reset.titel", sprache)}</h2>
-    <p>{t("passwort_reset.anrede", sprache, name=name)}</p>
-    <p>{t("passwort_reset.text", sprache)}</p>
-    <p style="font-size: 18px; font-weight: bold; background-color: #f0f0f0; padding: 10px; border-radius: 5px;">{temp_pw}</p>
-    <p><em>{t("passwort_reset.hinweis", sprache)}</em></p>
-    <hr>
-    <small>{t("passwort_reset.fusszeile", sprache)}</small>
-    </body></html>
-    """
-
-    try:
-        sende_benachrichtigung(smtp_config, benutzer["email"], betreff, html_body)
-    except Exception:
-        pass  # Fehler nicht an Benutzer weitergeben
-
-    return True, t("passwort_reset.email_gesendet_info", sprache)
-
-def parse_dkv_csv(content):
-    """DKV-CSV parsen und DataFrame zurückgeben"""
-    lines = content.split("\n")
-    header = lines[0]
-    data_lines = [line for line in lines[5:] if line.strip() and ";" in line and not line.startswith(" ")]
-    clean_csv = header + "\n" + "\n".join(data_lines)
-
-    df = pd.read_csv(StringIO(clean_csv), delimiter=";", dtype=str)
-
-    df_clean = pd.DataFrame()
-    df_clean["Kennzeichen"] = df["Kennzeichen"].str.strip()
-    df_clean["km_Stand"] = df["km-Stand"].apply(parse_german_number)
-    df_clean["Datum"] = pd.to_datetime(df["Lieferdatum"], format="%d.%m.%Y", errors="coerce")
-    df_clean["Zeit"] = df["Lieferzeit"].str.strip()
-    df_clean["Menge_Liter"] = df["Menge"].apply(parse_german_number)
-    df_clean["Warenart"] = df["Warenart"].str.strip()
-    df_clean["Betrag_EUR"] = df["Wert incl. USt"].apply(parse_german_number)
-    df_clean["Tankstelle"] = df["Name"].str.strip()
-
-    return df_clean.sort_values(["Kennzeichen", "Datum", "Zeit"]).reset_index(drop=True)
-
-def parse_dkv_pdf(pdf_bytes):
-    """DKV-PDF parsen und DataFrame zurückgeben"""
-    records = []
-    current_vehicle = None
-
-    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
-        for page in pdf.pages:
-            tables = page.extract_tables()
-
-            for table in tables:
-                for row in table:
-                    if not row or not row[0]:
-                        continue
-
-                    first_cell = str(row[0])
-
-                    # Fahrzeug-Header erkennen
-                    vehicle_match = re.search(r"VEHICLE:\s*([A-Z]{2,3}-[A-Z]{1,2}\s*\d+[A-Z]?)\s+CARD", first_cell)
-                    if vehicle_match:
-                        current_vehicle = vehicle_match.group(1).replace(" ", "")
-                        continue
-
-                    # TOTAL-Zeilen und Header überspringen
-                    if "TOTAL:" in first_cell or "Gesamtsummen" in first_cell or "Lieferdatum" in first_cell:
-                        continue
-
-                    # Datenzeilen verarbeiten (können mehrere Einträge mit \n enthalten)
-                    if re.match(r"\d{2}\.\d{2}\.\d{4}", first_cell) and current_vehicle:
-                        # Zellen in Zeilen aufteilen
-                        lines_col0 = first_cell.split("\n")
-                        lines_col1 = (row[1] or "").split("\n") if len(row) > 1 else [""] * len(lines_col0)
-                        lines_col3 = (row[3] or "").split("\n") if len(row) > 3 else [""] * len(lines_col0)
-                        lines_col10 = (row[10] or "").split("\n") if len(row) > 10 else [""] * len(lines_col0)
-
-                        for i, line in enumerate(lines_col0):
-                            # Datum extrahieren
-                            datum_match = re.match(r"(\d{2}\.\d{2}\.\d{4})\s+(.+)", line)
-                            if not datum_match:
-                                continue
-
-                            datum = datum_match.group(1)
-                            rest_line = datum_match.group(2)
-
-                            # Zeit aus der Zeile extrahieren (Format HH:MM)
-                            zeit = ""
-                            zeit_match = re.search(r"(\d{2}:\d{2})", rest_line)
-                            if zeit_match:
-                                zeit = zeit_match.group(1)
-
-                            # km-Stand: Zahl nach der Zeit
-                            km_stand = None
-                            if zeit:
-                                after_time = rest_line[rest_line.index(zeit) + 5:].strip()
-                                km_match = re.match(r"(\d+)", after_time)
-                                if km_match:
-                                    km_stand = km_match.group(1)
-
-                            # Tankstelle: Text zwischen Datum und Stationsnummer
-                            station_match = re.search(r"(\d{7})", rest_line)
-                            tankstelle = ""
-                            if station_match:
-                                tankstelle = rest_line[:station_match.start()].strip()
-
-                            # Produkt aus Spalte 1
-                            produkt = ""
-                            if i < len(lines_col1):
-                                prod_match = re.match(r"([A-Z0-9\s\(\)]+)\s+\d{4}", lines_col1[i])
-                                if prod_match:
-                                    produkt = prod_match.group(1).strip()
-
-                            # Menge aus Spalte 3
-                            menge = None
-                            if i < len(lines_col3):
-                                menge = parse_german_number(lines_col3[i].strip())
-
-                            # Betrag aus Spalte 10 (Gesamtwert brutto)
-                            betrag = None
-                            if i < len(lines_col10):
-                                betrag = parse_german_number(lines_col10[i].strip())
-
-                            if menge and menge > 0:
-                                records.append({
-                                    "Kennzeichen": current_vehicle,
-                                    "Datum": datum,
-                                    "Tankstelle": tankstelle,
-                                    "Zeit": zeit,
-                                    "km_Stand": parse_german_number(km_stand) if km_stand else None,
-                                    "Warenart": produkt,
-                                    "Menge_Liter": menge,
-                                    "Betrag_EUR": betrag
-                                })
-
-    if not records:
-        return pd.DataFrame()
-
-    df = pd.DataFrame(records)
-    df["Datum"] = pd.to_datetime(df["Datum"], format="%d.%m.%Y", errors="coerce")
-
-    return df.sort_values(["Kennzeichen", "Datum", "Zeit"]).reset_index(drop=True)
-
-def berechne_verbrauch(df):
-    """Verbrauch berechnen und DataFrame erweitern"""
-    result = []
-
-    for kennzeichen in df["Kennzeichen"].unique():
-        fahrzeug_df = df[df["Kennzeichen"] == kennzeichen].copy()
-        fahrzeug_df = fahrzeug_df.sort_values(["Datum", "Zeit"]).reset_index(drop=True)
-
-        fahrzeug_df["km_vorher"] = fahrzeug_df["km_Stand"].shift(1)
-        fahrzeug_df["km_differenz"] = fahrzeug_df["km_Stand"] - fahrzeug_df["km_vorher"]
-        fahrzeug_df["Verbrauch_L100km"] = (fahrzeug_df["Menge_Liter"] / fahrzeug_df["km_differenz"]) * 100
-
-        result.append(fahrzeug_df)
-
-    return pd.concat(result, ignore_index=True) if result else df
-
-def berechne_verbrauch_historie(historie):
-    """Berechnet Verbrauch und km-Differenz für alle Einträge in der Historie neu"""
-    if not historie["tankvorgaenge"]:
-        return historie
-
-    # Alle Tankvorgänge als Liste bearbeiten
-    tankvorgaenge = historie["tankvorgaenge"].copy()
-
-    # Nach Fahrzeug gruppieren und sortieren
-    from collections import defaultdict
-    fahrzeuge = defaultdict(list)
-
-    for i, t in enumerate(tankvorgaenge):
-        fahrzeuge[t["kennzeichen"]].append((i, t))
-
-    # Pro Fahrzeug berechnen
-    for kennzeichen, eintraege in fahrzeuge.items():
-        # Nach Datum und Zeit sortieren
-        eintraege_sorted = sorted(eintraege, key=lambda x: (x[1]["datum"], x[1]["zeit"] or ""))
-
-        km_vorher = None
-        for j, (original_idx, eintrag) in enumerate(eintraege_sorted):
-            km_aktuell = eintrag.get("km_stand")
-
-            if j == 0 or km_vorher is None:
-                # Erster Eintrag oder vorheriger km-Stand fehlt
-                tankvorgaenge[original_idx]["km_differenz"] = None
-                tankvorgaenge[original_idx]["verbrauch"] = None
-            else:
-                if km_aktuell is not None and km_aktuell > 0:
-                    km_diff = km_aktuell - km_vorher
-                    tankvorgaenge[original_idx]["km_differenz"] = km_diff
-
-                    menge = eintrag.get("menge_liter")
-                    if km_diff > 0 and menge is not None and menge > 0:
-                        verbrauch = (menge / km_diff) * 100
-                        tankvorgaenge[original_idx]["verbrauch"] = round(verbrauch, 2)
-                    else:
-                        tankvorgaenge[original_idx]["verbrauch"] = None
-                else:
-                    tankvorgaenge[original_idx]["km_differenz"] = None
-                    tankvorgaenge[original_idx]["verbrauch"] = None
-
-            # km-Stand für nächste Iteration merken (nur wenn gültig)
-            if km_aktuell is not None and km_aktuell > 0:
-                km_vorher = km_aktuell
-
-    historie["tankvorgaenge"] = tankvorgaenge
-    return historie
-
-def pruefe_auffaelligkeiten(historie):
-    """Prüft Historie auf Auffälligkeiten und gibt Liste zurück"""
-    auffaelligkeiten = []
-
-    if not historie["tankvorgaenge"]:
-        return auffaelligkeiten
-
-    # Fahrzeug-spezifische Verbrauchsgrenzen laden
-    fahrzeuge_config = lade_fahrzeuge()
-    fahrzeug_grenzen = {}
-    for fz in fahrzeuge_config.get("fahrzeuge", []):
-        fahrzeug_grenzen[fz["kennzeichen"]] = {
-            "min": fz.get("verbrauch_min", 3),
-            "max": fz.get("verbrauch_max", 25)
-        }
-
-    # Standard-Grenzen
-    DEFAULT_MIN = 3
-    DEFAULT_MAX = 25
-
-    df = pd.DataFrame(historie["tankvorgaenge"])
-    df["datum"] = pd.to_datetime(df["datum"])
-
-    for kennzeichen in df["kennzeichen"].unique():
-        fahrzeug_df = df[df["kennzeichen"] == kennzeichen].copy()
-        fahrzeug_df = fahrzeug_df.sort_values(["datum", "zeit"]).reset_index(drop=True)
-
-        # Grenzen für dieses Fahrzeug
-        grenzen = fahrzeug_grenzen.get(kennzeichen, {"min": DEFAULT_MIN, "max": DEFAULT_MAX})
-        verbrauch_min = grenzen["min"] if grenzen["min"] else DEFAULT_MIN
-        verbrauch_max = grenzen["max"] if grenzen["max"] else DEFAULT_MAX
-
-        for idx, row in fahrzeug_df.iterrows():
-            eintrag_id = f"{row['kennzeichen']}_{row['datum'].strftime('%Y-%m-%d')}_{row['zeit']}"
-
-            # Quittierungs-Info aus dem Tankvorgang holen
-            quittiert = row.get("quittiert", False)
-            quittiert_kommentar = row.get("quittiert_kommentar", "")
-            quittiert_von = row.get("quittiert_von", "")
-            quittiert_am = row.get("quittiert_am", "")
-
-            # Fehlender km-Stand
-            if pd.isna(row["km_stand"]) or row["km_stand"] == 0:
-                auffaelligkeiten.append({
-                    "id": eintrag_id,
-                    "fahrzeug": kennzeichen,
-                    "datum": row["datum"].strftime("%d.%m.%Y"),
-                    "zeit": row["zeit"],
-                    "typ": "Fehlender km-Stand",
-                    "details": f"Tankvorgang ohne km-Angabe ({row['menge_liter']:.1f} L)",
-                    "schwere": "warnung",
-                    "quittiert": quittiert,
-                    "quittiert_kommentar": quittiert_kommentar,
-                    "quittiert_von": quittiert_von,
-                    "quittiert_am": quittiert_am
-                })
-
-            # km-Stand gesunken
-            if idx > 0:
-                vorheriger = fahrzeug_df.iloc[idx - 1]
-                if pd.notna(row["km_stand"]) and pd.notna(vorheriger["km_stand"]):
-                    diff = row["km_stand"] - vorheriger["km_stand"]
-                    if diff < 0:
-                        auffaelligkeiten.append({
-                            "id": eintrag_id,
-                            "fahrzeug": kennzeichen,
-                            "datum": row["datum"].strftime("%d.%m.%Y"),
-                            "zeit": row["zeit"],
-                            "typ": "km-Stand gesunken",
-                            "details": f"Differenz: {diff:.0f} km (vorher: {vorheriger['km_stand']:.0f})",
-                            "schwere": "fehler",
-                            "quittiert": quittiert,
-                            "quittiert_kommentar": quittiert_kommentar,
-                            "quittiert_von": quittiert_von,
-                            "quittiert_am": quittiert_am
-                        })
-
-            # Verbrauch prüfen (mit fahrzeugspezifischen Grenzen)
-            if pd.notna(row["verbrauch"]):
-                if row["verbrauch"] < verbrauch_min:
-                    auffaelligkeiten.append({
-                        "id": eintrag_id,
-                        "fahrzeug": kennzeichen,
-                        "datum": row["datum"].strftime("%d.%m.%Y"),
-                        "zeit": row["zeit"],
-                        "typ": "Verbrauch zu niedrig",
-                        "details": f"{row['verbrauch']:.1f} L/100km (Grenze: {verbrauch_min} L/100km)",
-                        "schwere": "warnung",
-                        "quittiert": quittiert,
-                        "quittiert_kommentar": quittiert_kommentar,
-                        "quittiert_von": quittiert_von,
-                        "quittiert_am": quittiert_am
-                    })
-                elif row["verbrauch"] > verbrauch_max:
-                    auffaelligkeiten.append({
-                        "id": eintrag_id,
-                        "fahrzeug": kennzeichen,
-                        "datum": row["datum"].strftime("%d.%m.%Y"),
-                        "zeit": row["zeit"],
-                        "typ": "Verbrauch zu hoch",
-                        "details": f"{row['verbrauch']:.1f} L/100km (Grenze: {verbrauch_max} L/100km)",
-                        "schwere": "fehler",
-                        "quittiert": quittiert,
-                        "quittiert_kommentar": quittiert_kommentar,
-                        "quittiert_von": quittiert_von,
-                        "quittiert_am": quittiert_am
-                    })
-
-    return auffaelligkeiten
-
 def style_auffaelligkeiten(row, auffaellige_ids):
     """Styling-Funktion für DataFrame mit Auffälligkeiten"""
     row_id = f"{row['kennzeichen']}_{pd.to_datetime(row['datum']).strftime('%Y-%m-%d')}_{row['zeit']}"
@@ -919,6 +168,13 @@ def style_auffaelligkeiten(row, auffaellige_ids):
         return ['background-color: #ffcccc'] * len(row)
     return [''] * len(row)
 
+def datei_beim_herunterladen(pfad):
+    """Daten für st.download_button: die Datei wird erst beim Klick gelesen, nicht bei jedem Rerun"""
+    def lesen():
+        with open(pfad, "rb") as f:
+            return f.read()
+    return lesen
+
 # --- Sidebar: Login ---
 with st.sidebar:
     # Sprachauswahl
@@ -1056,52 +312,124 @@ with st.sidebar:
 
 st.title(_("app_title"))
 
-# Historie laden
+# Historie laden (Stempel vorher, damit der gespeicherte Prüfstand sicher zur geladenen Historie passt)
+historie_stand = historie_stempel()
 historie = lade_historie()
 
-# Auffälligkeiten berechnen
-alle_auffaelligkeiten = pruefe_auffaelligkeiten(historie)
-auffaellige_ids = set(a["id"] for a in alle_auffaelligkeiten)
-# Nur nicht-quittierte Auffälligkeiten für Tab-Zähler
-offene_auffaelligkeiten = [a for a in alle_auffaelligkeiten if not a.get("quittiert", False)]
-
 # Fahrzeuge und SMTP-Konfiguration laden
 fahrzeuge_config = lade_fahrzeuge()
 smtp_config = lade_smtp_config()
 
-# Tabs für verschiedene Ansichten
+# Auffälligkeiten aus dem gespeicherten Prüfstand (nur geänderte Fahrzeuge werden neu geprüft),
+# für ältere Stellen zusätzlich als Liste
+auffaelligkeiten_tabelle = aktualisiere_auffaelligkeiten(historie, fahrzeuge_config, historie_stand)
+alle_auffaelligkeiten = auffaelligkeiten_als_liste(auffaelligkeiten_tabelle)
+auffaellige_ids = set(auffaelligkeiten_tabelle["id"])
+
+# Ungültige eigene Prüfregeln (pruefregeln.json) werden übersprungen; angemeldete Benutzer erfahren es
+regel_fehler = pruefregeln_fehler()
+if regel_fehler and st.session_state["logged_in"]:
+    st.warning(_("auffaelligkeiten.regeln_fehler", fehler="\n".join(f"- {f}" for f in regel_fehler)))
+
+# Tabs für verschiedene Ansichten (Zähler: nur nicht-quittierte Auffälligkeiten)
 tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
     f"📤 {_('tabs.import')}",
     f"📊 {_('tabs.verbrauch')}",
     f"📚 {_('tabs.historie')}",
-    f"⚠️ {_('tabs.auffaelligkeiten')} ({len(offene_auffaelligkeiten)})",
+    f"⚠️ {_('tabs.auffaelligkeiten')} ({anzahl_offene_auffaelligkeiten()})",
     f"⚙️ {_('tabs.einstellungen')}",
     f"📖 {_('tabs.hilfe')}"
 ])
 
+def eigener_auftrag(job_id):
+    """Import-Auftrag, falls der angemeldete Benutzer ihn bedienen darf (eigene, Admins alle), sonst None"""
+    job = lade_job(job_id)
+    if job is None or not aktueller_benutzer_hat_recht("importieren"):
+        return None
+    if st.session_state["user_rolle"] != "admin" and job.get("benutzer") != st.session_state["username"]:
+        return None
+    return job
+
+# Fortschritt eines laufenden Import-Auftrags (aktualisiert sich selbst, ohne die ganze Seite neu zu laden)
+@st.fragment(run_every=1)
+def zeige_import_fortschritt(job_id):
+    job = lade_job(job_id)
+    if job is None or job["status"] not in ("wartend", "laeuft"):
+        st.rerun()  # fertig oder abgebrochen: ganze Seite mit Vorschau neu aufbauen
+
+    with st.status(_("import.auftrag_laeuft"), state="running", expanded=True):
+        for datei in job["dateien"]:
+            if datei["status"] == "fertig":
+                st.progress(1.0, text=_("import.datei_fertig", name=datei["name"], zeilen=datei["zeilen"]))
+            elif datei["status"] == "fehler":
+                st.progress(1.0, text=_("import.datei_fehler", name=datei["name"], fehler=datei["fehler"]))
+            elif datei["status"] == "laeuft" and datei["seiten"]:
+                st.progress(datei["seite"] / datei["seiten"],
+                            text=_("import.seite_fortschritt", name=datei["name"], seite=datei["seite"], seiten=datei["seiten"]))
+            else:
+                st.progress(0.0, text=_("import.datei_wartend", name=datei["name"]))
+        if st.button(_("import.abbrechen"), key=f"import_abbrechen_{job_id}") and eigener_auftrag(job_id):
+            brich_job_ab(job_id)
+
 # --- TAB 1: Import & Analyse ---
-with tab1:
+with tab1, messe("darstellung.import"):
     uploaded_files = st.file_uploader(
         _("import.upload_label"),
         type=["csv", "pdf"],
-        accept_multiple_files=True
+        accept_multiple_files=True,
+        key=f"upload_{st.session_state['upload_nr']}"
     )
 
-    # Prüfen ob Dateien bereits importiert wurden
-    bereits_importierte_dateien = [imp.get("dateiname", "") for imp in historie.get("importe", [])]
-
-    if uploaded_files:
-        # Prüfung der Import-Berechtigung vorab
-        kann_importieren = aktueller_benutzer_hat_recht("importieren")
+    # --- Ergebnis der zuletzt bestätigten Übernahme ---
+    if "import_ergebnis" in st.session_state:
+        import_ergebnisse = st.session_state.pop("import_ergebnis")
+        neue_vorgaenge_gesamt = sum(e["neu"] for e in import_ergebnisse)
+        duplikate_gesamt = sum(e["duplikate"] for e in import_ergebnisse)
+        importierte_dateien = [e["dateiname"] for e in import_ergebnisse]
 
-        # Dateien kategorisieren: neu vs. bereits importiert
+        st.subheader(_("import.import_status"))
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric(_("import.neue_tankvorgaenge"), neue_vorgaenge_gesamt)
+        with col2:
+            st.metric(_("import.dateien_importiert"), len(importierte_dateien))
+        with col3:
+            st.metric(_("import.duplikate_uebersprungen"), duplikate_gesamt)
+
+        if neue_vorgaenge_gesamt > 0:
+            st.success(_("import.import_erfolgreich", count=neue_vorgaenge_gesamt, files=len(importierte_dateien)))
+            st.caption(f"☕ [{_('sidebar.spende_link')}](https://www.paypal.com/paypalme/christiansauer87)")
+        elif duplikate_gesamt > 0:
+            st.info(_("import.alle_duplikate"))
+
+        # Liste der importierten Dateien
+        with st.expander(_("import.importierte_anzeigen")):
+            for dateiname in importierte_dateien:
+                st.write(f"- {dateiname}")
+
+    # Bereits importierte Inhalte (SHA-256 der Datei, unabhängig vom Dateinamen)
+    bekannte_dateien = bekannte_inhalte(historie)
+    kann_importieren = aktueller_benutzer_hat_recht("importieren")
+
+    if uploaded_files and not kann_importieren:
+        # Ohne Importrecht wird nichts auf die Platte geschrieben oder eingereiht
+        st.info(_("import.keine_berechtigung"))
+
+    elif uploaded_files:
+        # Dateien kategorisieren: neu vs. bereits importiert (gleicher Inhalt, auch unter anderem Namen)
+        # oder schon in einem aktiven eigenen Auftrag
+        in_auftrag = offene_hashes(st.session_state["username"])
         neue_dateien = []
         bereits_importiert = []
+        upload_hashes = set()
         for uf in uploaded_files:
-            if uf.name in bereits_importierte_dateien:
-                bereits_importiert.append(uf.name)
+            inhalts_hash = berechne_datei_hash(uf)
+            if inhalts_hash in bekannte_dateien or inhalts_hash in upload_hashes or inhalts_hash in in_auftrag:
+                vorher = bekannte_dateien.get(inhalts_hash, {}).get("dateiname", uf.name)
+                bereits_importiert.append(uf.name if vorher == uf.name else f"{uf.name} (= {vorher})")
             else:
-                neue_dateien.append(uf)
+                upload_hashes.add(inhalts_hash)
+                neue_dateien.append((uf, inhalts_hash))
 
         # Warnung für bereits importierte Dateien
         if bereits_importiert:
@@ -1113,234 +441,216 @@ with tab1:
             # Status-Anzeige
             st.info(f"**{_('import.neue_dateien', count=len(neue_dateien))}**")
 
-            # Alle Daten sammeln
-            alle_daten = []
-            alle_rohdaten = []
-            import_fehler = []
-
-            for uploaded_file in neue_dateien:
-                try:
-                    if uploaded_file.name.lower().endswith(".pdf"):
-                        pdf_bytes = uploaded_file.read()
-                        df_clean = parse_dkv_pdf(pdf_bytes)
-                        if df_clean.empty:
-                            import_fehler.append(f"{uploaded_file.name}: {_('import.keine_daten_pdf')}")
-                            continue
-                    else:
-                        content = uploaded_file.read().decode("utf-8")
-                        df_clean = parse_dkv_csv(content)
-
-                    # Quelldatei-Spalte hinzufügen
-                    df_clean["Quelldatei"] = uploaded_file.name
-                    alle_rohdaten.append(df_clean)
-
-                    # Nur Kraftstoff (kein AdBlue)
-                    kraftstoff_filter = df_clean["Warenart"].str.contains("DIESEL|SUPER|BENZIN|EURO", case=False, na=False)
-                    df_fuel = df_clean[kraftstoff_filter].copy()
-                    if not df_fuel.empty:
-                        alle_daten.append((uploaded_file.name, df_fuel))
-                except Exception as e:
-                    import_fehler.append(f"{uploaded_file.name}: {str(e)}")
-
-            # Fehler anzeigen
-            if import_fehler:
-                for fehler in import_fehler:
-                    st.error(fehler)
-
-            if alle_rohdaten:
-                # Alle Rohdaten zusammenführen
-                df_alle_roh = pd.concat(alle_rohdaten, ignore_index=True)
-
-                st.subheader(_("import.rohdaten"))
-                st.dataframe(df_alle_roh, use_container_width=True)
-
-            if alle_daten:
-                # Alle Kraftstoffdaten zusammenführen
-                df_fuel_combined = pd.concat([df for _, df in alle_daten], ignore_index=True)
-                df_fuel_combined = berechne_verbrauch(df_fuel_combined)
-
-                # --- Verbrauchsanalyse ---
-                st.subheader(_("import.verbrauchsanalyse"))
-
-                warnungen = []
-                ergebnisse = []
-
-                for kennzeichen in df_fuel_combined["Kennzeichen"].unique():
-                    fahrzeug_df = df_fuel_combined[df_fuel_combined["Kennzeichen"] == kennzeichen].copy()
-                    fahrzeug_df = fahrzeug_df.reset_index(drop=True)
-
-                    st.markdown(f"### {kennzeichen}")
-
-                    # Prüfungen
-                    fehlende_km = fahrzeug_df[fahrzeug_df["km_Stand"].isna() | (fahrzeug_df["km_Stand"] == 0)]
-                    for idx, row in fehlende_km.iterrows():
-                        warnungen.append({
-                            "Fahrzeug": kennzeichen,
-                            "Datum": row["Datum"].strftime("%d.%m.%Y") if pd.notna(row["Datum"]) else "?",
-                            "Problem": "Fehlender km-Stand",
-                            "Details": f"Tankvorgang ohne km-Angabe ({row['Menge_Liter']:.1f} L)"
-                        })
+            # Dateien in einen Import-Auftrag übergeben; das Parsen läuft im Hintergrund weiter,
+            # auch wenn die Seite neu geladen oder ein anderes Widget bedient wird
+            job_id = erstelle_job([(uf.name, uf, h) for uf, h in neue_dateien],
+                                  st.session_state["username"])
+            import_jobs_dienst.einreihen(job_id)
+            st.session_state["import_job"] = job_id
+            st.session_state["upload_nr"] += 1
+
+    # --- Import-Aufträge (eigene; Admins sehen alle) ---
+    if not kann_importieren:
+        jobs = []
+    elif st.session_state["user_rolle"] == "admin":
+        jobs = offene_jobs()
+    else:
+        jobs = offene_jobs(st.session_state["username"])
+    if jobs:
+        job_ids = [j["id"] for j in jobs]
+        aktiver_job = st.session_state.get("import_job")
+        if aktiver_job not in job_ids:
+            aktiver_job = job_ids[-1]
+        if len(jobs) > 1:
+            jobs_nach_id = {j["id"]: j for j in jobs}
+            aktiver_job = st.selectbox(
+                _("import.auftrag_waehlen"),
+                job_ids,
+                index=job_ids.index(aktiver_job),
+                format_func=lambda i: _("import.auftrag_label", datum=jobs_nach_id[i]["erstellt"],
+                                        count=len(jobs_nach_id[i]["dateien"]),
+                                        status=_(f"import.jobstatus_{jobs_nach_id[i]['status']}"))
+            )
+        st.session_state["import_job"] = aktiver_job
+        job = next(j for j in jobs if j["id"] == aktiver_job)
 
-                    # Tabelle mit Hervorhebung erstellen
-                    display_df = fahrzeug_df[["Datum", "km_Stand", "Menge_Liter", "km_differenz", "Verbrauch_L100km", "Tankstelle", "Quelldatei"]].copy()
-                    display_df["Datum"] = display_df["Datum"].dt.strftime("%d.%m.%Y")
-
-                    # Auffälligkeiten markieren
-                    def highlight_rows(row):
-                        styles = [''] * len(row)
-                        idx = row.name
-                        if idx >= len(fahrzeug_df):
-                            return styles
-                        # km-Stand fehlt oder 0
-                        if pd.isna(fahrzeug_df.iloc[idx]["km_Stand"]) or fahrzeug_df.iloc[idx]["km_Stand"] == 0:
-                            return ['background-color: #ffcccc'] * len(row)
-                        # km gesunken
-                        if pd.notna(fahrzeug_df.iloc[idx]["km_differenz"]) and fahrzeug_df.iloc[idx]["km_differenz"] < 0:
-                            return ['background-color: #ffcccc'] * len(row)
-                        # Verbrauch außerhalb Grenzen
-                        verbrauch = fahrzeug_df.iloc[idx]["Verbrauch_L100km"]
-                        if pd.notna(verbrauch) and (verbrauch < 3 or verbrauch > 25):
-                            return ['background-color: #ffcccc'] * len(row)
-                        return styles
-
-                    display_df = display_df.rename(columns={
-                        "km_Stand": "km-Stand",
-                        "Menge_Liter": "Liter",
-                        "km_differenz": "km gefahren",
-                        "Verbrauch_L100km": "L/100km",
-                        "Quelldatei": "Datei"
-                    })
+        # Nur fertige Aufträge liefern Daten; sonst bleiben die Listen leer
+        alle_daten = []
+        alle_rohdaten = []
+        import_fehler = []
 
-                    styled_df = display_df.style.apply(highlight_rows, axis=1)
-                    st.dataframe(styled_df, use_container_width=True)
-
-                    # Weitere Prüfungen
-                    for idx, row in fahrzeug_df.iterrows():
-                        if pd.notna(row["km_differenz"]) and row["km_differenz"] < 0:
-                            warnungen.append({
-                                "Fahrzeug": kennzeichen,
-                                "Datum": row["Datum"].strftime("%d.%m.%Y"),
-                                "Problem": "km-Stand gesunken!",
-                                "Details": f"Differenz: {row['km_differenz']:.0f} km"
-                            })
+        if job["status"] in ("wartend", "laeuft"):
+            zeige_import_fortschritt(job["id"])
 
-                        if pd.notna(row["Verbrauch_L100km"]):
-                            if row["Verbrauch_L100km"] < 3:
-                                warnungen.append({
-                                    "Fahrzeug": kennzeichen,
-                                    "Datum": row["Datum"].strftime("%d.%m.%Y"),
-                                    "Problem": "Verbrauch zu niedrig",
-                                    "Details": f"{row['Verbrauch_L100km']:.1f} L/100km"
-                                })
-                            elif row["Verbrauch_L100km"] > 25:
-                                warnungen.append({
-                                    "Fahrzeug": kennzeichen,
-                                    "Datum": row["Datum"].strftime("%d.%m.%Y"),
-                                    "Problem": "Verbrauch zu hoch",
-                                    "Details": f"{row['Verbrauch_L100km']:.1f} L/100km"
-                                })
-
-                    # Statistik
-                    valid_consumption = fahrzeug_df["Verbrauch_L100km"].dropna()
-                    valid_consumption = valid_consumption[(valid_consumption > 3) & (valid_consumption < 25)]
-                    if len(valid_consumption) > 0:
-                        ergebnisse.append({
-                            "Fahrzeug": kennzeichen,
-                            "Durchschnittsverbrauch": f"{valid_consumption.mean():.1f} L/100km",
-                            "Tankvorgänge": len(fahrzeug_df),
-                            "Gesamtmenge": f"{fahrzeug_df['Menge_Liter'].sum():.1f} L",
-                            "Gesamtkosten": f"{fahrzeug_df['Betrag_EUR'].sum():.2f} EUR"
-                        })
+        elif job["status"] == "abgebrochen":
+            st.warning(_("import.auftrag_abgebrochen"))
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button(_("import.fortsetzen"), key=f"import_fortsetzen_{job['id']}") and eigener_auftrag(job["id"]):
+                    import_jobs_dienst.setze_fort(job["id"])
+                    st.rerun()
+            with col2:
+                if st.button(_("import.verwerfen"), key=f"import_verwerfen_{job['id']}") and eigener_auftrag(job["id"]):
+                    loesche_job(job["id"])
+                    st.rerun()
 
-                # Zusammenfassung
-                st.subheader(_("import.zusammenfassung"))
-                if ergebnisse:
-                    st.dataframe(pd.DataFrame(ergebnisse), use_container_width=True)
-
-                # Warnungen
-                st.subheader(_("import.warnungen"))
-                if warnungen:
-                    warn_df = pd.DataFrame(warnungen)
-                    st.dataframe(warn_df.style.apply(lambda x: ['background-color: #ffcccc'] * len(x), axis=1),
-                                use_container_width=True)
-                    st.warning(_("import.auffaelligkeiten_gefunden", count=len(warnungen)))
-                else:
-                    st.success(_("import.keine_auffaelligkeiten"))
+        else:
+            # Alle Daten sammeln (geparste Ergebnisse liegen im Auftrag auf der Platte)
+            for dateiname, inhalts_hash, df_clean, fehler in lade_job_ergebnisse(job):
+                if df_clean is None:
+                    import_fehler.append(f"{dateiname}: {fehler}")
+                    continue
+                if df_clean.empty and dateiname.lower().endswith(".pdf"):
+                    import_fehler.append(f"{dateiname}: {_('import.keine_daten_pdf')}")
+                    continue
+                alle_rohdaten.append(df_clean)
+
+                # Nur Kraftstoff (kein AdBlue)
+                df_fuel = filtere_kraftstoff(df_clean)
+                if not df_fuel.empty:
+                    alle_daten.append((dateiname, df_fuel, inhalts_hash))
+
+            if st.button(_("import.verwerfen"), key=f"import_verwerfen_{job['id']}") and eigener_auftrag(job["id"]):
+                loesche_job(job["id"])
+                st.rerun()
 
-                # --- Automatisches Speichern ---
-                st.subheader(_("import.import_status"))
+        # Fehler anzeigen
+        if import_fehler:
+            for fehler in import_fehler:
+                st.error(fehler)
+
+        if alle_rohdaten:
+            # Alle Rohdaten zusammenführen
+            df_alle_roh = pd.concat(alle_rohdaten, ignore_index=True)
+
+            st.subheader(_("import.rohdaten"))
+            st.dataframe(df_alle_roh, use_container_width=True)
+
+        if alle_daten:
+            # Alle Kraftstoffdaten zusammenführen
+            df_fuel_combined = pd.concat([df for _, df, _ in alle_daten], ignore_index=True)
+            df_fuel_combined = berechne_verbrauch(df_fuel_combined)
+
+            # --- Verbrauchsanalyse ---
+            st.subheader(_("import.verbrauchsanalyse"))
+
+            # Alle Prüfregeln in einem Durchlauf (dieselben Regeln wie für die Historie);
+            # Literpreise gegen die Referenzpreise der Historie plus der neuen Datei(en),
+            # gelernter Verbrauch fortgeschrieben aus den letzten Werten der Historie
+            import_rahmen = pruefrahmen_aus_import(df_fuel_combined)
+            import_auffaelligkeiten = pruefe_tankvorgaenge(
+                import_rahmen, lese_verbrauchsgrenzen(fahrzeuge_config),
+                preisbasis=berechne_preisbasis(import_rahmen, basis=preisbasis_historie(historie, historie_stand)),
+                verbrauch_vorwerte=verbrauch_vorwerte_historie(historie, historie_stand)
+            )
+            auffaellige_zeilen = set(import_auffaelligkeiten["zeile"])
+            ergebnisse = []
 
-                if not kann_importieren:
-                    st.info(_("import.keine_berechtigung"))
-                else:
-                    # Automatisch speichern
-                    neue_vorgaenge_gesamt = 0
-                    duplikate_gesamt = 0
-                    importierte_dateien = []
-
-                    for dateiname, df_fuel in alle_daten:
-                        neue_vorgaenge = 0
-                        for idx, row in df_fuel.iterrows():
-                            eintrag = {
-                                "kennzeichen": row["Kennzeichen"],
-                                "datum": row["Datum"].strftime("%Y-%m-%d") if pd.notna(row["Datum"]) else None,
-                                "zeit": row["Zeit"],
-                                "km_stand": row["km_Stand"],
-                                "menge_liter": row["Menge_Liter"],
-                                "verbrauch": None,  # Wird beim Speichern automatisch berechnet
-                                "betrag_eur": row["Betrag_EUR"],
-                                "tankstelle": row["Tankstelle"],
-                                "warenart": row["Warenart"],
-                                "quelldatei": dateiname
-                            }
-
-                            # Duplikate vermeiden (gleiches Datum, Zeit, Kennzeichen)
-                            ist_duplikat = any(
-                                t["kennzeichen"] == eintrag["kennzeichen"] and
-                                t["datum"] == eintrag["datum"] and
-                                t["zeit"] == eintrag["zeit"]
-                                for t in historie["tankvorgaenge"]
-                            )
+            for kennzeichen in df_fuel_combined["Kennzeichen"].unique():
+                fahrzeug_df = df_fuel_combined[df_fuel_combined["Kennzeichen"] == kennzeichen]
+                markiert = fahrzeug_df.index.isin(auffaellige_zeilen)
+                fahrzeug_df = fahrzeug_df.reset_index(drop=True)
 
-                            if not ist_duplikat:
-                                historie["tankvorgaenge"].append(eintrag)
-                                neue_vorgaenge += 1
-                            else:
-                                duplikate_gesamt += 1
+                st.markdown(f"### {kennzeichen}")
 
-                        neue_vorgaenge_gesamt += neue_vorgaenge
+                # Tabelle mit Hervorhebung erstellen
+                display_df = fahrzeug_df[["Datum", "km_Stand", "Menge_Liter", "km_differenz", "Verbrauch_L100km", "Tankstelle", "Quelldatei"]].copy()
+                display_df["Datum"] = display_df["Datum"].dt.strftime("%d.%m.%Y")
 
-                        # Import-Eintrag für diese Datei
-                        historie["importe"].append({
-                            "datum": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                            "dateiname": dateiname,
-                            "anzahl_vorgaenge": neue_vorgaenge
-                        })
-                        importierte_dateien.append(dateiname)
+                display_df = display_df.rename(columns={
+                    "km_Stand": "km-Stand",
+                    "Menge_Liter": "Liter",
+                    "km_differenz": "km gefahren",
+                    "Verbrauch_L100km": "L/100km",
+                    "Quelldatei": "Datei"
+                })
 
-                    speichere_historie(historie)
+                # Auffällige Zeilen markieren
+                styled_df = display_df.style.apply(
+                    lambda row: ['background-color: #ffcccc' if markiert[row.name] else ''] * len(row), axis=1
+                )
+                st.dataframe(styled_df, use_container_width=True)
+
+                # Statistik
+                valid_consumption = fahrzeug_df["Verbrauch_L100km"].dropna()
+                valid_consumption = valid_consumption[(valid_consumption > 3) & (valid_consumption < 25)]
+                if len(valid_consumption) > 0:
+                    ergebnisse.append({
+                        "Fahrzeug": kennzeichen,
+                        "Durchschnittsverbrauch": f"{valid_consumption.mean():.1f} L/100km",
+                        "Tankvorgänge": len(fahrzeug_df),
+                        "Gesamtmenge": f"{fahrzeug_df['Menge_Liter'].sum():.1f} L",
+                        "Gesamtkosten": f"{fahrzeug_df['Betrag_EUR'].sum():.2f} EUR"
+                    })
 
-                    # Erfolgsmeldung
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric(_("import.neue_tankvorgaenge"), neue_vorgaenge_gesamt)
-                    with col2:
-                        st.metric(_("import.dateien_importiert"), len(importierte_dateien))
-                    with col3:
-                        st.metric(_("import.duplikate_uebersprungen"), duplikate_gesamt)
+            # Zusammenfassung
+            st.subheader(_("import.zusammenfassung"))
+            if ergebnisse:
+                st.dataframe(pd.DataFrame(ergebnisse), use_container_width=True)
 
-                    if neue_vorgaenge_gesamt > 0:
-                        st.success(_("import.import_erfolgreich", count=neue_vorgaenge_gesamt, files=len(importierte_dateien)))
-                        st.caption(f"☕ [{_('sidebar.spende_link')}](https://www.paypal.com/paypalme/christiansauer87)")
-                    elif duplikate_gesamt > 0:
-                        st.info(_("import.alle_duplikate"))
+            # Warnungen
+            st.subheader(_("import.warnungen"))
+            if not import_auffaelligkeiten.empty:
+                warn_df = import_auffaelligkeiten[["fahrzeug", "datum", "typ", "details"]].rename(columns={
+                    "fahrzeug": "Fahrzeug", "datum": "Datum", "typ": "Problem", "details": "Details"
+                })
+                st.dataframe(warn_df.style.apply(lambda x: ['background-color: #ffcccc'] * len(x), axis=1),
+                            use_container_width=True)
+                st.warning(_("import.auffaelligkeiten_gefunden", count=len(import_auffaelligkeiten)))
+            else:
+                st.success(_("import.keine_auffaelligkeiten"))
 
-                    # Liste der importierten Dateien
-                    with st.expander(_("import.importierte_anzeigen")):
-                        for dateiname in importierte_dateien:
-                            st.write(f"- {dateiname}")
+            # --- Import-Vorschau: Abgleich mit der Historie, Speichern erst nach Bestätigung ---
+            st.subheader(_("import.vorschau"))
+            vorschau = vergleiche_mit_historie(historie, pd.concat([df for _, df, _ in alle_daten], ignore_index=True))
+            anzahl = vorschau["Importstatus"].value_counts()
 
-    else:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric(_("import.status_neu"), int(anzahl.get("neu", 0)))
+            with col2:
+                st.metric(_("import.status_duplikat"), int(anzahl.get("duplikat", 0)))
+            with col3:
+                st.metric(_("import.status_konflikt"), int(anzahl.get("konflikt", 0)))
+
+            vorschau_spalten = {
+                "Kennzeichen": "Fahrzeug", "Datum": "Datum", "Zeit": "Zeit",
+                "km_Stand": "km-Stand", "km_Stand_historie": "km-Stand (Historie)",
+                "Menge_Liter": "Liter", "Menge_Liter_historie": "Liter (Historie)",
+                "Betrag_EUR": "EUR", "Betrag_EUR_historie": "EUR (Historie)",
+                "Quelldatei": "Datei"
+            }
+            konflikte = vorschau[vorschau["Importstatus"] == "konflikt"]
+            if not konflikte.empty:
+                st.warning(_("import.konflikte_info"))
+                konflikt_df = konflikte[list(vorschau_spalten)].rename(columns=vorschau_spalten)
+                konflikt_df["Datum"] = konflikt_df["Datum"].dt.strftime("%d.%m.%Y")
+                st.dataframe(konflikt_df, use_container_width=True, hide_index=True)
+
+            neue_zeilen = vorschau[vorschau["Importstatus"] == "neu"]
+            if not neue_zeilen.empty:
+                with st.expander(_("import.neue_anzeigen")):
+                    neu_df = neue_zeilen[["Kennzeichen", "Datum", "Zeit", "km_Stand", "Menge_Liter", "Betrag_EUR", "Quelldatei"]]
+                    neu_df = neu_df.rename(columns=vorschau_spalten)
+                    neu_df["Datum"] = neu_df["Datum"].dt.strftime("%d.%m.%Y")
+                    st.dataframe(neu_df, use_container_width=True, hide_index=True)
+
+            if not kann_importieren:
+                st.info(_("import.keine_berechtigung"))
+            else:
+                st.caption(_("import.vorschau_info"))
+                if (st.button(_("import.uebernehmen"), type="primary", key=f"import_uebernehmen_{job['id']}")
+                        and eigener_auftrag(job["id"])):
+                    # Unter Sperre neu laden, falls Hotfolder/CLI inzwischen importiert haben
+                    with historie_sperre():
+                        historie = lade_historie()
+                        import_ergebnisse = uebernehme_in_historie(historie, alle_daten)
+                        speichere_historie(historie)
+                    loesche_job(job["id"])
+                    st.session_state["import_ergebnis"] = import_ergebnisse
+                    st.rerun()
+
+    elif not uploaded_files:
         st.info(_("import.upload_info"))
 
     # --- Manueller Tankvorgang ---
@@ -1438,10 +748,10 @@ with tab1:
                     datum_str = manual_datum.strftime("%Y-%m-%d")
                     zeit_str = manual_zeit.strftime("%H:%M")
                     ist_duplikat = any(
-                        t["kennzeichen"] == final_kennzeichen and
-                        t["datum"] == datum_str and
-                        t["zeit"] == zeit_str
-                        for t in historie["tankvorgaenge"]
+                        tankvorgang["kennzeichen"] == final_kennzeichen and
+                        tankvorgang["datum"] == datum_str and
+                        tankvorgang["zeit"] == zeit_str
+                        for tankvorgang in historie["tankvorgaenge"]
                     )
                     if ist_duplikat:
                         fehler.append(_("manual.fehler_duplikat"))
@@ -1473,7 +783,7 @@ with tab1:
         st.info(_("manual.keine_berechtigung"))
 
 # --- TAB 2: Verbrauchsentwicklung ---
-with tab2:
+with tab2, messe("darstellung.verbrauch"):
     st.subheader(_("verbrauch.titel"))
 
     # Daten erst nach Login anzeigen
@@ -1548,7 +858,8 @@ with tab2:
                     ]
                 ).properties(height=400).interactive()
 
-                st.altair_chart(chart, use_container_width=True)
+                with messe("darstellung.diagramme"):
+                    st.altair_chart(chart, use_container_width=True)
 
                 # Durchschnittsverbrauch pro Monat
                 st.markdown(f"### {_('verbrauch.monatlich')}")
@@ -1573,7 +884,8 @@ with tab2:
                     ]
                 ).properties(height=300)
 
-                st.altair_chart(chart_monat, use_container_width=True)
+                with messe("darstellung.diagramme"):
+                    st.altair_chart(chart_monat, use_container_width=True)
 
                 # Kosten pro Monat
                 st.markdown(f"### {_('verbrauch.kosten')}")
@@ -1589,7 +901,8 @@ with tab2:
                     ]
                 ).properties(height=300)
 
-                st.altair_chart(chart_kosten, use_container_width=True)
+                with messe("darstellung.diagramme"):
+                    st.altair_chart(chart_kosten, use_container_width=True)
 
                 # Statistik-Tabelle
                 st.markdown(f"### {_('verbrauch.statistik')}")
@@ -1619,16 +932,14 @@ with tab2:
         st.info(_("verbrauch.keine_historie"))
 
 # --- TAB 3: Historie ---
-with tab3:
+with tab3, messe("darstellung.historie"):
     st.subheader(_("historie.titel"))
 
     # Daten erst nach Login anzeigen
     if not st.session_state["logged_in"]:
         st.info(_("sidebar.anmelden_info"))
     elif historie["tankvorgaenge"]:
-        df_alle = pd.DataFrame(historie["tankvorgaenge"])
-        df_alle["datum"] = pd.to_datetime(df_alle["datum"])
-        df_alle = df_alle.sort_values(["datum", "zeit"], ascending=False)
+        df_alle = historie_tabelle(historie["tankvorgaenge"])
 
         # Alle Tankvorgänge
         st.markdown(f"### {_('historie.alle_tankvorgaenge')}")
@@ -1675,56 +986,27 @@ with tab3:
         df_display = df_display.reset_index(drop=True)
 
         if len(df_display) > 0:
-            # Auffälligkeits-IDs für diese Zeilen berechnen
-            df_display["_auff_id"] = df_display.apply(
-                lambda row: f"{row['kennzeichen']}_{row['datum'].strftime('%Y-%m-%d')}_{row['zeit']}", axis=1
-            )
-            df_display["_ist_auffaellig"] = df_display["_auff_id"].isin(auffaellige_ids)
+            # Auffälligkeits-ID, Markierung und Status-Text (Kurzform, quittierte mit ✓ statt ⚠️)
+            df_display = df_display.join(markiere_auffaelligkeiten(df_display, auffaelligkeiten_tabelle))
 
             # Sicherstellen dass km_differenz und verbrauch existieren
             if "km_differenz" not in df_display.columns:
                 df_display["km_differenz"] = None
             if "verbrauch" not in df_display.columns:
                 df_display["verbrauch"] = None
+            if "km_geschaetzt" not in df_display.columns:
+                df_display["km_geschaetzt"] = None
+            km_geschaetzt_spalte = _("spalten.km_geschaetzt")
 
             # Wenn Bearbeitungsrecht: Editierbare Tabelle
             if aktueller_benutzer_hat_recht("bearbeiten"):
                 st.info(_("historie.bearbeiten_info"))
 
                 # Editierbare Kopie erstellen (mit km_differenz und verbrauch zur Anzeige)
-                edit_cols = ["kennzeichen", "datum", "zeit", "km_stand", "km_differenz", "menge_liter", "verbrauch", "betrag_eur", "tankstelle", "quelldatei", "_auff_id", "_ist_auffaellig"]
+                edit_cols = ["kennzeichen", "datum", "zeit", "km_stand", "km_geschaetzt", "km_differenz", "menge_liter", "verbrauch", "betrag_eur", "tankstelle", "quelldatei", "_auff_id", "_ist_auffaellig", "_status"]
                 df_edit = df_display[edit_cols].copy()
                 df_edit["datum"] = df_edit["datum"].dt.strftime("%d.%m.%Y")
 
-                # Auffälligkeits-Typen und Quittierungs-Status als Dictionary
-                auff_info_map = {}
-                for a in alle_auffaelligkeiten:
-                    auff_info_map[a["id"]] = {
-                        "typ": a["typ"],
-                        "quittiert": a.get("quittiert", False)
-                    }
-
-                # Kurzformen für Auffälligkeits-Typen
-                AUFF_KURZFORM = {
-                    "Fehlender km-Stand": "km?",
-                    "km-Stand gesunken": "km↓",
-                    "Verbrauch zu niedrig": "L↓",
-                    "Verbrauch zu hoch": "L↑"
-                }
-
-                # Status-Spalte mit Kurzform (quittierte mit ✓ statt ⚠️)
-                def get_status_text(row):
-                    if not row["_ist_auffaellig"]:
-                        return ""
-                    info = auff_info_map.get(row["_auff_id"], {})
-                    typ = info.get("typ", "")
-                    kurzform = AUFF_KURZFORM.get(typ, "?")
-                    if info.get("quittiert", False):
-                        return f"✓ {kurzform}"
-                    return f"⚠️ {kurzform}"
-
-                df_edit["_status"] = df_edit.apply(get_status_text, axis=1)
-
                 # Spalten umbenennen für Anzeige
                 df_edit_display = df_edit.rename(columns={
                     "_status": "Status",
@@ -1732,6 +1014,7 @@ with tab3:
                     "datum": "Datum",
                     "zeit": "Zeit",
                     "km_stand": "km-Stand",
+                    "km_geschaetzt": km_geschaetzt_spalte,
                     "km_differenz": "km gefahren",
                     "menge_liter": "Liter",
                     "verbrauch": "L/100km",
@@ -1742,17 +1025,20 @@ with tab3:
 
                 # Editierbare Tabelle
                 edited_df = st.data_editor(
-                    df_edit_display[["Status", "Fahrzeug", "Datum", "Zeit", "km-Stand", "km gefahren", "Liter", "L/100km", "EUR", "Tankstelle", "Quelldatei"]],
+                    df_edit_display[["Status", "Fahrzeug", "Datum", "Zeit", "km-Stand", km_geschaetzt_spalte, "km gefahren", "Liter", "L/100km", "EUR", "Tankstelle", "Quelldatei"]],
                     use_container_width=True,
                     num_rows="fixed",
-                    disabled=["Status", "Fahrzeug", "Datum", "Zeit", "km gefahren", "L/100km", "Quelldatei"],  # Berechnete Felder nicht editierbar
+                    disabled=["Status", "Fahrzeug", "Datum", "Zeit", km_geschaetzt_spalte, "km gefahren", "L/100km", "Quelldatei"],  # Berechnete Felder nicht editierbar
                     column_config={
                         "Status": st.column_config.TextColumn(
                             "Status",
                             width="small",
-                            help="⚠️ = Offen, ✓ = Quittiert\n\nKurzformen:\n• km? = Fehlender km-Stand\n• km↓ = km-Stand gesunken\n• L↓ = Verbrauch zu niedrig\n• L↑ = Verbrauch zu hoch"
+                            help=_("status.tooltip")
                         ),
                         "km-Stand": st.column_config.NumberColumn("km-Stand", min_value=0, format="%.0f"),
+                        km_geschaetzt_spalte: st.column_config.NumberColumn(
+                            km_geschaetzt_spalte, format="%.0f", help=_("spalten.km_geschaetzt_hilfe")
+                        ),
                         "km gefahren": st.column_config.NumberColumn("km gefahren", format="%.0f"),
                         "Liter": st.column_config.NumberColumn("Liter", min_value=0, format="%.2f"),
                         "L/100km": st.column_config.NumberColumn("L/100km", format="%.1f"),
@@ -1770,10 +1056,10 @@ with tab3:
                         kennzeichen, datum_str, zeit = original_id.split("_")[0], original_id.split("_")[1], "_".join(original_id.split("_")[2:])
 
                         # In Historie suchen und aktualisieren
-                        for i, t in enumerate(historie["tankvorgaenge"]):
-                            if (t["kennzeichen"] == kennzeichen and
-                                t["datum"] == datum_str and
-                                t["zeit"] == zeit):
+                        for i, tankvorgang in enumerate(historie["tankvorgaenge"]):
+                            if (tankvorgang["kennzeichen"] == kennzeichen and
+                                tankvorgang["datum"] == datum_str and
+                                tankvorgang["zeit"] == zeit):
 
                                 # Prüfen ob Änderungen vorliegen
                                 neuer_km = row["km-Stand"]
@@ -1781,10 +1067,10 @@ with tab3:
                                 neuer_betrag = row["EUR"]
                                 neue_tankstelle = row["Tankstelle"]
 
-                                if (t["km_stand"] != neuer_km or
-                                    t["menge_liter"] != neue_menge or
-                                    t["betrag_eur"] != neuer_betrag or
-                                    t["tankstelle"] != neue_tankstelle):
+                                if (tankvorgang["km_stand"] != neuer_km or
+                                    tankvorgang["menge_liter"] != neue_menge or
+                                    tankvorgang["betrag_eur"] != neuer_betrag or
+                                    tankvorgang["tankstelle"] != neue_tankstelle):
 
                                     historie["tankvorgaenge"][i]["km_stand"] = neuer_km
                                     historie["tankvorgaenge"][i]["menge_liter"] = neue_menge
@@ -1806,40 +1092,14 @@ with tab3:
                 df_display_show = df_display.copy()
                 df_display_show["datum"] = df_display_show["datum"].dt.strftime("%d.%m.%Y")
 
-                # Auffälligkeits-Typen und Quittierungs-Status als Dictionary
-                auff_info_map_ro = {}
-                for a in alle_auffaelligkeiten:
-                    auff_info_map_ro[a["id"]] = {
-                        "typ": a["typ"],
-                        "quittiert": a.get("quittiert", False)
-                    }
-
-                # Kurzformen für Auffälligkeits-Typen
-                AUFF_KURZFORM_RO = {
-                    "Fehlender km-Stand": "km?",
-                    "km-Stand gesunken": "km↓",
-                    "Verbrauch zu niedrig": "L↓",
-                    "Verbrauch zu hoch": "L↑"
-                }
-
-                # Status-Spalte mit Kurzform (quittierte mit ✓ statt ⚠️)
-                def get_status_text_ro(row):
-                    if not row["_ist_auffaellig"]:
-                        return ""
-                    info = auff_info_map_ro.get(row["_auff_id"], {})
-                    typ = info.get("typ", "")
-                    kurzform = AUFF_KURZFORM_RO.get(typ, "?")
-                    if info.get("quittiert", False):
-                        return f"✓ {kurzform}"
-                    return f"⚠️ {kurzform}"
-
-                df_display_show["Status"] = df_display_show.apply(get_status_text_ro, axis=1)
+                df_display_show["Status"] = df_display_show["_status"]
 
                 df_display_show = df_display_show.rename(columns={
                     "kennzeichen": "Fahrzeug",
                     "datum": "Datum",
                     "zeit": "Zeit",
                     "km_stand": "km-Stand",
+                    "km_geschaetzt": km_geschaetzt_spalte,
                     "km_differenz": "km gefahren",
                     "menge_liter": "Liter",
                     "verbrauch": "L/100km",
@@ -1848,23 +1108,23 @@ with tab3:
                     "quelldatei": "Quelldatei"
                 })
 
-                # Styling-Funktion (rot für offene, grün für quittierte Auffälligkeiten)
-                def highlight_row(row):
-                    if df_display.loc[row.name, "_ist_auffaellig"]:
-                        auff_id = df_display.loc[row.name, "_auff_id"]
-                        info = auff_info_map_ro.get(auff_id, {})
-                        if info.get("quittiert", False):
-                            return ['background-color: #d4edda'] * len(row)  # Grün für quittiert
-                        return ['background-color: #ffcccc'] * len(row)  # Rot für offen
-                    return [''] * len(row)
+                # Styling (rot für offene, grün für quittierte Auffälligkeiten), für alle Zellen auf einmal
+                zeilen_farbe = np.where(~df_display["_ist_auffaellig"], "",
+                                        np.where(df_display["_quittiert"], "background-color: #d4edda",
+                                                 "background-color: #ffcccc"))
+
+                def highlight_rows(tabelle):
+                    return pd.DataFrame(np.repeat(zeilen_farbe[:, None], tabelle.shape[1], axis=1),
+                                        index=tabelle.index, columns=tabelle.columns)
 
                 # Anzeige mit Styling
-                display_cols = ["Status", "Fahrzeug", "Datum", "Zeit", "km-Stand", "km gefahren", "Liter", "L/100km", "EUR", "Tankstelle", "Quelldatei"]
+                display_cols = ["Status", "Fahrzeug", "Datum", "Zeit", "km-Stand", km_geschaetzt_spalte, "km gefahren", "Liter", "L/100km", "EUR", "Tankstelle", "Quelldatei"]
                 if auffaellige_ids:
-                    st.dataframe(
-                        df_display_show[display_cols].style.apply(highlight_row, axis=1),
-                        use_container_width=True
-                    )
+                    with messe("darstellung.styler"):
+                        st.dataframe(
+                            df_display_show[display_cols].style.apply(highlight_rows, axis=None),
+                            use_container_width=True
+                        )
                 else:
                     st.dataframe(df_display_show[display_cols], use_container_width=True)
         else:
@@ -1905,15 +1165,15 @@ with tab3:
             anzahl_importe = len(historie["importe"])
             if anzahl_importe > 5:
                 with st.expander(f"{_('historie.importe')} ({_('historie.importe_dateien', count=anzahl_importe)})"):
-                    st.dataframe(pd.DataFrame(historie["importe"]), use_container_width=True)
+                    st.dataframe(pd.DataFrame(historie["importe"]).drop(columns=["sha256", "fingerprint"], errors="ignore"), use_container_width=True)
             else:
                 st.markdown(f"### {_('historie.importe')}")
-                st.dataframe(pd.DataFrame(historie["importe"]), use_container_width=True)
+                st.dataframe(pd.DataFrame(historie["importe"]).drop(columns=["sha256", "fingerprint"], errors="ignore"), use_container_width=True)
     else:
         st.info(_("historie.keine_daten_gespeichert"))
 
 # --- TAB 4: Auffälligkeiten ---
-with tab4:
+with tab4, messe("darstellung.auffaelligkeiten"):
     st.subheader(_("auffaelligkeiten.titel"))
 
     # Daten erst nach Login anzeigen
@@ -1998,12 +1258,13 @@ with tab4:
                 "status": _("spalten.quittiert")
             })
 
-            st.dataframe(
-                auff_display.style.apply(
-                    lambda x: style_severity_with_quittiert(x.name, auff_df_filtered), axis=1
-                ),
-                use_container_width=True
-            )
+            with messe("darstellung.styler"):
+                st.dataframe(
+                    auff_display.style.apply(
+                        lambda x: style_severity_with_quittiert(x.name, auff_df_filtered), axis=1
+                    ),
+                    use_container_width=True
+                )
         else:
             if quittierte_ausblenden and len(quittiert_liste) > 0:
                 st.success(_("auffaelligkeiten.alle_quittiert", count=len(quittiert_liste)))
@@ -2068,10 +1329,10 @@ with tab4:
                                 auff_id = ausgewaehlte_auff["id"]
                                 kennzeichen, datum_str, zeit = auff_id.split("_")[0], auff_id.split("_")[1], "_".join(auff_id.split("_")[2:])
 
-                                for i, t in enumerate(historie["tankvorgaenge"]):
-                                    if (t["kennzeichen"] == kennzeichen and
-                                        t["datum"] == datum_str and
-                                        t["zeit"] == zeit):
+                                for i, tankvorgang in enumerate(historie["tankvorgaenge"]):
+                                    if (tankvorgang["kennzeichen"] == kennzeichen and
+                                        tankvorgang["datum"] == datum_str and
+                                        tankvorgang["zeit"] == zeit):
                                         historie["tankvorgaenge"][i]["quittiert"] = True
                                         historie["tankvorgaenge"][i]["quittiert_kommentar"] = quitt_kommentar.strip()
                                         historie["tankvorgaenge"][i]["quittiert_von"] = st.session_state.get("username", "")
@@ -2098,9 +1359,7 @@ with tab4:
             if historie["tankvorgaenge"]:
                 df_edit = pd.DataFrame(historie["tankvorgaenge"])
                 df_edit["datum"] = pd.to_datetime(df_edit["datum"])
-                df_edit["_id"] = df_edit.apply(
-                    lambda row: f"{row['kennzeichen']}_{row['datum'].strftime('%Y-%m-%d')}_{row['zeit']}", axis=1
-                )
+                df_edit["_id"] = markiere_auffaelligkeiten(df_edit, auffaelligkeiten_tabelle)["_auff_id"]
 
                 # Nur auffällige Einträge
                 df_auff = df_edit[df_edit["_id"].isin(auffaellige_ids)].copy()
@@ -2184,20 +1443,20 @@ with tab4:
                             original_id = df_auff_display.iloc[idx]["_id"]
                             kennzeichen, datum_str, zeit = original_id.split("_")[0], original_id.split("_")[1], "_".join(original_id.split("_")[2:])
 
-                            for i, t in enumerate(historie["tankvorgaenge"]):
-                                if (t["kennzeichen"] == kennzeichen and
-                                    t["datum"] == datum_str and
-                                    t["zeit"] == zeit):
+                            for i, tankvorgang in enumerate(historie["tankvorgaenge"]):
+                                if (tankvorgang["kennzeichen"] == kennzeichen and
+                                    tankvorgang["datum"] == datum_str and
+                                    tankvorgang["zeit"] == zeit):
 
                                     neuer_km = row["km-Stand"]
                                     neue_menge = row["Liter"]
                                     neuer_betrag = row["EUR"]
                                     neue_tankstelle = row["Tankstelle"]
 
-                                    if (t["km_stand"] != neuer_km or
-                                        t["menge_liter"] != neue_menge or
-                                        t["betrag_eur"] != neuer_betrag or
-                                        t["tankstelle"] != neue_tankstelle):
+                                    if (tankvorgang["km_stand"] != neuer_km or
+                                        tankvorgang["menge_liter"] != neue_menge or
+                                        tankvorgang["betrag_eur"] != neuer_betrag or
+                                        tankvorgang["tankstelle"] != neue_tankstelle):
 
                                         historie["tankvorgaenge"][i]["km_stand"] = neuer_km
                                         historie["tankvorgaenge"][i]["menge_liter"] = neue_menge
@@ -2350,7 +1609,7 @@ with tab4:
         st.success(_("auffaelligkeiten.keine_auffaelligkeiten"))
 
 # --- TAB 5: Einstellungen ---
-with tab5:
+with tab5, messe("darstellung.einstellungen"):
     # Dynamische Sub-Tabs basierend auf Rechten
     sub_tab_namen = []
     ist_eingeloggt = st.session_state["logged_in"] and not st.session_state.get("muss_passwort_aendern", False)
@@ -2365,6 +1624,7 @@ with tab5:
             sub_tab_namen.append(f"👥 {_('einstellungen.benutzer')}")
         if aktueller_benutzer_hat_recht("datensicherung"):
             sub_tab_namen.append(f"💾 {_('einstellungen.datensicherung')}")
+            sub_tab_namen.append(f"🩺 {_('einstellungen.diagnose')}")
 
     # "Über" ist immer sichtbar (auch ohne Login)
     sub_tab_namen.append(f"ℹ️ {_('einstellungen.ueber')}")
@@ -2389,6 +1649,7 @@ with tab5:
                             "besitzer_email": besitzer.get("besitzer_email", ""),
                             "verbrauch_min": besitzer.get("verbrauch_min", 3.0),
                             "verbrauch_max": besitzer.get("verbrauch_max", 25.0),
+                            "tankvolumen": besitzer.get("tankvolumen"),
                             "notizen": besitzer.get("notizen", "")
                         })
                     else:
@@ -2398,19 +1659,22 @@ with tab5:
                             "besitzer_email": "",
                             "verbrauch_min": 3.0,
                             "verbrauch_max": 25.0,
+                            "tankvolumen": None,
                             "notizen": ""
                         })
                 df_fahrzeuge = pd.DataFrame(fahrzeug_liste)
                 nicht_zugeordnet = len([f for f in fahrzeug_liste if not f["besitzer_email"]])
                 if nicht_zugeordnet > 0:
                     st.warning(f"{nicht_zugeordnet} Fahrzeug(e) ohne E-Mail-Adresse")
-                st.markdown("**Verbrauchsgrenzen:** Warnungen werden ausgelöst wenn der Verbrauch außerhalb des angegebenen Bereichs liegt.")
+                st.markdown("**Verbrauchsgrenzen:** Warnungen werden ausgelöst wenn der Verbrauch außerhalb des angegebenen Bereichs liegt. "
+                            f"**Tankvolumen:** Fehler, wenn innerhalb von {LITER_FENSTER_STUNDEN} Stunden mehr getankt wird (leer: keine Prüfung).")
                 df_fahrzeuge_display = df_fahrzeuge.rename(columns={
                     "kennzeichen": "Kennzeichen",
                     "besitzer_name": "Besitzer-Name",
                     "besitzer_email": "E-Mail",
                     "verbrauch_min": "Min L/100km",
                     "verbrauch_max": "Max L/100km",
+                    "tankvolumen": "Tank L",
                     "notizen": "Notizen"
                 })
                 edited_fahrzeuge = st.data_editor(
@@ -2424,6 +1688,7 @@ with tab5:
                         "E-Mail": st.column_config.TextColumn("E-Mail", width="medium"),
                         "Min L/100km": st.column_config.NumberColumn("Min L/100km", min_value=0.0, max_value=50.0, step=0.5, format="%.1f", width="small"),
                         "Max L/100km": st.column_config.NumberColumn("Max L/100km", min_value=0.0, max_value=100.0, step=0.5, format="%.1f", width="small"),
+                        "Tank L": st.column_config.NumberColumn("Tank L", min_value=0.0, max_value=2000.0, step=5.0, format="%.0f", width="small"),
                         "Notizen": st.column_config.TextColumn("Notizen", width="medium")
                     },
                     key="fahrzeuge_editor"
@@ -2437,6 +1702,7 @@ with tab5:
                             "besitzer_email": row["E-Mail"] if pd.notna(row["E-Mail"]) else "",
                             "verbrauch_min": float(row["Min L/100km"]) if pd.notna(row["Min L/100km"]) else 3.0,
                             "verbrauch_max": float(row["Max L/100km"]) if pd.notna(row["Max L/100km"]) else 25.0,
+                            "tankvolumen": float(row["Tank L"]) if pd.notna(row["Tank L"]) else None,
                             "notizen": row["Notizen"] if pd.notna(row["Notizen"]) else ""
                         })
                     speichere_fahrzeuge(neue_fahrzeuge)
@@ -2729,7 +1995,7 @@ Erstellt eine ZIP-Datei mit allen Konfigurationsdaten:
                     )
 
                     if st.button("🔄 Wiederherstellen", type="primary", disabled=not bestaetigung, key="btn_restore"):
-                        erfolg, meldung = stelle_backup_wieder_her(uploaded_zip.getvalue())
+                        erfolg, meldung = stelle_backup_wieder_her(uploaded_zip)
                         if erfolg:
                             st.success(f"✅ {meldung}")
                             st.info("Bitte laden Sie die Seite neu, um die wiederhergestellten Daten zu sehen.")
@@ -2738,6 +2004,81 @@ Erstellt eine ZIP-Datei mit allen Konfigurationsdaten:
                             st.error(f"❌ {meldung}")
         tab_index += 1
 
+    # === DIAGNOSE (Laufzeiten der letzten Reruns) ===
+    if ist_eingeloggt and aktueller_benutzer_hat_recht("datensicherung"):
+        with sub_tabs[tab_index]:
+            st.markdown(f"#### {_('einstellungen.diagnose_titel')}")
+            st.caption(_("einstellungen.diagnose_info"))
+
+            laeufe = letzte_laeufe()
+            if laeufe:
+                st.markdown(f"##### {_('einstellungen.diagnose_stufen', count=len(laeufe))}")
+                statistik = stufen_statistik(laeufe).rename(columns={
+                    "stufe": _("einstellungen.diagnose_stufe"),
+                    "laeufe": _("einstellungen.diagnose_laeufe"),
+                    "median_ms": "Median (ms)",
+                    "max_ms": "Max (ms)",
+                    "aufrufe": _("einstellungen.diagnose_aufrufe")
+                })
+                st.dataframe(statistik.round(1), use_container_width=True, hide_index=True)
+
+                st.markdown(f"##### {_('einstellungen.diagnose_verlauf')}")
+                verlauf = pd.DataFrame([{
+                    _("einstellungen.diagnose_beginn"): lauf["beginn"].replace("T", " "),
+                    _("einstellungen.benutzername"): lauf["bezeichnung"],
+                    _("einstellungen.diagnose_vollstaendig"): lauf["vollstaendig"],
+                    "gesamt (ms)": round(lauf["dauer_s"] * 1000, 1),
+                    **{f"{stufe} (ms)": round(werte["dauer_s"] * 1000, 1) for stufe, werte in lauf["stufen"].items()}
+                } for lauf in laeufe])
+                st.dataframe(verlauf, use_container_width=True, hide_index=True)
+            else:
+                st.info(_("einstellungen.diagnose_leer"))
+
+            # Profilierung auf Abruf: cProfile + Stack-Stichproben (+ tracemalloc)
+            st.markdown(f"##### {_('einstellungen.profil_titel')}")
+            st.caption(_("einstellungen.profil_info"))
+            profil_arten = {"rerun": _("einstellungen.profil_art_rerun"), "import": _("einstellungen.profil_art_import")}
+            status = profilierung_status()
+            if status:
+                st.info(_("einstellungen.profil_laeuft", art=profil_arten[status["art"]],
+                          erledigt=status["erledigt"], anzahl=status["anzahl"], benutzer=status["benutzer"]))
+                col_aktualisieren, col_abbrechen = st.columns(2)
+                with col_aktualisieren:
+                    if st.button(f"🔄 {_('einstellungen.profil_aktualisieren')}", key="profil_aktualisieren"):
+                        st.rerun()
+                with col_abbrechen:
+                    if st.button(f"⏹️ {_('einstellungen.profil_abbrechen')}", key="profil_abbrechen"):
+                        brich_profilierung_ab()
+                        st.rerun()
+            else:
+                with st.form("profil_form"):
+                    col_art, col_anzahl = st.columns(2)
+                    with col_art:
+                        profil_art = st.selectbox(_("einstellungen.profil_art"), list(profil_arten),
+                                                  format_func=profil_arten.get)
+                    with col_anzahl:
+                        profil_anzahl = st.number_input(_("einstellungen.profil_anzahl"), min_value=1, max_value=50, value=3)
+                    profil_speicher = st.checkbox(_("einstellungen.profil_speicher"), value=True)
+                    if st.form_submit_button(f"▶️ {_('einstellungen.profil_starten')}"):
+                        starte_profilierung(profil_art, profil_anzahl, profil_speicher, st.session_state["username"])
+                        st.rerun()
+
+            for ergebnis in profil_ergebnisse():
+                info = ergebnis["info"]
+                with st.expander(f"{ergebnis['name']} · {profil_arten.get(info['art'], info['art'])} × {info['erledigt']} · "
+                                 f"{info['dauer_s']:.1f} s · {info['stichproben']} {_('einstellungen.profil_stichproben')}"):
+                    spalten = st.columns(len(ergebnis["dateien"]) + 1)
+                    for spalte, (dateiname, pfad) in zip(spalten, ergebnis["dateien"].items()):
+                        with spalte:
+                            st.download_button(f"📥 {dateiname}", datei_beim_herunterladen(pfad),
+                                               file_name=f"{ergebnis['name']}-{dateiname}",
+                                               key=f"profil_{ergebnis['name']}_{dateiname}")
+                    with spalten[-1]:
+                        if st.button(f"🗑️ {_('einstellungen.loeschen')}", key=f"profil_loeschen_{ergebnis['name']}"):
+                            loesche_profil_ergebnis(ergebnis["name"])
+                            st.rerun()
+        tab_index += 1
+
     # === ÜBER ===
     with sub_tabs[tab_index]:
         st.markdown("#### Über diese Software")
@@ -2811,7 +2152,7 @@ Datenschutzbeauftragten Ihrer Organisation.
         st.caption("© 2026 Christian Sauer")
 
 # --- TAB 6: Hilfe ---
-with tab6:
+with tab6, messe("darstellung.hilfe"):
     st.markdown(f"## 📖 {_('hilfe.titel')}")
     st.markdown("---")
 
@@ -2915,3 +2256,7 @@ if st.session_state.get("aktiver_tab") is not None:
             }}, 100);
         </script>
     """, height=0)
+
+# Messlauf und Profil-Abschnitt dieses Reruns abschließen (bei st.rerun schließt sie der nächste Rerun ab)
+beende_abschnitt()
+beende_lauf()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Kernfunktionen des DKV Abrechnungs-Checkers ohne Streamlit-Abhängigkeit
+
+Parsing, Verbrauchsberechnung, Auffälligkeitsprüfung, Speicherung, Benutzerverwaltung
+und E-Mail-Versand. Wird von der Streamlit-Oberfläche (dkv_checker.py) genutzt und kann
+von Worker-Prozessen, CLI-Werkzeugen und Benchmarks direkt importiert werden.
+"""
+
+from .analyse import (
+    AUFFAELLIGKEIT_SPALTEN,
+    AUFFAELLIGKEIT_TYPEN,
+    VERBRAUCH_MAX_STANDARD,
+    VERBRAUCH_MIN_STANDARD,
+    auffaelligkeiten_als_liste,
+    berechne_preisbasis,
+    berechne_verbrauch,
+    berechne_verbrauch_historie,
+    ermittle_auffaelligkeiten,
+    historie_tabelle,
+    lese_verbrauchsgrenzen,
+    markiere_auffaelligkeiten,
+    pruefe_auffaelligkeiten,
+    pruefe_tankvorgaenge,
+    pruefrahmen_aus_import,
+    tankvorgaenge_rahmen,
+)
+from .auffaelligkeiten import (
+    aktualisiere_auffaelligkeiten,
+    anzahl_offene_auffaelligkeiten,
+    preisbasis_historie,
+    verbrauch_vorwerte_historie,
+)
+from .benutzer import (
+    aktualisiere_benutzer,
+    authentifiziere_benutzer,
+    braucht_rehash,
+    erstelle_benutzer,
+    finde_benutzer,
+    generiere_temp_passwort,
+    hash_passwort,
+    hat_recht,
+    lade_benutzer,
+    loesche_benutzer,
+    pruefe_passwort,
+    speichere_benutzer,
+)
+from .importer import (
+    KRAFTSTOFF_MUSTER,
+    bekannte_inhalte,
+    berechne_datei_hash,
+    berechne_inhalts_hash,
+    berechne_zeilen_fingerprint,
+    erstelle_eintraege,
+    filtere_kraftstoff,
+    parse_datei,
+    parse_datei_pfad,
+    uebernehme_in_historie,
+    vergleiche_mit_historie,
+)
+from .konfiguration import (
+    ARCHIV_DIR,
+    AUFFAELLIGKEITEN_DATEI,
+    BENUTZER_DATEI,
+    DATA_DIR,
+    EINGANG_DIR,
+    DEFAULT_EMAIL_VORLAGE,
+    EMAIL_VORLAGE_DATEI,
+    FAHRZEUGE_DATEI,
+    FEHLER_DIR,
+    HISTORIE_DATEI,
+    HOTFOLDER_AKTIV,
+    METRIKEN_ADRESSE,
+    METRIKEN_PORT,
+    PROFIL_DIR,
+    PRUEFREGELN_DATEI,
+    ROLLEN,
+    SMTP_CONFIG_DATEI,
+    VERBRAUCH_MODUS,
+)
+from .mail import (
+    erstelle_auffaelligkeiten_email,
+    erstelle_email_betreff,
+    ersetze_platzhalter,
+    sende_benachrichtigung,
+    sende_passwort_reset_email,
+    teste_smtp_verbindung,
+)
+from .messung import (
+    beende_lauf,
+    beginne_lauf,
+    gemessen,
+    letzte_laeufe,
+    messe,
+    registriere_beobachter,
+    stufen_statistik,
+)
+from .metriken import MetrikenServer, beobachte, exposition, registriere_sammler, setze, zaehle
+from .parser import parse_dkv_csv, parse_dkv_pdf, parse_german_number
+from .profil import (
+    beende_abschnitt,
+    beginne_abschnitt,
+    brich_profilierung_ab,
+    loesche_profil_ergebnis,
+    profil_ergebnisse,
+    profiliert,
+    profilierung_status,
+    starte_profilierung,
+)
+from .regeln import (
+    LITER_FENSTER_STUNDEN,
+    MEHRFACH_FENSTER_STUNDEN,
+    PRUEFREGELN,
+    SCHWEREGRADE,
+    kompiliere_regel,
+    kurzformen,
+    lade_pruefregeln,
+    pruefregeln_fehler,
+)
+from .speicher import (
+    BACKUP_DATEIEN,
+    erstelle_backup,
+    hole_alle_kennzeichen_aus_historie,
+    historie_sperre,
+    historie_stempel,
+    hole_besitzer_fuer_kennzeichen,
+    lade_email_vorlage,
+    lade_fahrzeuge,
+    lade_historie,
+    lade_smtp_config,
+    speichere_email_vorlage,
+    speichere_fahrzeuge,
+    speichere_historie,
+    speichere_manuellen_tankvorgang,
+    speichere_smtp_config,
+    stelle_backup_wieder_her,
+)
@@ -0,0 +1,624 @@
+# -*- coding: utf-8 -*-
+"""
+Verbrauchsberechnung und Prüfung auf Auffälligkeiten
+"""
+
+import numpy as np
+import pandas as pd
+
+from .konfiguration import VERBRAUCH_MODUS
+from .messung import gemessen
+from .regeln import (
+    KM_MAX_PRO_STUNDE,
+    KM_SPRUNG_SOCKEL,
+    LITER_FENSTER_STUNDEN,
+    MEHRFACH_FENSTER_STUNDEN,
+    PREIS_FENSTER_TAGE,
+    PREIS_MIN_VERGLEICHE,
+    PRUEFREGELN,
+    SCHWEREGRADE,
+    VERBRAUCH_FENSTER,
+    VERBRAUCH_MIN_WERTE,
+    formatiere_details,
+    kurzformen,
+    lade_pruefregeln,
+    werte_regeln_aus,
+)
+
+# Standard-Verbrauchsgrenzen (L/100km), wenn für ein Fahrzeug nichts hinterlegt ist
+VERBRAUCH_MIN_STANDARD = 3
+VERBRAUCH_MAX_STANDARD = 25
+# Untergrenze der MAD (L/100km), damit sehr gleichmäßige Fahrzeuge nicht bei jeder Kleinigkeit auffallen
+VERBRAUCH_MAD_MIN = 0.5
+# Stellenwerte für die Tippfehler-Suche im km-Stand (bis zu zehnstellige km-Stände)
+_KM_STELLEN = 10.0 ** np.arange(10)
+
+# Eingebaute Auffälligkeitstypen (eigene Regeln aus pruefregeln.json kommen hinzu)
+AUFFAELLIGKEIT_TYPEN = [r["typ"] for r in PRUEFREGELN]
+
+# Ergebnistabelle der Prüfregeln (Spalte -> dtype)
+AUFFAELLIGKEIT_SPALTEN = {
+    "id": object,
+    "fahrzeug": object,
+    "datum": object,
+    "zeit": object,
+    "typ": object,
+    "details": object,
+    "schwere": object,
+    "quittiert": bool,
+    "quittiert_kommentar": object,
+    "quittiert_von": object,
+    "quittiert_am": object,
+    "zeile": object
+}
+
+
+def _intervall_liter(menge, gruppe, anker):
+    """
+    Getankte Liter seit dem letzten Anker (Tankvorgang mit gültigem km-Stand) je Fahrzeug.
+
+    Segmentierte kumulierte Summe: Summe bis zur Zeile minus Summe bis zum vorherigen Anker.
+    NaN, wenn es vorher keinen Anker gibt.
+    """
+    kumuliert = menge.fillna(0).groupby(gruppe).cumsum()
+    bis_anker = kumuliert.where(anker).groupby(gruppe).shift().groupby(gruppe).ffill()
+    return kumuliert - bis_anker
+
+def berechne_verbrauch(df, modus=None):
+    """Verbrauch berechnen und DataFrame erweitern
+
+    modus: "einzeln" (Liter dieser Tankung / km seit der vorherigen) oder "intervall"
+    (Liter aller Tankungen seit dem letzten gültigen km-Stand / km seit diesem);
+    Standard: VERBRAUCH_MODUS
+    """
+    if df.empty:
+        return df
+    modus = modus or VERBRAUCH_MODUS
+
+    # Nach Fahrzeug (Reihenfolge des ersten Auftretens), Datum und Zeit sortieren
+    fahrzeug_nr = pd.Index(df["Kennzeichen"].unique()).get_indexer(df["Kennzeichen"])
+    result = (df.assign(_fz=fahrzeug_nr)
+              .sort_values(["_fz", "Datum", "Zeit"], kind="stable")
+              .reset_index(drop=True))
+    gruppe = result.pop("_fz")
+
+    if modus == "intervall":
+        anker = result["km_Stand"].notna() & (result["km_Stand"] > 0)
+        km = result["km_Stand"].where(anker)
+        result["km_vorher"] = km.groupby(gruppe).shift().groupby(gruppe).ffill()
+        result["km_differenz"] = (km - result["km_vorher"]).where(anker)
+        liter = _intervall_liter(result["Menge_Liter"], gruppe, anker)
+        result["Verbrauch_L100km"] = (liter / result["km_differenz"]) * 100
+    else:
+        result["km_vorher"] = result["km_Stand"].groupby(gruppe).shift()
+        result["km_differenz"] = result["km_Stand"] - result["km_vorher"]
+        result["Verbrauch_L100km"] = (result["Menge_Liter"] / result["km_differenz"]) * 100
+
+    return result
+
+def _schaetze_km(km, menge, sekunden, gruppe, anker):
+    """
+    Fehlende km-Stände zwischen zwei gültigen Nachbarn desselben Fahrzeugs schätzen.
+
+    Der Abstand zum vorherigen km-Stand wird nach dem Anteil der seitdem getankten Liter an
+    den Litern bis zum nächsten gültigen km-Stand aufgeteilt, ohne Literangaben nach dem
+    Anteil der vergangenen Zeit. Vorheriger und nächster Anker (km, kumulierte Liter, Zeit)
+    werden für alle Fahrzeuge gemeinsam per groupby-ffill/bfill nachgezogen.
+
+    Returns:
+        Series mit ganzzahligen Schätzungen, NaN bei gültigen km-Ständen und wo keine
+        Schätzung möglich ist (kein Nachbar auf einer Seite, km-Stand dazwischen gesunken)
+    """
+    liter = menge.fillna(0).groupby(gruppe).cumsum()
+    zeit = pd.Series(sekunden, index=km.index)
+    werte = pd.DataFrame({"km": km, "liter": liter, "zeit": zeit})[anker].reindex(km.index)
+    gruppiert = werte.groupby(gruppe)
+    vorher, nachher = gruppiert.ffill(), gruppiert.bfill()
+
+    anteil_liter = (liter - vorher["liter"]) / (nachher["liter"] - vorher["liter"])
+    anteil_zeit = (zeit - vorher["zeit"]) / (nachher["zeit"] - vorher["zeit"])
+    anteil = anteil_liter.where(nachher["liter"] > vorher["liter"], anteil_zeit)
+    schaetzung = vorher["km"] + anteil * (nachher["km"] - vorher["km"])
+    return schaetzung.where(~anker & (nachher["km"] > vorher["km"]) & anteil.between(0, 1)).round()
+
+@gemessen("analyse.verbrauch")
+def berechne_verbrauch_historie(historie, modus=None):
+    """Berechnet Verbrauch und km-Differenz für alle Einträge in der Historie neu
+
+    Ein Durchlauf über alle Fahrzeuge: sortieren, fehlende km-Stände schätzen
+    (_schaetze_km, abgelegt als km_geschaetzt), letzten gültigen oder geschätzten km-Stand
+    per groupby-shift/ffill nachziehen, Differenzen und (im Intervall-Modus) Liter über
+    segmentierte kumulierte Summen. modus wie bei berechne_verbrauch.
+    """
+    if not historie["tankvorgaenge"]:
+        return historie
+    modus = modus or VERBRAUCH_MODUS
+
+    # Alle Tankvorgänge als Liste bearbeiten
+    tankvorgaenge = historie["tankvorgaenge"].copy()
+
+    km_roh = [t.get("km_stand") for t in tankvorgaenge]
+    menge_roh = [t.get("menge_liter") for t in tankvorgaenge]
+    df = pd.DataFrame({
+        "kennzeichen": [t["kennzeichen"] for t in tankvorgaenge],
+        "datum": [t["datum"] for t in tankvorgaenge],
+        "zeit": [t["zeit"] or "" for t in tankvorgaenge],
+        "km": pd.array(km_roh, dtype="Float64").to_numpy(dtype=float, na_value=np.nan),
+        "menge": pd.array(menge_roh, dtype="Float64").to_numpy(dtype=float, na_value=np.nan),
+        "km_ganzzahl": [isinstance(k, int) for k in km_roh]
+    })
+    # Pro Fahrzeug nach Datum und Zeit sortieren
+    df = df.sort_values(["kennzeichen", "datum", "zeit"], kind="stable")
+    gruppe = df["kennzeichen"]
+
+    # Fehlende km-Stände schätzen, damit Verbrauch und Diagramme durchgehend bleiben
+    gueltig = df["km"] > 0
+    geschaetzt = _schaetze_km(df["km"], df["menge"], _sekunden(_zeitpunkte(df["datum"], df["zeit"])),
+                              gruppe, gueltig)
+
+    # Gültiger oder geschätzter km-Stand ist Anker; km_vorher = letzter Anker davor
+    km = df["km"].where(gueltig, geschaetzt)
+    anker = km.notna()
+    km_vorher = km.groupby(gruppe).shift().groupby(gruppe).ffill()
+    differenz = (km - km_vorher).where(anker)
+    # int - int bleibt wie bisher int (JSON ohne ".0"); Schätzungen sind ganzzahlig
+    km_ganzzahl = df["km_ganzzahl"] | geschaetzt.notna()
+    vorher_ganzzahl = km_ganzzahl.astype(float).where(anker).groupby(gruppe).shift().groupby(gruppe).ffill()
+    ganzzahl = km_ganzzahl & (vorher_ganzzahl == 1)
+
+    if modus == "intervall":
+        liter = _intervall_liter(df["menge"], gruppe, anker)
+    else:
+        liter = df["menge"]
+    verbrauch = (liter / differenz * 100).where((differenz > 0) & (liter > 0))
+
+    # Zurückschreiben über Python-Listen (numpy-Skalare einzeln anzufassen ist hier der Engpass)
+    for i, d, g, v, s in zip(df.index.tolist(), differenz.to_numpy().tolist(), ganzzahl.to_numpy().tolist(),
+                             verbrauch.to_numpy().tolist(), geschaetzt.to_numpy().tolist()):
+        t = tankvorgaenge[i]
+        t["km_geschaetzt"] = None if s != s else int(s)
+        t["km_differenz"] = None if d != d else (int(d) if g else d)  # d != d: NaN
+        t["verbrauch"] = None if v != v else round(v, 2)
+
+    historie["tankvorgaenge"] = tankvorgaenge
+    return historie
+
+def lese_verbrauchsgrenzen(fahrzeuge_config):
+    """Fahrzeugspezifische Grenzen aus fahrzeuge.json (leere Werte: Standard, ohne
+    Tankvolumen NaN, dann entfallen Tankvolumen-Prüfung und Reichweitengrenze)
+
+    Returns:
+        {kennzeichen: (verbrauch_min, verbrauch_max, tankvolumen)}
+    """
+    grenzen = {}
+    for fz in fahrzeuge_config.get("fahrzeuge", []):
+        grenzen[fz["kennzeichen"]] = (
+            fz.get("verbrauch_min", VERBRAUCH_MIN_STANDARD) or VERBRAUCH_MIN_STANDARD,
+            fz.get("verbrauch_max", VERBRAUCH_MAX_STANDARD) or VERBRAUCH_MAX_STANDARD,
+            fz.get("tankvolumen") or np.nan
+        )
+    return grenzen
+
+def _verbrauchsbasis(fz_nr, verbrauch, vorwerte=None):
+    """
+    Gleitender Median und MAD der letzten VERBRAUCH_FENSTER Verbrauchswerte je Fahrzeug.
+
+    Die Zeilen müssen nach Fahrzeug und Zeit sortiert sein. Der eigene Wert zählt nicht mit.
+    Statt einer Schleife pro Fahrzeug wird eine Matrix der Vorgängerwerte gebildet
+    (Zeile x Fenster), Werte anderer Fahrzeuge werden ausgeblendet.
+
+    Args:
+        fz_nr: Fahrzeugnummer je Zeile
+        verbrauch: Verbrauch je Zeile (NaN: zählt nicht)
+        vorwerte: {fz_nr: [ältere Verbrauchswerte]} aus der Historie, die vor den Zeilen liegen
+
+    Returns:
+        (median, mad) je Zeile; NaN bei weniger als VERBRAUCH_MIN_WERTE Vorgängerwerten
+    """
+    verbrauch = np.asarray(verbrauch, dtype=float)
+    median = np.full(len(verbrauch), np.nan)
+    mad = np.full(len(verbrauch), np.nan)
+    gueltig = np.isfinite(verbrauch)
+
+    # Reihe je Fahrzeug: Vorwerte aus der Historie, dann die gültigen Werte der Zeilen
+    vorwerte = vorwerte or {}
+    vor_fz = np.array([nr for nr, werte in vorwerte.items() for _ in werte[-VERBRAUCH_FENSTER:]], dtype=np.int64)
+    vor_werte = np.array([w for werte in vorwerte.values() for w in werte[-VERBRAUCH_FENSTER:]], dtype=float)
+    reihe_fz = np.concatenate([vor_fz, np.asarray(fz_nr, dtype=np.int64)[gueltig]])
+    reihe = np.concatenate([vor_werte, verbrauch[gueltig]])
+    ist_zeile = np.concatenate([np.zeros(len(vor_werte), dtype=bool), np.ones(gueltig.sum(), dtype=bool)])
+    reihenfolge = np.lexsort((np.arange(len(reihe)), ist_zeile, reihe_fz))
+    reihe_fz, reihe, ist_zeile = reihe_fz[reihenfolge], reihe[reihenfolge], ist_zeile[reihenfolge]
+
+    # Vorgängerwerte je Position: Spalte k = k+1 Werte zurück
+    vorgaenger = np.arange(len(reihe))[:, None] - np.arange(1, VERBRAUCH_FENSTER + 1)[None, :]
+    gleiches_fz = (vorgaenger >= 0) & (reihe_fz[np.maximum(vorgaenger, 0)] == reihe_fz[:, None])
+    fenster = np.where(gleiches_fz, reihe[np.maximum(vorgaenger, 0)], np.nan)
+    genug = gleiches_fz.sum(axis=1) >= VERBRAUCH_MIN_WERTE
+
+    reihe_median = np.full(len(reihe), np.nan)
+    reihe_mad = np.full(len(reihe), np.nan)
+    if genug.any():
+        reihe_median[genug] = np.nanmedian(fenster[genug], axis=1)
+        reihe_mad[genug] = np.nanmedian(np.abs(fenster[genug] - reihe_median[genug, None]), axis=1)
+
+    # Nur die Zeilen zurückgeben (in ursprünglicher Reihenfolge der gültigen Werte)
+    median[gueltig] = reihe_median[ist_zeile]
+    mad[gueltig] = reihe_mad[ist_zeile]
+    return median, mad
+
+def _zeitpunkte(datum, zeit):
+    """Datum plus Uhrzeit "HH:MM"; fehlende oder ungültige Uhrzeit zählt als 00:00"""
+    zeit = pd.Series(zeit).astype("string")
+    # Stunden und Minuten per Zeichenposition statt to_timedelta (parst jeden Wert einzeln)
+    minuten = (pd.to_numeric(zeit.str.slice(0, 2), errors="coerce") * 60
+               + pd.to_numeric(zeit.str.slice(3, 5), errors="coerce"))
+    return pd.to_datetime(datum) + pd.to_timedelta(minuten.fillna(0).to_numpy(), unit="min")
+
+def _fenster(fz_nr, zeitpunkt, liter, stunden):
+    """
+    Anzahl Tankvorgänge und getankte Liter je Fahrzeug im Zeitfenster (zeitpunkt - stunden, zeitpunkt].
+
+    Statt paarweiser Vergleiche: Fahrzeug und Zeitpunkt werden zu einem sortierten Schlüssel
+    kombiniert, die Fenstergrenzen per searchsorted bestimmt und die Liter über eine kumulierte
+    Summe abgezogen. Vorgänge ohne gültiges Datum zählen nur für sich selbst.
+    """
+    liter = np.nan_to_num(np.asarray(liter, dtype=float))
+    gueltig = zeitpunkt.notna().to_numpy()
+    anzahl = np.ones(len(liter))
+    summe = liter.copy()
+    if gueltig.sum() < 2:
+        return anzahl, summe
+
+    fenster = stunden * 3600
+    sekunden = (zeitpunkt[gueltig] - zeitpunkt[gueltig].min()).dt.total_seconds().to_numpy().astype(np.int64)
+    spanne = sekunden.max() + fenster + 1  # Schlüssel verschiedener Fahrzeuge überlappen nie
+    schluessel = np.asarray(fz_nr, dtype=np.int64)[gueltig] * spanne + sekunden
+
+    reihenfolge = np.argsort(schluessel, kind="stable")
+    sortiert = schluessel[reihenfolge]
+    von = np.searchsorted(sortiert, sortiert - fenster, side="right")
+    bis = np.searchsorted(sortiert, sortiert, side="right")
+    kumuliert = np.concatenate([[0.0], np.cumsum(liter[gueltig][reihenfolge])])
+
+    werte_anzahl = np.empty(len(sortiert))
+    werte_summe = np.empty(len(sortiert))
+    werte_anzahl[reihenfolge] = bis - von
+    werte_summe[reihenfolge] = kumuliert[bis] - kumuliert[von]
+    anzahl[gueltig] = werte_anzahl
+    summe[gueltig] = werte_summe
+    return anzahl, summe
+
+def pruefrahmen_aus_import(df_fuel):
+    """
+    Geparste Import-Zeilen (nach berechne_verbrauch) in das Format der Prüfregeln bringen.
+
+    Verbrauch zählt wie in der Historie nur bei positiver km-Differenz.
+    """
+    return pd.DataFrame({
+        "kennzeichen": df_fuel["Kennzeichen"],
+        "datum": df_fuel["Datum"],
+        "zeit": df_fuel["Zeit"],
+        "km_stand": df_fuel["km_Stand"],
+        "menge_liter": df_fuel["Menge_Liter"],
+        "betrag_eur": df_fuel["Betrag_EUR"],
+        "verbrauch": df_fuel["Verbrauch_L100km"].where(df_fuel["km_differenz"] > 0),
+        "tankstelle": df_fuel["Tankstelle"],
+        "warenart": df_fuel["Warenart"]
+    }, index=df_fuel.index)
+
+def _sekunden(zeitpunkt):
+    """Zeitpunkte als Sekunden seit 1970 (float, NaN bei fehlendem Datum)"""
+    return (pd.Series(zeitpunkt) - pd.Timestamp(0)).dt.total_seconds().to_numpy()
+
+def _preisgruppen(df):
+    """Vergleichsgruppe "tankstelle|warenart" je Tankvorgang (NA, wenn eines fehlt)"""
+    if "tankstelle" not in df or "warenart" not in df:
+        return pd.Series(pd.NA, index=df.index, dtype="string")
+    return df["tankstelle"].astype("string").str.strip() + "|" + df["warenart"].astype("string").str.strip()
+
+def berechne_preisbasis(df, basis=None):
+    """
+    Referenzpreise für die Literpreis-Prüfung.
+
+    Args:
+        df: Tankvorgänge mit kennzeichen, datum, zeit, menge_liter, betrag_eur, tankstelle, warenart
+        basis: vorhandene Basis, um die die Tankvorgänge aus df ergänzt werden
+
+    Returns:
+        DataFrame (kennzeichen, gruppe, sekunden, preis) aller Tankvorgänge mit gültigem
+        Literpreis, sortiert nach Gruppe und Zeit
+    """
+    menge = pd.to_numeric(df["menge_liter"], errors="coerce")
+    betrag = pd.to_numeric(df["betrag_eur"], errors="coerce") if "betrag_eur" in df else np.nan
+    preis = betrag / menge.where(menge > 0)
+    return _preisbasis(df["kennzeichen"], _preisgruppen(df), _sekunden(_zeitpunkte(df["datum"], df["zeit"])),
+                       preis, basis)
+
+def _preisbasis(kennzeichen, gruppe, sekunden, preis, basis=None):
+    preis = np.asarray(preis, dtype=float)
+    neu = pd.DataFrame({
+        "kennzeichen": np.asarray(kennzeichen, dtype=object),
+        "gruppe": np.asarray(gruppe, dtype=object),
+        "sekunden": sekunden,
+        "preis": preis
+    })
+    neu = neu[neu["gruppe"].notna().to_numpy() & np.isfinite(sekunden) & (preis > 0)]
+    if basis is not None:
+        neu = pd.concat([basis, neu], ignore_index=True)
+    return neu.sort_values(["gruppe", "sekunden"], kind="stable", ignore_index=True)
+
+def _preis_referenz(basis, gruppe, sekunden):
+    """
+    Mittlerer Literpreis derselben Gruppe in den PREIS_FENSTER_TAGEN vor dem Zeitpunkt.
+
+    Gleichzeitige Tankvorgänge (also auch der geprüfte selbst) zählen nicht mit. NaN, wenn
+    es weniger als PREIS_MIN_VERGLEICHE Vergleichswerte gibt. Wie bei _fenster werden Gruppe
+    und Zeit zu einem sortierten Schlüssel kombiniert und über searchsorted und kumulierte
+    Summen ausgewertet.
+    """
+    referenz = np.full(len(sekunden), np.nan)
+    if basis.empty:
+        return referenz
+    gruppen = pd.Index(basis["gruppe"].unique())  # sortiert, da basis nach Gruppe sortiert ist
+    code = gruppen.get_indexer(pd.Series(gruppe, dtype=object))  # fehlende Gruppe: -1
+    gueltig = (code >= 0) & np.isfinite(sekunden)
+    if not gueltig.any():
+        return referenz
+
+    fenster = PREIS_FENSTER_TAGE * 86400
+    basis_sekunden = basis["sekunden"].to_numpy()
+    start = min(basis_sekunden.min(), sekunden[gueltig].min())
+    spanne = max(basis_sekunden.max(), sekunden[gueltig].max()) - start + fenster + 1
+    schluessel = gruppen.get_indexer(basis["gruppe"]) * spanne + (basis_sekunden - start)
+    zeilen = code[gueltig] * spanne + (sekunden[gueltig] - start)
+
+    von = np.searchsorted(schluessel, zeilen - fenster, side="left")
+    bis = np.searchsorted(schluessel, zeilen, side="left")
+    kumuliert = np.concatenate([[0.0], np.cumsum(basis["preis"].to_numpy())])
+    anzahl = bis - von
+    mittel = (kumuliert[bis] - kumuliert[von]) / np.maximum(anzahl, 1)
+    referenz[gueltig] = np.where(anzahl >= PREIS_MIN_VERGLEICHE, mittel, np.nan)
+    return referenz
+
+def _km_tippfehler(km, vorher, nachher, km_max):
+    """
+    Tippfehler im km-Stand: eine Ziffer zu viel oder zwei benachbarte Ziffern vertauscht.
+
+    Nur für km-Stände, die nicht zwischen vorherigen und folgenden km-Stand passen (ohne
+    folgenden: kleiner als der vorherige oder mehr als km_max davon entfernt); ein großer
+    Sprung, den der folgende km-Stand bestätigt, bleibt ein km-Sprung. Statt Zeile für Zeile
+    umzurechnen, werden für alle Zeilen zugleich sämtliche Varianten gebildet (eine Spalte je
+    Stelle); eine Variante zählt, wenn sie plausibel wäre. Bei mehreren gewinnt die, die am
+    nächsten an der Mitte zwischen den Nachbarn liegt.
+
+    Returns:
+        (ziffer_zuviel, vertauscht): korrigierter km-Stand je Zeile, sonst NaN
+    """
+    km, vorher, nachher, km_max = (np.asarray(w, dtype=float) for w in (km, vorher, nachher, km_max))
+    v, n, m = vorher[:, None], nachher[:, None], km_max[:, None]
+
+    def plausibel(wert):
+        return (wert >= v) & (wert - v <= m) & (np.isnan(n) | (wert <= n))
+
+    ganzzahlig = (km > 0) & (km == np.round(km)) & ~np.isnan(vorher)
+    ausreisser = np.where(np.isnan(nachher), ~plausibel(km[:, None])[:, 0], (km < vorher) | (km > nachher))
+    k = np.where(ganzzahlig & ausreisser, km, 0)[:, None]
+    erwartet = np.where(np.isnan(nachher), vorher, (vorher + nachher) / 2)[:, None]
+    zeilen = np.arange(len(km))
+
+    def beste(varianten, moeglich):
+        treffer = moeglich & plausibel(varianten)
+        abstand = np.where(treffer, np.abs(varianten - erwartet), np.inf)
+        wahl = varianten[zeilen, abstand.argmin(axis=1)]
+        return np.where(treffer.any(axis=1), wahl, np.nan)
+
+    # Ziffer an Stelle j entfernt: höhere Stellen um eine Stelle nach rechts
+    p = _KM_STELLEN[None, :]
+    ohne = np.floor(k / (p * 10)) * p + np.mod(k, p)
+    ziffer_zuviel = beste(ohne, (k >= p) & (ohne > 0))
+
+    # Ziffern an Stelle j und j+1 getauscht: Wert ändert sich um 9 * 10^j * (Differenz der Ziffern)
+    ziffern = np.mod(np.floor(k / p), 10)
+    getauscht = k - 9 * p[:, :-1] * (ziffern[:, 1:] - ziffern[:, :-1])
+    vertauscht = beste(getauscht, (k >= p[:, 1:]) & (ziffern[:, 1:] != ziffern[:, :-1]))
+    return ziffer_zuviel, vertauscht
+
+def _typisiere(tabelle, regeln):
+    typen = list(dict.fromkeys(r.typ for r in regeln))
+    return tabelle.astype({"typ": pd.CategoricalDtype(typen), "schwere": pd.CategoricalDtype(SCHWEREGRADE)})
+
+def _auff_ids(kennzeichen, datum, zeit):
+    """IDs "Kennzeichen_JJJJ-MM-TT_Zeit" der Tankvorgänge (fehlende Zeit wie str(None))"""
+    zeit = zeit.astype(object).where(zeit.notna(), None).map(str)
+    return (kennzeichen.astype(str) + "_" + datum.dt.strftime("%Y-%m-%d") + "_" + zeit).astype(object)
+
+def _leere_auffaelligkeiten(regeln):
+    tabelle = pd.DataFrame({spalte: pd.Series(dtype=dtype) for spalte, dtype in AUFFAELLIGKEIT_SPALTEN.items()})
+    return _typisiere(tabelle, regeln)
+
+@gemessen("analyse.pruefung")
+def pruefe_tankvorgaenge(df, fahrzeug_grenzen=None, regeln=None, preisbasis=None, verbrauch_vorwerte=None):
+    """
+    Alle Prüfregeln in einem vektorisierten Durchlauf über einen Tankvorgangs-Frame auswerten.
+
+    Wird von der Historienprüfung und der Import-Vorschau gemeinsam genutzt.
+
+    Args:
+        df: Spalten kennzeichen, datum (datetime), zeit, km_stand, menge_liter, verbrauch;
+            optional betrag_eur, quittiert, quittiert_kommentar, quittiert_von, quittiert_am
+        fahrzeug_grenzen: {kennzeichen: (verbrauch_min, verbrauch_max, tankvolumen)}
+        regeln: kompilierte Prüfregeln (Standard: lade_pruefregeln())
+        preisbasis: Referenzpreise (berechne_preisbasis); Standard: aus df selbst. Wird nur
+            ein Teil der Historie geprüft, die Basis der ganzen Historie übergeben.
+        verbrauch_vorwerte: {kennzeichen: [Verbrauchswerte]} aus der Historie, die vor df liegen
+            (Import-Vorschau: gelernter Verbrauch auch für wenige neue Tankvorgänge)
+
+    Returns:
+        DataFrame mit den Spalten aus AUFFAELLIGKEIT_SPALTEN, eine Zeile pro Auffälligkeit,
+        sortiert nach Fahrzeug (Reihenfolge des ersten Auftretens), Datum/Zeit und Regel.
+        "zeile" ist das Indexlabel des geprüften Tankvorgangs in df.
+    """
+    regeln = lade_pruefregeln() if regeln is None else regeln
+    if df.empty:
+        return _leere_auffaelligkeiten(regeln)
+    fahrzeug_grenzen = fahrzeug_grenzen or {}
+
+    fahrzeuge = pd.Index(df["kennzeichen"].unique())
+    d = df.assign(_fz=fahrzeuge.get_indexer(df["kennzeichen"]))
+    d = d.sort_values(["_fz", "datum", "zeit"], kind="stable")
+
+    # Prüfrahmen: alle Spalten, auf die sich Regeln beziehen dürfen. km-Stand 0 gilt wie in
+    # der Verbrauchsberechnung als fehlend, sonst vergleichen die Nachbarn gegen 0
+    km = pd.to_numeric(d["km_stand"], errors="coerce")
+    rahmen = pd.DataFrame({
+        "kennzeichen": d["kennzeichen"],
+        "datum": d["datum"],
+        "zeit": d["zeit"],
+        "km_stand": km.where(km > 0),
+        "menge_liter": pd.to_numeric(d["menge_liter"], errors="coerce"),
+        "betrag_eur": pd.to_numeric(d["betrag_eur"], errors="coerce") if "betrag_eur" in d else np.nan,
+        "verbrauch": pd.to_numeric(d["verbrauch"], errors="coerce"),
+    }, index=d.index)
+    rahmen["km_vorher"] = rahmen["km_stand"].groupby(d["_fz"]).shift()
+    rahmen["km_differenz"] = rahmen["km_stand"] - rahmen["km_vorher"]
+    # Grenzen pro Fahrzeug einmal nachschlagen und auf die Zeilen verteilen
+    standard = (VERBRAUCH_MIN_STANDARD, VERBRAUCH_MAX_STANDARD, np.nan)
+    grenzen = np.array([fahrzeug_grenzen.get(k, standard) for k in fahrzeuge], dtype=float).reshape(-1, 3)
+    pos = d["_fz"].to_numpy()
+    rahmen["verbrauch_min"] = grenzen[pos, 0]
+    rahmen["verbrauch_max"] = grenzen[pos, 1]
+    rahmen["tankvolumen"] = grenzen[pos, 2]
+
+    # Zeitfenster je Fahrzeug
+    zeitpunkt = _zeitpunkte(rahmen["datum"], d["zeit"])
+    sekunden = _sekunden(zeitpunkt)
+    rahmen["tankungen_fenster"] = _fenster(pos, zeitpunkt, rahmen["menge_liter"], MEHRFACH_FENSTER_STUNDEN)[0]
+    rahmen["liter_fenster"] = _fenster(pos, zeitpunkt, rahmen["menge_liter"], LITER_FENSTER_STUNDEN)[1]
+
+    # km-Sprung: Obergrenze nach vergangener Zeit und nach Reichweite (getankte Liter plus
+    # voller Tank beim niedrigsten Verbrauch, nur mit hinterlegtem Tankvolumen); Tippfehler
+    # gegen die Nachbarn
+    rahmen["km_nachher"] = rahmen["km_stand"].groupby(d["_fz"]).shift(-1)
+    stunden = pd.Series(sekunden, index=d.index).groupby(pos).diff() / 3600
+    reichweite = (rahmen["menge_liter"].fillna(0) + rahmen["tankvolumen"]) / rahmen["verbrauch_min"] * 100
+    rahmen["km_max"] = np.fmin(KM_SPRUNG_SOCKEL + KM_MAX_PRO_STUNDE * stunden, reichweite)
+    rahmen["km_ziffer_zuviel"], rahmen["km_ziffern_vertauscht"] = _km_tippfehler(
+        rahmen["km_stand"], rahmen["km_vorher"], rahmen["km_nachher"], rahmen["km_max"])
+
+    # Literpreis gegen den Schnitt derselben Tankstelle und Warenart
+    rahmen["preis_liter"] = rahmen["betrag_eur"] / rahmen["menge_liter"].where(rahmen["menge_liter"] > 0)
+    gruppe = _preisgruppen(d)
+    if preisbasis is None:
+        preisbasis = _preisbasis(d["kennzeichen"], gruppe, sekunden, rahmen["preis_liter"])
+    rahmen["preis_referenz"] = _preis_referenz(preisbasis, gruppe, sekunden)
+    rahmen["preis_abweichung"] = (rahmen["preis_liter"] / rahmen["preis_referenz"] - 1) * 100
+
+    # Gelernter Verbrauch je Fahrzeug (robuster z-Wert gegen Median/MAD der Vorgängerwerte)
+    vorwerte = {nr: verbrauch_vorwerte[k] for nr, k in enumerate(fahrzeuge) if k in (verbrauch_vorwerte or {})}
+    median, mad = _verbrauchsbasis(pos, rahmen["verbrauch"], vorwerte)
+    rahmen["verbrauch_median"] = median
+    rahmen["verbrauch_mad"] = mad
+    rahmen["verbrauch_z"] = 0.6745 * (rahmen["verbrauch"] - median) / np.maximum(mad, VERBRAUCH_MAD_MIN)
+
+    positionen, regel_nr = werte_regeln_aus(rahmen, regeln)
+    if len(positionen) == 0:
+        return _leere_auffaelligkeiten(regeln)
+
+    ergebnis = pd.DataFrame({"zeile": d.index[positionen]})
+    ergebnis["typ"] = np.array([r.typ for r in regeln], dtype=object)[regel_nr]
+    ergebnis["schwere"] = np.array([r.schwere for r in regeln], dtype=object)[regel_nr]
+    details = np.empty(len(ergebnis), dtype=object)
+    for nr, regel in enumerate(regeln):
+        treffer = regel_nr == nr
+        if treffer.any():
+            details[treffer] = formatiere_details(regel, rahmen.iloc[positionen[treffer]]).to_numpy(dtype=object)
+    ergebnis["details"] = details
+
+    treffer = d.iloc[positionen]
+    datum = treffer["datum"]
+    ergebnis["id"] = _auff_ids(treffer["kennzeichen"], datum, treffer["zeit"]).to_numpy()
+    ergebnis["fahrzeug"] = treffer["kennzeichen"].to_numpy()
+    ergebnis["datum"] = datum.dt.strftime("%d.%m.%Y").to_numpy()
+    ergebnis["zeit"] = treffer["zeit"].to_numpy()
+    for spalte, standard in (("quittiert", False), ("quittiert_kommentar", ""),
+                             ("quittiert_von", ""), ("quittiert_am", "")):
+        if spalte in treffer:
+            werte = treffer[spalte].fillna(standard) if spalte != "quittiert" else treffer[spalte].fillna(False).astype(bool)
+            ergebnis[spalte] = werte.to_numpy()
+        else:
+            ergebnis[spalte] = standard
+
+    return _typisiere(ergebnis[list(AUFFAELLIGKEIT_SPALTEN)], regeln)
+
+def tankvorgaenge_rahmen(tankvorgaenge, index=None):
+    """Tankvorgänge der Historie (Liste von Dicts) als Eingabe für pruefe_tankvorgaenge"""
+    df = pd.DataFrame(tankvorgaenge, index=index)
+    df["datum"] = pd.to_datetime(df["datum"])
+    for spalte in ("km_stand", "menge_liter", "verbrauch"):
+        if spalte not in df:
+            df[spalte] = None
+    return df
+
+def ermittle_auffaelligkeiten(historie, fahrzeuge_config=None):
+    """Auffälligkeiten der Historie als Tabelle (siehe pruefe_tankvorgaenge)
+
+    fahrzeuge_config: Inhalt von fahrzeuge.json (wird geladen, falls nicht übergeben)
+    """
+    if not historie["tankvorgaenge"]:
+        return _leere_auffaelligkeiten(lade_pruefregeln())
+
+    # Fahrzeug-spezifische Verbrauchsgrenzen laden
+    if fahrzeuge_config is None:
+        from .speicher import lade_fahrzeuge  # speicher importiert analyse
+        fahrzeuge_config = lade_fahrzeuge()
+
+    return pruefe_tankvorgaenge(tankvorgaenge_rahmen(historie["tankvorgaenge"]),
+                                lese_verbrauchsgrenzen(fahrzeuge_config))
+
+def auffaelligkeiten_als_liste(tabelle):
+    """Ergebnistabelle in die Liste von Dicts umwandeln (E-Mails, Quittierung)"""
+    spalten = [s for s in AUFFAELLIGKEIT_SPALTEN if s != "zeile"]
+    werte = [tabelle[s].to_numpy(dtype=object) for s in spalten]
+    werte[spalten.index("quittiert")] = [bool(q) for q in werte[spalten.index("quittiert")]]
+    return [dict(zip(spalten, zeile)) for zeile in zip(*werte)]
+
+def historie_tabelle(tankvorgaenge):
+    """Tankvorgänge als Tabelle für die Historien-Ansicht (datum als datetime, neueste zuerst)"""
+    df = pd.DataFrame(tankvorgaenge)
+    df["datum"] = pd.to_datetime(df["datum"])
+    return df.sort_values(["datum", "zeit"], ascending=False)
+
+@gemessen("analyse.markierung")
+def markiere_auffaelligkeiten(df, tabelle, regeln=None):
+    """
+    Auffälligkeits-Spalten für eine Historien-Tabelle, spaltenweise über die ID statt Zeile für Zeile.
+
+    Args:
+        df: Tabelle wie historie_tabelle (auch gefiltert)
+        tabelle: Auffälligkeiten wie ermittle_auffaelligkeiten; hat ein Tankvorgang mehrere,
+            zählt für den Status die letzte
+
+    Returns:
+        DataFrame mit Index von df und den Spalten _auff_id (Kennzeichen_Datum_Zeit wie die
+        ID der Auffälligkeit), _ist_auffaellig, _quittiert und _status ("⚠️ km?", "✓ L↑", sonst "")
+    """
+    ids = _auff_ids(df["kennzeichen"], df["datum"], df["zeit"])
+    letzte = tabelle.drop_duplicates("id", keep="last").set_index("id")
+    ist_auffaellig = ids.isin(letzte.index)
+    quittiert = ids.map(letzte["quittiert"].astype(bool)).fillna(False).astype(bool)
+    kurz = ids.map(letzte["typ"].astype(object)).map(kurzformen(regeln)).fillna("?")
+    status = np.where(quittiert, "✓ ", "⚠️ ").astype(object) + kurz
+    return pd.DataFrame({
+        "_auff_id": ids,
+        "_ist_auffaellig": ist_auffaellig,
+        "_quittiert": quittiert,
+        "_status": status.where(ist_auffaellig, "")
+    }, index=df.index)
+
+def pruefe_auffaelligkeiten(historie, fahrzeuge_config=None):
+    """Prüft Historie auf Auffälligkeiten und gibt Liste zurück (ein Dict pro Auffälligkeit)
+
+    fahrzeuge_config: Inhalt von fahrzeuge.json (wird geladen, falls nicht übergeben)
+    """
+    return auffaelligkeiten_als_liste(ermittle_auffaelligkeiten(historie, fahrzeuge_config))
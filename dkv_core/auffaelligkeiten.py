@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Gespeicherte Auffälligkeiten: Ergebnis der Prüfregeln pro Fahrzeug, inkrementell gepflegt
+
+Statt bei jedem Rerun der Oberfläche alle Tankvorgänge neu zu prüfen, liegt das Ergebnis
+in AUFFAELLIGKEITEN_DATEI, gruppiert nach Fahrzeug. Neu geprüft werden nur Fahrzeuge,
+  - deren Tankvorgänge sich geändert haben (Import, Bearbeiten, Löschen, Quittieren),
+    erkannt an einer Signatur über ihre Einträge
+  - deren Verbrauchsgrenzen in fahrzeuge.json geändert wurden
+  - die an einer Tankstelle/Warenart getankt haben, deren Referenzpreise sich geändert
+    haben (die Literpreis-Prüfung vergleicht fahrzeugübergreifend)
+Ändern sich die Prüfregeln selbst (pruefregeln.json), wird alles neu geprüft.
+
+Ist historie.json seit dem letzten Stand unverändert (historie_stempel), entfällt auch der
+Signaturvergleich: Tabelle und Zähler der offenen Auffälligkeiten kommen direkt aus dem
+gespeicherten Stand, der im Prozess zusätzlich im Speicher gehalten wird.
+"""
+
+import hashlib
+import json
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from .analyse import (
+    AUFFAELLIGKEIT_SPALTEN,
+    VERBRAUCH_MAX_STANDARD,
+    VERBRAUCH_MIN_STANDARD,
+    _leere_auffaelligkeiten,
+    _typisiere,
+    berechne_preisbasis,
+    lese_verbrauchsgrenzen,
+    pruefe_tankvorgaenge,
+    tankvorgaenge_rahmen,
+)
+from .konfiguration import AUFFAELLIGKEITEN_DATEI
+from .messung import gemessen
+from .metriken import registriere_sammler
+from .regeln import VERBRAUCH_FENSTER, lade_pruefregeln
+from .speicher import _schreibe_json_atomar
+
+# Gespeicherte Spalten einer Auffälligkeit ("zeile" wird pro Fahrzeug getrennt abgelegt)
+_SPALTEN = [s for s in AUFFAELLIGKEIT_SPALTEN if s != "zeile"]
+_VERSION = 1
+
+_STAND = {"stempel": None, "daten": None}
+_PREISBASIS = {"stempel": None, "basis": None}
+_VORWERTE = {"stempel": None, "vorwerte": None}
+
+
+def _leerer_stand():
+    return {"version": _VERSION, "historie_stempel": None, "regeln": None,
+            "reihenfolge": [], "offen": 0, "preisgruppen": {}, "fahrzeuge": {}}
+
+def _lade_stand():
+    """Gespeicherten Stand laden (im Speicher gehalten, bis sich die Datei ändert)"""
+    try:
+        info = os.stat(AUFFAELLIGKEITEN_DATEI)
+    except FileNotFoundError:
+        return _leerer_stand()
+    stempel = (info.st_mtime_ns, info.st_size)
+    if _STAND["stempel"] != stempel:
+        try:
+            with open(AUFFAELLIGKEITEN_DATEI, "r", encoding="utf-8") as f:
+                daten = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            daten = None
+        if not isinstance(daten, dict) or daten.get("version") != _VERSION:
+            daten = _leerer_stand()  # unbrauchbar: wird beim nächsten Aktualisieren neu aufgebaut
+        _STAND.update(stempel=stempel, daten=daten)
+    return _STAND["daten"]
+
+def _speichere_stand(daten):
+    _schreibe_json_atomar(AUFFAELLIGKEITEN_DATEI, daten, indent=None)
+    info = os.stat(AUFFAELLIGKEITEN_DATEI)
+    _STAND.update(stempel=(info.st_mtime_ns, info.st_size), daten=daten)
+
+def _regel_signatur(regeln):
+    return hashlib.sha256(repr([tuple(r) for r in regeln]).encode("utf-8")).hexdigest()[:16]
+
+def _fahrzeug_signatur(eintraege):
+    """Signatur über alle Felder der Tankvorgänge eines Fahrzeugs (in Historien-Reihenfolge)"""
+    return hashlib.blake2b(json.dumps(eintraege, ensure_ascii=False).encode("utf-8"), digest_size=16).hexdigest()
+
+def preisbasis_historie(historie, stempel=None):
+    """
+    Referenzpreise der ganzen Historie (berechne_preisbasis), für die Import-Vorschau und
+    die teilweise Neuprüfung. Mit stempel (historie_stempel) wird sie im Prozess zwischengespeichert.
+    """
+    if stempel is not None and _PREISBASIS["stempel"] == stempel:
+        return _PREISBASIS["basis"]
+    spalten = ("kennzeichen", "datum", "zeit", "menge_liter", "betrag_eur", "tankstelle", "warenart")
+    tankvorgaenge = historie["tankvorgaenge"]
+    basis = berechne_preisbasis(pd.DataFrame({s: [t.get(s) for t in tankvorgaenge] for s in spalten}))
+    if stempel is not None:
+        _PREISBASIS.update(stempel=stempel, basis=basis)
+    return basis
+
+def verbrauch_vorwerte_historie(historie, stempel=None):
+    """
+    Letzte VERBRAUCH_FENSTER Verbrauchswerte je Fahrzeug (zeitlich sortiert), damit die
+    Import-Vorschau den gelernten Verbrauch fortschreibt statt bei null zu beginnen.
+    Mit stempel (historie_stempel) wird das Ergebnis im Prozess zwischengespeichert.
+    """
+    if stempel is not None and _VORWERTE["stempel"] == stempel:
+        return _VORWERTE["vorwerte"]
+    werte = {}
+    for t in historie["tankvorgaenge"]:
+        if t.get("verbrauch") is not None:
+            werte.setdefault(t["kennzeichen"], []).append((t["datum"] or "", t.get("zeit") or "", t["verbrauch"]))
+    vorwerte = {kz: [v for _, _, v in sorted(w)[-VERBRAUCH_FENSTER:]] for kz, w in werte.items()}
+    if stempel is not None:
+        _VORWERTE.update(stempel=stempel, vorwerte=vorwerte)
+    return vorwerte
+
+def _preisgruppen_signaturen(basis):
+    """Signatur der Referenzpreise je Gruppe und die Gruppen, an denen jedes Fahrzeug getankt hat"""
+    if basis.empty:
+        return {}, {}
+    werte = pd.util.hash_pandas_object(basis[["sekunden", "preis"]], index=False)
+    summen = werte.groupby(basis["gruppe"]).agg(["sum", "count"])
+    signaturen = {g: f"{s:x}-{n}" for g, s, n in zip(summen.index, summen["sum"], summen["count"])}
+    gruppen = {kz: set(g) for kz, g in basis.groupby("kennzeichen")["gruppe"].unique().items()}
+    return signaturen, gruppen
+
+def _als_tabelle(stand, regeln):
+    fahrzeuge = [stand["fahrzeuge"][kz] for kz in stand["reihenfolge"]]
+    zeilen = [a for fz in fahrzeuge for a in fz["auffaelligkeiten"]]
+    if not zeilen:
+        return _leere_auffaelligkeiten(regeln)
+    tabelle = pd.DataFrame(zeilen, columns=_SPALTEN)
+    tabelle["quittiert"] = tabelle["quittiert"].astype(bool)
+    tabelle["zeile"] = [z for fz in fahrzeuge for z in fz["zeilen"]]
+    return _typisiere(tabelle[list(AUFFAELLIGKEIT_SPALTEN)], regeln)
+
+@gemessen("analyse.auffaelligkeiten")
+def aktualisiere_auffaelligkeiten(historie, fahrzeuge_config, stempel=None):
+    """
+    Auffälligkeiten der Historie aus dem gespeicherten Stand; nur geänderte Fahrzeuge neu prüfen.
+
+    Args:
+        historie: Historie wie von lade_historie()
+        fahrzeuge_config: Inhalt von fahrzeuge.json
+        stempel: historie_stempel() von vor dem Laden der Historie. Stimmt er mit dem
+            gespeicherten Stand überein, werden die Tankvorgänge nicht erneut verglichen.
+
+    Returns:
+        Tabelle wie ermittle_auffaelligkeiten (gleiche Zeilen in gleicher Reihenfolge)
+    """
+    regeln = lade_pruefregeln()
+    regel_signatur = _regel_signatur(regeln)
+    grenzen = lese_verbrauchsgrenzen(fahrzeuge_config)
+
+    def grenzen_von(kennzeichen):
+        # Fehlendes Tankvolumen als None, damit der Vergleich mit dem gespeicherten Stand greift
+        standard = (VERBRAUCH_MIN_STANDARD, VERBRAUCH_MAX_STANDARD, None)
+        return [float(g) if pd.notna(g) else None for g in grenzen.get(kennzeichen, standard)]
+
+    stand = _lade_stand()
+    if (stempel is not None and stand["historie_stempel"] == list(stempel)
+            and stand["regeln"] == regel_signatur
+            and all(stand["fahrzeuge"][kz]["grenzen"] == grenzen_von(kz) for kz in stand["reihenfolge"])):
+        return _als_tabelle(stand, regeln)
+
+    alt = stand["fahrzeuge"] if stand["regeln"] == regel_signatur else {}
+    tankvorgaenge = historie["tankvorgaenge"]
+    positionen = {}
+    for i, t in enumerate(tankvorgaenge):
+        positionen.setdefault(t["kennzeichen"], []).append(i)
+
+    preisbasis = preisbasis_historie(historie, stempel)
+    preisgruppen, fahrzeug_gruppen = _preisgruppen_signaturen(preisbasis)
+    alte_preisgruppen = stand.get("preisgruppen", {}) if alt else {}
+    geaenderte_gruppen = {g for g in preisgruppen.keys() | alte_preisgruppen.keys()
+                          if preisgruppen.get(g) != alte_preisgruppen.get(g)}
+
+    fahrzeuge = {}
+    zu_pruefen = []
+    for kennzeichen, pos in positionen.items():
+        signatur = _fahrzeug_signatur([tankvorgaenge[i] for i in pos])
+        vorher = alt.get(kennzeichen)
+        if (vorher and vorher["signatur"] == signatur and vorher["grenzen"] == grenzen_von(kennzeichen)
+                and not fahrzeug_gruppen.get(kennzeichen, set()) & geaenderte_gruppen):
+            fahrzeuge[kennzeichen] = dict(vorher)
+        else:
+            fahrzeuge[kennzeichen] = {"signatur": signatur, "grenzen": grenzen_von(kennzeichen),
+                                      "offen": 0, "auffaelligkeiten": [], "nr": []}
+            zu_pruefen.append(kennzeichen)
+
+    if zu_pruefen:
+        # Alle betroffenen Fahrzeuge in einem Durchlauf prüfen; Index = Position in der Historie
+        index = [i for kz in zu_pruefen for i in positionen[kz]]
+        tabelle = pruefe_tankvorgaenge(tankvorgaenge_rahmen([tankvorgaenge[i] for i in index], index=index),
+                                       grenzen, regeln, preisbasis)
+        spalten = [tabelle[s].to_numpy(dtype=object) for s in _SPALTEN]
+        for kennzeichen, gruppe in tabelle.groupby("fahrzeug", sort=False).indices.items():
+            fz = fahrzeuge[kennzeichen]
+            fz["auffaelligkeiten"] = [[bool(w) if s == "quittiert" else w for s, w in zip(_SPALTEN, werte)]
+                                      for werte in zip(*(spalte[gruppe] for spalte in spalten))]
+            # Position innerhalb des Fahrzeugs, bleibt gültig solange sich seine Einträge nicht ändern
+            nr = np.searchsorted(positionen[kennzeichen], tabelle["zeile"].to_numpy()[gruppe])
+            fz["nr"] = nr.tolist()
+            fz["offen"] = int((~tabelle["quittiert"].to_numpy()[gruppe]).sum())
+
+    for kennzeichen, fz in fahrzeuge.items():
+        fz["zeilen"] = [positionen[kennzeichen][n] for n in fz["nr"]]
+
+    neu = {
+        "version": _VERSION,
+        "historie_stempel": list(stempel) if stempel is not None else None,
+        "regeln": regel_signatur,
+        "reihenfolge": list(positionen),
+        "offen": sum(fz["offen"] for fz in fahrzeuge.values()),
+        "preisgruppen": preisgruppen,
+        "fahrzeuge": fahrzeuge
+    }
+    if neu != stand:
+        _speichere_stand(neu)
+    return _als_tabelle(neu, regeln)
+
+def anzahl_offene_auffaelligkeiten():
+    """Nicht quittierte Auffälligkeiten laut gespeichertem Stand (ohne die Tabelle aufzubauen)"""
+    return _lade_stand()["offen"]
+
+def _metriken_auffaelligkeiten():
+    """Gespeicherte Auffälligkeiten je Schwere und Status für /metrics (metriken.py)"""
+    schwere, quittiert = _SPALTEN.index("schwere"), _SPALTEN.index("quittiert")
+    stand = _lade_stand()
+    anzahl = Counter((a[schwere], "quittiert" if a[quittiert] else "offen")
+                     for fz in stand["fahrzeuge"].values() for a in fz["auffaelligkeiten"])
+    return [("dkv_auffaelligkeiten", {"schwere": s, "status": status}, n) for (s, status), n in anzahl.items()]
+
+registriere_sammler(_metriken_auffaelligkeiten)
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Benutzerverwaltung und Passwort-Hashing
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+
+from .konfiguration import BENUTZER_DATEI, ROLLEN
+from .speicher import _schreibe_json_atomar
+
+# --- Passwort-Hashing ---
+# Iterationen für neue Hashes (überschreibbar via Umgebungsvariable). Jeder Hash speichert
+# seine Iterationszahl selbst und wird beim nächsten erfolgreichen Login angehoben.
+PASSWORT_ITERATIONEN = int(os.environ.get("DKV_PASSWORT_ITERATIONEN", "100000"))
+PASSWORT_ITERATIONEN_ALT = 100000  # Hashes im alten Format "salt$hash"
+
+def _pbkdf2(passwort, salt, iterationen):
+    """PBKDF2 mit SHA-256 (hashlib gibt währenddessen den GIL frei, Logins mehrerer Sitzungen
+    laufen also parallel in deren Script-Threads)"""
+    return hashlib.pbkdf2_hmac(
+        'sha256',
+        passwort.encode('utf-8'),
+        salt.encode('utf-8'),
+        iterationen
+    ).hex()
+
+def _zerlege_hash(gespeicherter_hash):
+    """Gibt (iterationen, salt, hash) zurück oder None bei unbekanntem Format"""
+    teile = gespeicherter_hash.split('$')
+    if len(teile) == 4 and teile[0] == "pbkdf2_sha256" and teile[1].isdigit():
+        return int(teile[1]), teile[2], teile[3]
+    if len(teile) == 2:
+        return PASSWORT_ITERATIONEN_ALT, teile[0], teile[1]
+    return None
+
+def hash_passwort(passwort, salt=None, iterationen=None):
+    """Erstellt einen sicheren Hash des Passworts mit PBKDF2 (Format: pbkdf2_sha256$iterationen$salt$hash)"""
+    if salt is None:
+        salt = secrets.token_hex(32)
+    if iterationen is None:
+        iterationen = PASSWORT_ITERATIONEN
+    pw_hash = _pbkdf2(passwort, salt, iterationen)
+    return f"pbkdf2_sha256${iterationen}${salt}${pw_hash}"
+
+def pruefe_passwort(passwort, gespeicherter_hash):
+    """Prüft ob das Passwort mit dem gespeicherten Hash übereinstimmt (Vergleich in konstanter Zeit)"""
+    teile = _zerlege_hash(gespeicherter_hash)
+    if teile is None:
+        return False
+    iterationen, salt, soll_hash = teile
+    ist_hash = _pbkdf2(passwort, salt, iterationen)
+    return hmac.compare_digest(ist_hash, soll_hash)
+
+def braucht_rehash(gespeicherter_hash):
+    """Prüft ob der Hash mit weniger als der aktuell konfigurierten Iterationszahl erstellt wurde
+    (eine gesenkte Iterationszahl schwächt vorhandene Hashes nicht ab)"""
+    teile = _zerlege_hash(gespeicherter_hash)
+    return teile is not None and teile[0] < PASSWORT_ITERATIONEN
+
+
+# --- Benutzerverwaltung ---
+class BenutzerVerzeichnis:
+    """Prozessweiter Cache für benutzer.json, indiziert nach kleingeschriebenem Benutzernamen.
+
+    Die Datei wird nur neu eingelesen, wenn sich mtime/Größe geändert haben (z.B. nach einer
+    Backup-Wiederherstellung). Eigene Schreibvorgänge aktualisieren den Cache direkt.
+    """
+
+    def __init__(self, pfad):
+        self.pfad = pfad
+        self._lock = threading.RLock()
+        self._daten = None
+        self._index = {}
+        self._stempel = None
+
+    def _dateistempel(self):
+        try:
+            info = os.stat(self.pfad)
+        except FileNotFoundError:
+            return None
+        return (info.st_mtime_ns, info.st_size)
+
+    def _setze(self, daten, stempel):
+        benutzer = [dict(b) for b in daten.get("benutzer", [])]
+        self._daten = {**daten, "benutzer": benutzer}
+        self._index = {b["benutzername"].lower(): b for b in benutzer}
+        self._stempel = stempel
+
+    def _synchronisiere(self):
+        """Cache bei Bedarf aus der Datei laden (Aufrufer hält den Lock)"""
+        stempel = self._dateistempel()
+        if self._daten is not None and stempel == self._stempel:
+            return
+        if stempel is None:
+            # Standard-Admin erstellen beim ersten Start
+            self._schreibe({
+                "benutzer": [
+                    {
+                        "benutzername": "admin",
+                        "passwort_hash": hash_passwort("admin"),
+                        "rolle": "admin",
+                        "name": "Administrator",
+                        "email": "",
+                        "aktiv": True,
+                        "muss_passwort_aendern": True  # Erzwingt Passwortänderung beim ersten Login
+                    }
+                ]
+            })
+            return
+        with open(self.pfad, "r", encoding="utf-8") as f:
+            self._setze(json.load(f), stempel)
+
+    def _schreibe(self, daten):
+        _schreibe_json_atomar(self.pfad, daten)
+        self._setze(daten, self._dateistempel())
+
+    def daten(self):
+        """Kopie aller Benutzerdaten (Änderungen daran wirken sich nicht auf den Cache aus)"""
+        with self._lock:
+            self._synchronisiere()
+            return {**self._daten, "benutzer": [dict(b) for b in self._daten["benutzer"]]}
+
+    def speichere(self, daten):
+        with self._lock:
+            self._schreibe(daten)
+
+    def finde(self, benutzername):
+        with self._lock:
+            self._synchronisiere()
+            benutzer = self._index.get(benutzername.lower())
+            return dict(benutzer) if benutzer else None
+
+    def aktualisiere(self, benutzername, updates):
+        with self._lock:
+            self._synchronisiere()
+            schluessel = benutzername.lower()
+            if schluessel not in self._index:
+                return False
+            benutzer = [{**b, **updates} if b["benutzername"].lower() == schluessel else b
+                        for b in self._daten["benutzer"]]
+            self._schreibe({**self._daten, "benutzer": benutzer})
+            return True
+
+    def fuege_hinzu(self, neuer_benutzer):
+        with self._lock:
+            self._synchronisiere()
+            if neuer_benutzer["benutzername"].lower() in self._index:
+                return False
+            self._schreibe({**self._daten, "benutzer": self._daten["benutzer"] + [neuer_benutzer]})
+            return True
+
+    def entferne(self, benutzername):
+        """Entfernt einen Benutzer; der letzte aktive Admin bleibt erhalten"""
+        with self._lock:
+            self._synchronisiere()
+            schluessel = benutzername.lower()
+            admins = [b for b in self._daten["benutzer"] if b["rolle"] == "admin" and b["aktiv"]]
+            benutzer = self._index.get(schluessel)
+            if benutzer and benutzer["rolle"] == "admin" and len(admins) <= 1:
+                return False
+            self._schreibe({**self._daten, "benutzer": [b for b in self._daten["benutzer"]
+                                                         if b["benutzername"].lower() != schluessel]})
+            return True
+
+# Ein Benutzerverzeichnis pro Prozess (überlebt Reruns und wird von allen Sessions geteilt)
+_VERZEICHNIS = BenutzerVerzeichnis(BENUTZER_DATEI)
+
+def lade_benutzer():
+    """Benutzer laden, erstellt Standard-Admin falls nicht vorhanden"""
+    return _VERZEICHNIS.daten()
+
+def speichere_benutzer(benutzer_daten):
+    """Benutzer atomar in JSON speichern"""
+    _VERZEICHNIS.speichere(benutzer_daten)
+
+def finde_benutzer(benutzername):
+    """Findet einen Benutzer anhand des Benutzernamens"""
+    return _VERZEICHNIS.finde(benutzername)
+
+def authentifiziere_benutzer(benutzername, passwort):
+    """Prüft Login-Daten und gibt Benutzer-Objekt oder None zurück"""
+    benutzer = finde_benutzer(benutzername)
+    if benutzer and benutzer.get("aktiv", True):
+        if pruefe_passwort(passwort, benutzer.get("passwort_hash", "")):
+            # Hash transparent auf die aktuelle Iterationszahl anheben
+            if braucht_rehash(benutzer.get("passwort_hash", "")):
+                neuer_hash = hash_passwort(passwort)
+                aktualisiere_benutzer(benutzer["benutzername"], {"passwort_hash": neuer_hash})
+                benutzer["passwort_hash"] = neuer_hash
+            return benutzer
+    return None
+
+def hat_recht(rolle, recht):
+    """Prüft ob eine Rolle ein bestimmtes Recht hat"""
+    if rolle not in ROLLEN:
+        return False
+    return recht in ROLLEN[rolle].get("rechte", [])
+
+def aktualisiere_benutzer(benutzername, updates):
+    """Aktualisiert einen Benutzer mit den angegebenen Feldern"""
+    return _VERZEICHNIS.aktualisiere(benutzername, updates)
+
+def erstelle_benutzer(benutzername, passwort, rolle, name="", email=""):
+    """Erstellt einen neuen Benutzer"""
+    # Prüfen ob Benutzername bereits existiert (vor dem teuren Hashing)
+    if finde_benutzer(benutzername):
+        return False, "Benutzername bereits vergeben"
+
+    neuer_benutzer = {
+        "benutzername": benutzername,
+        "passwort_hash": hash_passwort(passwort),
+        "rolle": rolle,
+        "name": name,
+        "email": email,
+        "aktiv": True,
+        "muss_passwort_aendern": True
+    }
+    if not _VERZEICHNIS.fuege_hinzu(neuer_benutzer):
+        return False, "Benutzername bereits vergeben"
+    return True, "Benutzer erstellt"
+
+def loesche_benutzer(benutzername):
+    """Löscht einen Benutzer (außer den letzten Admin)"""
+    if not _VERZEICHNIS.entferne(benutzername):
+        return False, "Der letzte Administrator kann nicht gelöscht werden"
+    return True, "Benutzer gelöscht"
+
+def generiere_temp_passwort(laenge=10):
+    """Generiert ein temporäres Passwort"""
+    return secrets.token_urlsafe(laenge)[:laenge]
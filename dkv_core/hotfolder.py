@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Hotfolder: neue DKV-Dateien im Eingangsordner automatisch importieren
+
+Der Eingangsordner (DKV_DATA_DIR/eingang) wird per os.scandir abgefragt. Eine Datei
+gilt erst als vollständig, wenn Größe und mtime für die Ruhezeit unverändert bleiben
+(halb kopierte Dateien werden so nicht angefasst). Fertige Dateien werden in einem
+Prozess-Pool geparst, mit denselben Duplikat-Regeln wie beim Upload übernommen und
+anschließend nach eingang/archiv (bzw. eingang/fehler) verschoben.
+
+Start als eigener Prozess:  python -m dkv_core.hotfolder [--intervall 5] [--ruhezeit 10]
+Start innerhalb der App:    Umgebungsvariable DKV_HOTFOLDER=1
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from .importer import (
+    bekannte_inhalte,
+    berechne_datei_hash,
+    filtere_kraftstoff,
+    parse_datei_pfad,
+    uebernehme_in_historie,
+)
+from .konfiguration import ARCHIV_DIR, EINGANG_DIR, FEHLER_DIR
+from .speicher import historie_sperre, lade_historie, speichere_historie
+
+logger = logging.getLogger(__name__)
+
+DATEIENDUNGEN = (".csv", ".pdf")
+
+
+class HotfolderDienst:
+    """Überwacht den Eingangsordner und importiert neue DKV-Dateien automatisch"""
+
+    def __init__(self, eingang=EINGANG_DIR, archiv=ARCHIV_DIR, fehler=FEHLER_DIR,
+                 intervall=5.0, ruhezeit=10.0, worker=None):
+        self.eingang = eingang
+        self.archiv = archiv
+        self.fehler = fehler
+        self.intervall = intervall
+        self.ruhezeit = ruhezeit
+        self.worker = worker
+        self._gesehen = {}  # pfad -> ((groesse, mtime_ns), unveraendert_seit)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def fertige_dateien(self, jetzt=None):
+        """Dateien, deren Größe/mtime seit mindestens `ruhezeit` Sekunden unverändert sind"""
+        jetzt = time.time() if jetzt is None else jetzt
+        aktuell = {}
+        for eintrag in os.scandir(self.eingang):
+            if (not eintrag.is_file() or eintrag.name.startswith(".")
+                    or not eintrag.name.lower().endswith(DATEIENDUNGEN)):
+                continue
+            info = eintrag.stat()
+            stempel = (info.st_size, info.st_mtime_ns)
+            vorher = self._gesehen.get(eintrag.path)
+            if vorher is None:
+                seit = min(info.st_mtime, jetzt)  # schon länger liegende Dateien sofort verarbeiten
+            elif vorher[0] == stempel:
+                seit = vorher[1]
+            else:
+                seit = jetzt
+            aktuell[eintrag.path] = (stempel, seit)
+        self._gesehen = aktuell
+        return sorted(p for p, (_, seit) in aktuell.items() if jetzt - seit >= self.ruhezeit)
+
+    def _verschiebe(self, pfad, ziel_dir):
+        os.makedirs(ziel_dir, exist_ok=True)
+        ziel = os.path.join(ziel_dir, f"{datetime.now().strftime('%Y-%m-%d_%H%M%S')}_{os.path.basename(pfad)}")
+        shutil.move(pfad, ziel)
+        self._gesehen.pop(pfad, None)
+
+    def verarbeite(self, pfade, pool):
+        """Dateien parallel parsen, in die Historie übernehmen und archivieren"""
+        # Bekannte Inhalte (SHA-256) gar nicht erst parsen
+        bekannt = bekannte_inhalte(lade_historie())
+        hashes = {}
+        for pfad in pfade:
+            inhalts_hash = berechne_datei_hash(pfad)
+            if inhalts_hash in bekannt or inhalts_hash in hashes.values():
+                logger.info("%s: Inhalt bereits importiert, wird übersprungen", os.path.basename(pfad))
+                self._verschiebe(pfad, self.archiv)
+            else:
+                hashes[pfad] = inhalts_hash
+        geparst = list(pool.map(parse_datei_pfad, list(hashes)))
+
+        with historie_sperre():
+            historie = lade_historie()
+            bekannt = bekannte_inhalte(historie)
+            dateien = []
+            for pfad, df_clean, fehler, dauer in geparst:
+                dateiname = os.path.basename(pfad)
+                if hashes[pfad] in bekannt:
+                    logger.info("%s: Inhalt bereits importiert, wird übersprungen", dateiname)
+                elif fehler:
+                    logger.warning("%s: %s", dateiname, fehler)
+                else:
+                    df_fuel = filtere_kraftstoff(df_clean)
+                    logger.info("%s: %d Zeilen, %d Kraftstoff, geparst in %.2fs",
+                                dateiname, len(df_clean), len(df_fuel), dauer)
+                    dateien.append((dateiname, df_fuel, hashes[pfad]))
+            ergebnisse = uebernehme_in_historie(historie, dateien)
+            if dateien:
+                speichere_historie(historie)
+
+        for e in ergebnisse:
+            logger.info("%s: %d neue Tankvorgänge, %d Duplikate", e["dateiname"], e["neu"], e["duplikate"])
+        for pfad, _, fehler, _ in geparst:
+            ist_fehler = fehler and hashes[pfad] not in bekannt
+            self._verschiebe(pfad, self.fehler if ist_fehler else self.archiv)
+        return ergebnisse
+
+    def durchlauf(self, pool):
+        """Einmal nach fertigen Dateien suchen und diese verarbeiten"""
+        pfade = self.fertige_dateien()
+        if pfade:
+            return self.verarbeite(pfade, pool)
+        return []
+
+    def laufe(self, einmal=False):
+        """Überwachungsschleife (blockiert bis stoppe() aufgerufen wird)"""
+        os.makedirs(self.eingang, exist_ok=True)
+        # "spawn": kein fork() aus dem mehrfädigen Streamlit-Prozess heraus
+        with ProcessPoolExecutor(max_workers=self.worker,
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            logger.info("Hotfolder aktiv: %s", self.eingang)
+            while not self._stop.is_set():
+                try:
+                    self.durchlauf(pool)
+                except Exception:
+                    logger.exception("Fehler im Hotfolder-Durchlauf")
+                if einmal:
+                    break
+                self._stop.wait(self.intervall)
+
+    def starte_im_hintergrund(self):
+        """Überwachung in einem Daemon-Thread starten"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.laufe, name="dkv-hotfolder", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stoppe(self):
+        self._stop.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Eingangsordner überwachen und neue DKV-Dateien importieren")
+    parser.add_argument("--eingang", default=EINGANG_DIR, help=f"Eingangsordner (Standard: {EINGANG_DIR})")
+    parser.add_argument("--intervall", type=float, default=5.0, help="Abfrageintervall in Sekunden")
+    parser.add_argument("--ruhezeit", type=float, default=10.0,
+                        help="Sekunden ohne Änderung, bevor eine Datei als vollständig gilt")
+    parser.add_argument("--worker", type=int, default=None, help="Anzahl Parser-Prozesse")
+    parser.add_argument("--einmal", action="store_true", help="Nur einen Durchlauf ausführen")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    eingang = os.path.abspath(args.eingang)
+    dienst = HotfolderDienst(eingang=eingang,
+                             archiv=os.path.join(eingang, "archiv"),
+                             fehler=os.path.join(eingang, "fehler"),
+                             intervall=args.intervall, ruhezeit=args.ruhezeit, worker=args.worker)
+    try:
+        dienst.laufe(einmal=args.einmal)
+    except KeyboardInterrupt:
+        dienst.stoppe()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
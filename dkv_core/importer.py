@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Import von DKV-Dateien in die Historie (gemeinsam genutzt von Oberfläche und CLI)
+"""
+
+import hashlib
+import io
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .metriken import zaehle
+from .parser import parse_dkv_csv, parse_dkv_pdf
+from .profil import profiliert
+
+# Nur Kraftstoff übernehmen (kein AdBlue etc.)
+KRAFTSTOFF_MUSTER = "DIESEL|SUPER|BENZIN|EURO"
+
+# Werte, die bei gleichem Schlüssel (Kennzeichen, Datum, Zeit) übereinstimmen müssen;
+# sonst gilt die Zeile in der Import-Vorschau als Konflikt
+VERGLEICHS_SPALTEN = {"km_Stand": "km_stand", "Menge_Liter": "menge_liter", "Betrag_EUR": "betrag_eur"}
+
+# Spalten, die eine Tankzeile für den Zeilen-Fingerprint eindeutig beschreiben
+FINGERPRINT_SPALTEN = ["Kennzeichen", "Datum", "Zeit", "km_Stand", "Menge_Liter", "Betrag_EUR"]
+
+
+@profiliert("import")
+def parse_datei(quelle, dateiname, fortschritt=None):
+    """
+    DKV-Datei anhand der Endung als PDF oder CSV parsen
+
+    quelle: Bytes, Pfad oder Binär-Dateihandle; Pfade und Handles werden gestreamt statt
+    vollständig in den Speicher gelesen.
+    fortschritt: optionaler Callback fortschritt(seite, seiten_gesamt); CSV zählt als eine Seite
+    """
+    if dateiname.lower().endswith(".pdf"):
+        df_clean = parse_dkv_pdf(quelle, fortschritt)
+    else:
+        if fortschritt:
+            fortschritt(1, 1)
+        if isinstance(quelle, bytes):
+            df_clean = parse_dkv_csv(quelle.decode("utf-8"))
+        elif isinstance(quelle, (str, os.PathLike)):
+            with open(quelle, "r", encoding="utf-8") as f:
+                df_clean = parse_dkv_csv(f)
+        else:
+            text = io.TextIOWrapper(quelle, encoding="utf-8")
+            try:
+                df_clean = parse_dkv_csv(text)
+            finally:
+                text.detach()  # Handle des Aufrufers nicht schließen
+    if not df_clean.empty:
+        df_clean["Quelldatei"] = dateiname
+    return df_clean
+
+def berechne_inhalts_hash(inhalt):
+    """SHA-256 über den Dateiinhalt (Bytes)"""
+    return hashlib.sha256(inhalt).hexdigest()
+
+def berechne_datei_hash(quelle, blockgroesse=1024 * 1024):
+    """
+    SHA-256 einer Datei, blockweise gelesen (ohne die ganze Datei in den Speicher zu laden)
+
+    quelle: Pfad oder Binär-Dateihandle (wird danach wieder an den Anfang gesetzt)
+    """
+    h = hashlib.sha256()
+    if isinstance(quelle, (str, os.PathLike)):
+        with open(quelle, "rb") as f:
+            for block in iter(lambda: f.read(blockgroesse), b""):
+                h.update(block)
+    else:
+        quelle.seek(0)
+        for block in iter(lambda: quelle.read(blockgroesse), b""):
+            h.update(block)
+        quelle.seek(0)
+    return h.hexdigest()
+
+def berechne_zeilen_fingerprint(df_fuel):
+    """
+    Reihenfolgeunabhängiger Fingerprint der Kraftstoffzeilen einer Datei.
+
+    Erkennt inhaltsgleiche Dateien auch dann, wenn sich die Bytes unterscheiden
+    (z. B. erneuter Export mit anderem Zeilenumbruch oder anderer Sortierung).
+    """
+    if df_fuel.empty:
+        return ""
+    zeilen_hashes = pd.util.hash_pandas_object(df_fuel[FINGERPRINT_SPALTEN], index=False).to_numpy()
+    return hashlib.sha256(np.sort(zeilen_hashes).tobytes()).hexdigest()
+
+def bekannte_inhalte(historie):
+    """Import-Einträge nach Inhalts-Hash (ältere Einträge ohne Hash werden ignoriert)"""
+    return {imp["sha256"]: imp for imp in historie.get("importe", []) if imp.get("sha256")}
+
+def parse_datei_pfad(pfad):
+    """
+    DKV-Datei von der Platte lesen und parsen (als Worker-Job für Prozess-Pools).
+
+    Returns:
+        (pfad, df_clean, fehler, dauer_sekunden); df_clean ist None bei Fehlern
+    """
+    start = time.perf_counter()
+    try:
+        df_clean = parse_datei(pfad, os.path.basename(pfad))
+        fehler = None if not df_clean.empty else "Keine Tankdaten gefunden"
+    except Exception as e:
+        df_clean, fehler = None, str(e)
+    return pfad, df_clean, fehler, time.perf_counter() - start
+
+def filtere_kraftstoff(df_clean):
+    """Nur Kraftstoff-Zeilen eines geparsten DataFrames zurückgeben"""
+    kraftstoff_filter = df_clean["Warenart"].str.contains(KRAFTSTOFF_MUSTER, case=False, na=False)
+    return df_clean[kraftstoff_filter].copy()
+
+def erstelle_eintraege(df_fuel, dateiname):
+    """Geparste Kraftstoffzeilen in Historien-Einträge umwandeln"""
+    datum = df_fuel["Datum"].dt.strftime("%Y-%m-%d")
+    datum = datum.astype(object).where(datum.notna(), None)
+    eintraege = []
+    for row, datum_str in zip(df_fuel.to_dict("records"), datum):
+        eintraege.append({
+            "kennzeichen": row["Kennzeichen"],
+            "datum": datum_str,
+            "zeit": row["Zeit"],
+            "km_stand": row["km_Stand"],
+            "menge_liter": row["Menge_Liter"],
+            "verbrauch": None,  # Wird beim Speichern automatisch berechnet
+            "betrag_eur": row["Betrag_EUR"],
+            "tankstelle": row["Tankstelle"],
+            "warenart": row["Warenart"],
+            "quelldatei": dateiname
+        })
+    return eintraege
+
+def vergleiche_mit_historie(historie, df_fuel):
+    """
+    Kraftstoffzeilen eines Stapels per Hash-Join mit der Historie abgleichen (ohne zu speichern).
+
+    Ein einziger pd.merge auf (Kennzeichen, Datum, Zeit) ordnet jede Zeile ein:
+    "neu", "duplikat" (gleicher Schlüssel, gleiche Werte oder doppelt im Stapel) oder
+    "konflikt" (gleicher Schlüssel, abweichender km-Stand, Liter oder Betrag). Konflikte
+    werden bei der Übernahme wie Duplikate übersprungen, der vorhandene Eintrag bleibt.
+
+    Returns:
+        Kopie von df_fuel mit Spalte "Importstatus" und den Historien-Werten
+        (Spalten "<Spalte>_historie") für Konfliktzeilen
+    """
+    hist_spalten = ["kennzeichen", "datum", "zeit"] + list(VERGLEICHS_SPALTEN.values())
+    df_hist = pd.DataFrame(historie["tankvorgaenge"], columns=hist_spalten)
+    df_hist = df_hist.rename(columns={"kennzeichen": "_kz", "datum": "_datum", "zeit": "_zeit"})
+    df_hist = df_hist.rename(columns={v: f"{k}_historie" for k, v in VERGLEICHS_SPALTEN.items()})
+    for spalte in ("_kz", "_datum", "_zeit"):
+        df_hist[spalte] = df_hist[spalte].fillna("").astype(str)
+    df_hist = df_hist.drop_duplicates(["_kz", "_datum", "_zeit"])
+
+    stapel = df_fuel.reset_index(drop=True).assign(
+        _kz=df_fuel["Kennzeichen"].fillna("").astype(str).to_numpy(),
+        _datum=df_fuel["Datum"].dt.strftime("%Y-%m-%d").fillna("").to_numpy(),
+        _zeit=df_fuel["Zeit"].fillna("").astype(str).to_numpy(),
+    )
+    df = stapel.merge(df_hist, on=["_kz", "_datum", "_zeit"], how="left", indicator=True, validate="many_to_one")
+
+    gleich = pd.Series(True, index=df.index)
+    for spalte in VERGLEICHS_SPALTEN:
+        neu = pd.to_numeric(df[spalte], errors="coerce").to_numpy(dtype=float)
+        alt = pd.to_numeric(df[f"{spalte}_historie"], errors="coerce").to_numpy(dtype=float)
+        gleich &= np.isclose(neu, alt, atol=0.005, equal_nan=True)
+
+    vorhanden = (df["_merge"] == "both").to_numpy()
+    status = np.where(vorhanden, np.where(gleich, "duplikat", "konflikt"), "neu")
+    # Gleicher Schlüssel mehrfach im Stapel: nur das erste Vorkommen wird übernommen
+    doppelt_im_stapel = df.duplicated(["_kz", "_datum", "_zeit"]).to_numpy()
+    status = np.where((status == "neu") & doppelt_im_stapel, "duplikat", status)
+
+    df["Importstatus"] = status
+    return df.drop(columns=["_kz", "_datum", "_zeit", "_merge"])
+
+def uebernehme_in_historie(historie, dateien):
+    """
+    Kraftstoffdaten mehrerer Dateien in die Historie übernehmen (ohne zu speichern).
+
+    Duplikate (gleiches Kennzeichen, Datum und Zeit) werden in einem Durchlauf über
+    einen Schlüssel-Index erkannt, auch innerhalb des Stapels; das ist dieselbe Regel wie
+    in der Vorschau (vergleiche_mit_historie), deren "neu"-Zeilen also genau übernommen werden.
+    Pro Datei wird ein Eintrag mit Inhalts-Hash und Fingerprint in historie["importe"]
+    angelegt, auch wenn die Datei keine Kraftstoffzeilen enthält.
+
+    Args:
+        historie: Historie-Dict (wird verändert)
+        dateien: Liste von (dateiname, df_fuel, inhalts_hash)
+
+    Returns:
+        Liste von {"dateiname", "neu", "duplikate"} pro Datei
+    """
+    bekannte = {(t["kennzeichen"], t["datum"], t["zeit"]) for t in historie["tankvorgaenge"]}
+    zeitstempel = datetime.now().strftime("%Y-%m-%d %H:%M")
+    ergebnisse = []
+
+    for dateiname, df_fuel, inhalts_hash in dateien:
+        neue_vorgaenge = 0
+        duplikate = 0
+        for eintrag in erstelle_eintraege(df_fuel, dateiname):
+            schluessel = (eintrag["kennzeichen"], eintrag["datum"], eintrag["zeit"])
+            if schluessel in bekannte:
+                duplikate += 1
+                continue
+            bekannte.add(schluessel)
+            historie["tankvorgaenge"].append(eintrag)
+            neue_vorgaenge += 1
+
+        # Import-Eintrag für diese Datei
+        historie["importe"].append({
+            "datum": zeitstempel,
+            "dateiname": dateiname,
+            "anzahl_vorgaenge": neue_vorgaenge,
+            "sha256": inhalts_hash,
+            "fingerprint": berechne_zeilen_fingerprint(df_fuel),
+        })
+        ergebnisse.append({"dateiname": dateiname, "neu": neue_vorgaenge, "duplikate": duplikate})
+
+    zaehle("dkv_importierte_zeilen_total", sum(e["neu"] for e in ergebnisse))
+    zaehle("dkv_duplikate_uebersprungen_total", sum(e["duplikate"] for e in ergebnisse))
+    return ergebnisse
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Import-Aufträge: hochgeladene DKV-Dateien im Hintergrund parsen
+
+Ein Auftrag ist ein Verzeichnis unter IMPORT_JOBS_DIR/<id> mit
+  job.json     Status und Fortschritt pro Datei (Seite x von y)
+  dateien/     die hochgeladenen Dateien
+  ergebnis/    geparste DataFrames (Pickle) pro fertiger Datei
+  abbrechen    Marker-Datei, vom Worker vor jeder Seite geprüft
+
+Der Worker-Thread (ImportJobDienst) arbeitet die Aufträge nacheinander ab. Da alles
+auf der Platte liegt, gehen Aufträge bei einem Rerun der Oberfläche nicht verloren und
+werden nach einem Neustart fortgesetzt; bereits fertige Dateien werden nicht erneut
+geparst. In die Historie übernommen wird erst nach Bestätigung in der Import-Vorschau.
+Aufträge, die IMPORT_JOBS_TAGE lang unverändert liegen, räumt der Worker weg.
+
+Status eines Auftrags: "wartend", "laeuft", "fertig", "abgebrochen"
+Status einer Datei:    "wartend", "laeuft", "fertig", "fehler"
+"""
+
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+from .importer import parse_datei
+from .konfiguration import IMPORT_JOBS_DIR, IMPORT_JOBS_TAGE
+from .speicher import _schreibe_json_atomar
+
+logger = logging.getLogger(__name__)
+
+AUFRAEUMEN_INTERVALL = 3600  # Sekunden ohne neuen Auftrag, nach denen der Worker alte Aufträge entfernt
+
+
+class ImportAbgebrochen(Exception):
+    """Wird im Fortschritts-Callback ausgelöst, wenn der Auftrag abgebrochen wurde"""
+
+
+def _job_dir(job_id):
+    return os.path.join(IMPORT_JOBS_DIR, job_id)
+
+def _speichere_job(job):
+    _schreibe_json_atomar(os.path.join(_job_dir(job["id"]), "job.json"), job)
+
+def erstelle_job(dateien, benutzer=""):
+    """
+    Neuen Import-Auftrag anlegen.
+
+    Args:
+        dateien: Liste von (dateiname, quelle, inhalts_hash); quelle ist Bytes oder ein
+            Binär-Dateihandle (z. B. Streamlit-Upload), das blockweise in den Auftrag kopiert wird
+        benutzer: Benutzername (Anzeige)
+
+    Returns:
+        job_id
+    """
+    job_id = datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+    datei_dir = os.path.join(_job_dir(job_id), "dateien")
+    os.makedirs(datei_dir)
+    os.makedirs(os.path.join(_job_dir(job_id), "ergebnis"))
+
+    eintraege = []
+    for nr, (dateiname, quelle, inhalts_hash) in enumerate(dateien):
+        ablage = f"{nr:03d}_{os.path.basename(dateiname)}"
+        with open(os.path.join(datei_dir, ablage), "wb") as f:
+            if isinstance(quelle, bytes):
+                f.write(quelle)
+            else:
+                quelle.seek(0)
+                shutil.copyfileobj(quelle, f)
+        eintraege.append({
+            "name": dateiname,
+            "ablage": ablage,
+            "sha256": inhalts_hash,
+            "status": "wartend",
+            "seite": 0,
+            "seiten": 0,
+            "zeilen": 0,
+            "fehler": None
+        })
+
+    _speichere_job({
+        "id": job_id,
+        "erstellt": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "benutzer": benutzer,
+        "status": "wartend",
+        "dateien": eintraege
+    })
+    return job_id
+
+def lade_job(job_id):
+    """job.json eines Auftrags laden (None, wenn der Auftrag nicht mehr existiert)"""
+    try:
+        with open(os.path.join(_job_dir(job_id), "job.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def offene_jobs(benutzer=None):
+    """Noch nicht übernommene oder verworfene Aufträge (nur die von `benutzer`, None: alle), älteste zuerst"""
+    if not os.path.isdir(IMPORT_JOBS_DIR):
+        return []
+    jobs = [lade_job(e.name) for e in os.scandir(IMPORT_JOBS_DIR) if e.is_dir()]
+    jobs = [j for j in jobs if j and (benutzer is None or j.get("benutzer") == benutzer)]
+    return sorted(jobs, key=lambda j: j["erstellt"])
+
+def offene_hashes(benutzer=None):
+    """Inhalts-Hashes der Dateien in aktiven (nicht abgebrochenen) Aufträgen von `benutzer` (None: alle)"""
+    return {d["sha256"] for job in offene_jobs(benutzer) if job["status"] != "abgebrochen" for d in job["dateien"]}
+
+def brich_job_ab(job_id):
+    """Abbruch anfordern; der Worker stoppt vor der nächsten Seite"""
+    with open(os.path.join(_job_dir(job_id), "abbrechen"), "w"):
+        pass
+
+def loesche_job(job_id):
+    """Auftrag samt hochgeladener Dateien und Zwischenergebnisse entfernen"""
+    shutil.rmtree(_job_dir(job_id), ignore_errors=True)
+
+def raeume_alte_jobs(tage=IMPORT_JOBS_TAGE):
+    """Aufträge entfernen, deren job.json seit `tage` Tagen unverändert ist (laufende nicht); gibt die Anzahl zurück"""
+    if tage <= 0 or not os.path.isdir(IMPORT_JOBS_DIR):
+        return 0
+    grenze = time.time() - tage * 86400
+    entfernt = 0
+    for eintrag in os.scandir(IMPORT_JOBS_DIR):
+        if not eintrag.is_dir():
+            continue
+        try:
+            geaendert = os.path.getmtime(os.path.join(eintrag.path, "job.json"))
+        except OSError:
+            geaendert = eintrag.stat().st_mtime  # unvollständig angelegt
+        job = lade_job(eintrag.name)
+        if geaendert < grenze and not (job and job["status"] == "laeuft"):
+            loesche_job(eintrag.name)
+            entfernt += 1
+    if entfernt:
+        logger.info("%d alte Import-Aufträge entfernt", entfernt)
+    return entfernt
+
+def lade_job_ergebnisse(job):
+    """
+    Ergebnisse der fertig verarbeiteten Dateien eines Auftrags.
+
+    Returns:
+        Liste von (dateiname, inhalts_hash, df_clean, fehler); df_clean ist None bei Fehlern
+    """
+    ergebnisse = []
+    for nr, datei in enumerate(job["dateien"]):
+        if datei["status"] == "fertig":
+            df_clean = pd.read_pickle(os.path.join(_job_dir(job["id"]), "ergebnis", f"{nr:03d}.pkl"))
+            ergebnisse.append((datei["name"], datei["sha256"], df_clean, None))
+        elif datei["status"] == "fehler":
+            ergebnisse.append((datei["name"], datei["sha256"], None, datei["fehler"]))
+    return ergebnisse
+
+
+class ImportJobDienst:
+    """Worker-Thread, der Import-Aufträge nacheinander abarbeitet"""
+
+    def __init__(self):
+        self._warteschlange = queue.Queue()
+        self._thread = None
+
+    def einreihen(self, job_id):
+        """Auftrag zur Verarbeitung einreihen"""
+        self._warteschlange.put(job_id)
+
+    def setze_fort(self, job_id):
+        """Abgebrochenen Auftrag erneut einreihen (fertige Dateien bleiben erhalten)"""
+        marker = os.path.join(_job_dir(job_id), "abbrechen")
+        if os.path.exists(marker):
+            os.remove(marker)
+        job = lade_job(job_id)
+        if job:
+            job["status"] = "wartend"
+            _speichere_job(job)
+            self.einreihen(job_id)
+
+    def starte_im_hintergrund(self):
+        """Worker starten, alte Aufträge entfernen und unterbrochene (z. B. nach Neustart) wieder aufnehmen"""
+        raeume_alte_jobs()
+        for job in offene_jobs():
+            if job["status"] in ("wartend", "laeuft"):
+                self.einreihen(job["id"])
+        self._thread = threading.Thread(target=self._laufe, name="dkv-importjobs", daemon=True)
+        self._thread.start()
+
+    def _laufe(self):
+        while True:
+            try:
+                job_id = self._warteschlange.get(timeout=AUFRAEUMEN_INTERVALL)
+            except queue.Empty:
+                try:
+                    raeume_alte_jobs()
+                except OSError:
+                    logger.exception("Alte Import-Aufträge konnten nicht entfernt werden")
+                continue
+            try:
+                self.verarbeite(job_id)
+            except Exception:
+                logger.exception("Fehler im Import-Auftrag %s", job_id)
+
+    def verarbeite(self, job_id):
+        """Alle noch nicht fertigen Dateien eines Auftrags parsen"""
+        job = lade_job(job_id)
+        if not job or job["status"] not in ("wartend", "laeuft"):
+            return
+        marker = os.path.join(_job_dir(job_id), "abbrechen")
+        job["status"] = "laeuft"
+        _speichere_job(job)
+
+        for nr, datei in enumerate(job["dateien"]):
+            if datei["status"] in ("fertig", "fehler"):
+                continue
+
+            def fortschritt(seite, seiten):
+                if os.path.exists(marker):
+                    raise ImportAbgebrochen()
+                datei["seite"], datei["seiten"] = seite, seiten
+                _speichere_job(job)
+
+            datei["status"] = "laeuft"
+            try:
+                pfad = os.path.join(_job_dir(job_id), "dateien", datei["ablage"])
+                df_clean = parse_datei(pfad, datei["name"], fortschritt)
+                df_clean.to_pickle(os.path.join(_job_dir(job_id), "ergebnis", f"{nr:03d}.pkl"))
+                datei["status"] = "fertig"
+                datei["zeilen"] = len(df_clean)
+            except ImportAbgebrochen:
+                datei["status"] = "wartend"
+                job["status"] = "abgebrochen"
+                _speichere_job(job)
+                logger.info("Import-Auftrag %s abgebrochen", job_id)
+                return
+            except Exception as e:
+                datei["status"] = "fehler"
+                datei["fehler"] = str(e)
+            _speichere_job(job)
+
+        job["status"] = "fertig"
+        _speichere_job(job)
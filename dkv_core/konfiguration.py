@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Konfiguration: Datenverzeichnis, Dateipfade, Rollen und Standard-E-Mail-Vorlage
+"""
+
+import os
+
+# Datenverzeichnis (Standard: Projektverzeichnis, überschreibbar via Umgebungsvariable)
+DATA_DIR = os.environ.get("DKV_DATA_DIR", os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HISTORIE_DATEI = os.path.join(DATA_DIR, "historie.json")
+FAHRZEUGE_DATEI = os.path.join(DATA_DIR, "fahrzeuge.json")
+SMTP_CONFIG_DATEI = os.path.join(DATA_DIR, "smtp_config.json")
+EMAIL_VORLAGE_DATEI = os.path.join(DATA_DIR, "email_vorlage.json")
+BENUTZER_DATEI = os.path.join(DATA_DIR, "benutzer.json")
+PRUEFREGELN_DATEI = os.path.join(DATA_DIR, "pruefregeln.json")  # optionale eigene Prüfregeln
+AUFFAELLIGKEITEN_DATEI = os.path.join(DATA_DIR, "auffaelligkeiten.json")  # gespeichertes Prüfergebnis
+
+# Hotfolder: neue DKV-Dateien in EINGANG_DIR werden automatisch importiert (optional)
+EINGANG_DIR = os.path.join(DATA_DIR, "eingang")
+ARCHIV_DIR = os.path.join(EINGANG_DIR, "archiv")
+FEHLER_DIR = os.path.join(EINGANG_DIR, "fehler")
+HOTFOLDER_AKTIV = os.environ.get("DKV_HOTFOLDER", "0").lower() in ("1", "true", "ja")
+
+# Verbrauchsberechnung: "einzeln" (Liter der Tankung / km seit der vorherigen) oder
+# "intervall" (Liter aller Tankungen zwischen zwei gültigen km-Ständen / km dazwischen;
+# glättet Teilbetankungen und Tankungen ohne km-Angabe)
+VERBRAUCH_MODUS = os.environ.get("DKV_VERBRAUCH_MODUS", "einzeln").lower()
+
+# Import-Aufträge: hochgeladene Dateien und Zwischenergebnisse (überstehen Neustarts).
+# Nicht übernommene Aufträge werden nach IMPORT_JOBS_TAGE ohne Änderung entfernt (0 = nie)
+IMPORT_JOBS_DIR = os.path.join(DATA_DIR, "import_jobs")
+IMPORT_JOBS_TAGE = float(os.environ.get("DKV_IMPORT_JOBS_TAGE", "7"))
+
+# Laufzeitmessung: Anzahl der Reruns, deren Messwerte im Diagnose-Panel vorgehalten werden
+MESSUNG_LAEUFE = int(os.environ.get("DKV_MESSUNG_LAEUFE", "50"))
+
+# Metriken im Prometheus-Textformat (optional): Port 0 = aus
+METRIKEN_PORT = int(os.environ.get("DKV_METRIKEN_PORT", "0"))
+METRIKEN_ADRESSE = os.environ.get("DKV_METRIKEN_ADRESSE", "127.0.0.1")
+
+# Profilierung auf Abruf: Ergebnisse (pstats, gefaltete Stacks, Speichertabellen) zum Herunterladen
+PROFIL_DIR = os.path.join(DATA_DIR, "profile")
+
+# Rollen und ihre Rechte
+ROLLEN = {
+    "admin": {
+        "name": "Administrator",
+        "beschreibung": "Vollzugriff auf alle Funktionen",
+        "rechte": ["ansehen", "exportieren", "importieren", "bearbeiten", "email_senden",
+                   "fahrzeuge_verwalten", "historie_loeschen", "smtp_config", "vorlage_config", "benutzer_verwalten", "datensicherung"]
+    },
+    "manager": {
+        "name": "Manager",
+        "beschreibung": "Daten verwalten und E-Mails versenden",
+        "rechte": ["ansehen", "exportieren", "importieren", "bearbeiten", "email_senden", "fahrzeuge_verwalten"]
+    },
+    "viewer": {
+        "name": "Betrachter",
+        "beschreibung": "Nur Lesezugriff",
+        "rechte": ["ansehen", "exportieren"]
+    }
+}
+
+# Standard E-Mail-Vorlage
+DEFAULT_EMAIL_VORLAGE = {
+    "betreff": "DKV Checker: {anzahl_gesamt} Auffälligkeit(en) für {kennzeichen}",
+    "anrede": "Hallo {besitzer_name},",
+    "einleitung": "für Ihr Fahrzeug <strong>{kennzeichen}</strong> wurden folgende Auffälligkeiten festgestellt:",
+    "abschluss": "Bitte überprüfen und korrigieren Sie die betroffenen Tankvorgänge.",
+    "fusszeile": "Diese E-Mail wurde automatisch vom DKV Abrechnungs-Checker generiert."
+}
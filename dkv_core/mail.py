@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+E-Mail-Erstellung und -Versand (Auffälligkeiten, Passwort-Reset)
+"""
+
+import smtplib
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from i18n import t
+
+from .benutzer import aktualisiere_benutzer, finde_benutzer, generiere_temp_passwort, hash_passwort
+from .konfiguration import DEFAULT_EMAIL_VORLAGE
+from .messung import gemessen
+from .metriken import zaehle
+from .speicher import lade_email_vorlage, lade_smtp_config
+
+
+def ersetze_platzhalter(text, platzhalter):
+    """Ersetzt Platzhalter in einem Text"""
+    for key, value in platzhalter.items():
+        text = text.replace("{" + key + "}", str(value))
+    return text
+
+@gemessen("email.rendern")
+def erstelle_auffaelligkeiten_email(besitzer_name, kennzeichen, auffaelligkeiten, vorlage=None):
+    """Erstellt HTML-E-Mail mit Auffälligkeiten für ein Fahrzeug"""
+    if vorlage is None:
+        vorlage = lade_email_vorlage()
+
+    fehler = [a for a in auffaelligkeiten if a["schwere"] == "fehler"]
+    warnungen = [a for a in auffaelligkeiten if a["schwere"] == "warnung"]
+
+    # Platzhalter-Werte
+    platzhalter = {
+        "besitzer_name": besitzer_name,
+        "kennzeichen": kennzeichen,
+        "anzahl_gesamt": len(auffaelligkeiten),
+        "anzahl_fehler": len(fehler),
+        "anzahl_warnungen": len(warnungen),
+        "datum_heute": datetime.now().strftime("%d.%m.%Y")
+    }
+
+    # Vorlagen-Texte mit Platzhaltern ersetzen
+    anrede = ersetze_platzhalter(vorlage.get("anrede", DEFAULT_EMAIL_VORLAGE["anrede"]), platzhalter)
+    einleitung = ersetze_platzhalter(vorlage.get("einleitung", DEFAULT_EMAIL_VORLAGE["einleitung"]), platzhalter)
+    abschluss = ersetze_platzhalter(vorlage.get("abschluss", DEFAULT_EMAIL_VORLAGE["abschluss"]), platzhalter)
+    fusszeile = ersetze_platzhalter(vorlage.get("fusszeile", DEFAULT_EMAIL_VORLAGE["fusszeile"]), platzhalter)
+
+    # Auffälligkeiten-Tabelle erstellen
+    tabellen_zeilen = ""
+    for a in sorted(auffaelligkeiten, key=lambda x: (x["datum"], x["zeit"]), reverse=True):
+        row_class = "fehler-row" if a["schwere"] == "fehler" else "warnung-row"
+        tabellen_zeilen += f"""
+                    <tr class="{row_class}">
+                        <td>{a['datum']}</td>
+                        <td>{a['zeit']}</td>
+                        <td>{a['typ']}</td>
+                        <td>{a['details']}</td>
+                    </tr>"""
+
+    html = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <style>
+            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+            h1 {{ color: #2c3e50; }}
+            .summary {{ background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin: 20px 0; }}
+            .summary-item {{ display: inline-block; margin-right: 30px; }}
+            .fehler {{ color: #c0392b; font-weight: bold; }}
+            .warnung {{ color: #d35400; font-weight: bold; }}
+            table {{ width: 100%; border-collapse: collapse; margin: 20px 0; }}
+            th, td {{ padding: 10px; text-align: left; border-bottom: 1px solid #ddd; }}
+            th {{ background-color: #34495e; color: white; }}
+            tr.fehler-row {{ background-color: #ffcccc; }}
+            tr.warnung-row {{ background-color: #ffe6cc; }}
+            .footer {{ margin-top: 30px; font-size: 12px; color: #7f8c8d; }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>DKV Abrechnungs-Checker: Auffälligkeiten</h1>
+
+            <p>{anrede}</p>
+
+            <p>{einleitung}</p>
+
+            <div class="summary">
+                <span class="summary-item"><strong>Gesamt:</strong> {len(auffaelligkeiten)}</span>
+                <span class="summary-item"><span class="fehler">Fehler:</span> {len(fehler)}</span>
+                <span class="summary-item"><span class="warnung">Warnungen:</span> {len(warnungen)}</span>
+            </div>
+
+            <table>
+                <thead>
+                    <tr>
+                        <th>Datum</th>
+                        <th>Zeit</th>
+                        <th>Problem</th>
+                        <th>Details</th>
+                    </tr>
+                </thead>
+                <tbody>{tabellen_zeilen}
+                </tbody>
+            </table>
+
+            <p>{abschluss}</p>
+
+            <div class="footer">
+                <p>{fusszeile}</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+    return html
+
+def erstelle_email_betreff(kennzeichen, auffaelligkeiten, vorlage=None):
+    """Erstellt den E-Mail-Betreff aus der Vorlage"""
+    if vorlage is None:
+        vorlage = lade_email_vorlage()
+
+    fehler = [a for a in auffaelligkeiten if a["schwere"] == "fehler"]
+    warnungen = [a for a in auffaelligkeiten if a["schwere"] == "warnung"]
+
+    platzhalter = {
+        "kennzeichen": kennzeichen,
+        "anzahl_gesamt": len(auffaelligkeiten),
+        "anzahl_fehler": len(fehler),
+        "anzahl_warnungen": len(warnungen),
+        "datum_heute": datetime.now().strftime("%d.%m.%Y")
+    }
+
+    betreff = ersetze_platzhalter(vorlage.get("betreff", DEFAULT_EMAIL_VORLAGE["betreff"]), platzhalter)
+    return betreff
+
+def _erstelle_smtp_verbindung(config, timeout=10):
+    """Erstellt SMTP-Verbindung basierend auf Port und TLS-Einstellung"""
+    port = config.get("port", 587)
+    if port == 465:
+        # Port 465: Implicit SSL/TLS (SMTPS)
+        server = smtplib.SMTP_SSL(config["server"], port, timeout=timeout)
+    elif config.get("tls", True):
+        # Port 587: STARTTLS
+        server = smtplib.SMTP(config["server"], port, timeout=timeout)
+        server.starttls()
+    else:
+        # Kein TLS (z.B. Port 25)
+        server = smtplib.SMTP(config["server"], port, timeout=timeout)
+    return server
+
+def teste_smtp_verbindung(config):
+    """Testet die SMTP-Verbindung und gibt (erfolg, nachricht) zurück"""
+    if not config.get("server"):
+        return False, "Kein SMTP-Server konfiguriert"
+
+    try:
+        server = _erstelle_smtp_verbindung(config, timeout=10)
+
+        if config.get("benutzer") and config.get("passwort"):
+            server.login(config["benutzer"], config["passwort"])
+
+        server.quit()
+        return True, "Verbindung erfolgreich!"
+    except smtplib.SMTPAuthenticationError:
+        return False, "Authentifizierung fehlgeschlagen. Bitte Benutzername und Passwort prüfen."
+    except smtplib.SMTPConnectError:
+        return False, f"Verbindung zu {config['server']}:{config.get('port', 587)} fehlgeschlagen."
+    except Exception as e:
+        return False, f"Fehler: {str(e)}"
+
+@gemessen("email.senden")
+def sende_benachrichtigung(smtp_config, empfaenger_email, betreff, html_body):
+    """Sendet eine E-Mail und gibt (erfolg, nachricht) zurück"""
+    erfolg, nachricht = _sende(smtp_config, empfaenger_email, betreff, html_body)
+    zaehle("dkv_emails_total", ergebnis="gesendet" if erfolg else "fehlgeschlagen")
+    return erfolg, nachricht
+
+def _sende(smtp_config, empfaenger_email, betreff, html_body):
+    if not smtp_config.get("server"):
+        return False, "Kein SMTP-Server konfiguriert"
+
+    if not smtp_config.get("absender_email"):
+        return False, "Keine Absender-E-Mail konfiguriert"
+
+    try:
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = betreff
+        msg["From"] = f"{smtp_config.get('absender_name', 'DKV Checker')} <{smtp_config['absender_email']}>"
+        msg["To"] = empfaenger_email
+
+        # HTML-Version
+        html_part = MIMEText(html_body, "html", "utf-8")
+        msg.attach(html_part)
+
+        server = _erstelle_smtp_verbindung(smtp_config, timeout=30)
+
+        if smtp_config.get("benutzer") and smtp_config.get("passwort"):
+            server.login(smtp_config["benutzer"], smtp_config["passwort"])
+
+        server.sendmail(smtp_config["absender_email"], empfaenger_email, msg.as_string())
+        server.quit()
+
+        return True, f"E-Mail an {empfaenger_email} gesendet"
+    except Exception as e:
+        return False, f"Fehler beim Senden: {str(e)}"
+
+def sende_passwort_reset_email(benutzername, sprache="de"):
+    """Sendet ein temporäres Passwort per E-Mail. Gibt immer generische Meldung zurück (keine Username-Enumeration)."""
+    smtp_config = lade_smtp_config()
+    if not smtp_config.get("server") or not smtp_config.get("absender_email"):
+        return False, t("passwort_reset.smtp_nicht_konfiguriert", sprache)
+
+    benutzer = finde_benutzer(benutzername)
+    if not benutzer or not benutzer.get("email"):
+        # Generische Meldung — kein Hinweis ob Benutzer existiert
+        return True, t("passwort_reset.email_gesendet_info", sprache)
+
+    temp_pw = generiere_temp_passwort()
+    aktualisiere_benutzer(benutzername, {
+        "passwort_hash": hash_passwort(temp_pw),
+        "muss_passwort_aendern": True
+    })
+
+    name = benutzer.get("name", benutzername)
+    betreff = t("passwort_reset.betreff", sprache)
+    html_body = f"""
+    <html><body style="font-family: Arial, sans-serif;">
+    <h2>{t("passwort_reset.titel", sprache)}</h2>
+    <p>{t("passwort_reset.anrede", sprache, name=name)}</p>
+    <p>{t("passwort_reset.text", sprache)}</p>
+    <p style="font-size: 18px; font-weight: bold; background-color: #f0f0f0; padding: 10px; border-radius: 5px;">{temp_pw}</p>
+    <p><em>{t("passwort_reset.hinweis", sprache)}</em></p>
+    <hr>
+    <small>{t("passwort_reset.fusszeile", sprache)}</small>
+    </body></html>
+    """
+
+    try:
+        sende_benachrichtigung(smtp_config, benutzer["email"], betreff, html_body)
+    except Exception:
+        pass  # Fehler nicht an Benutzer weitergeben
+
+    return True, t("passwort_reset.email_gesendet_info", sprache)
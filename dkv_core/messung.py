@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Laufzeitmessung der Hot Paths pro Streamlit-Rerun
+
+Stufen (Laden, Speichern, Parsen, Analyse, E-Mail, Darstellung) werden mit dem
+Kontextmanager messe() oder dem Dekorator gemessen() erfasst:
+
+    with messe("darstellung.historie"):
+        ...
+
+    @gemessen("speicher.laden")
+    def lade_historie(): ...
+
+Messungen zählen zum aktuellen Lauf des Threads (beginne_lauf/beende_lauf, in der App ein
+Lauf pro Rerun). Abgeschlossene Läufe landen in einem Ringpuffer der letzten
+DKV_MESSUNG_LAEUFE Läufe (Standard 50) für das Diagnose-Panel. Ohne aktiven Lauf
+(Hintergrund-Threads, CLI, Benchmarks) kostet eine Messung nur zwei perf_counter-Aufrufe
+und die registrierten Beobachter.
+Stufen können verschachtelt sein (speichere_historie enthält die Verbrauchsberechnung),
+ihre Zeiten addieren sich also nicht zur Gesamtdauer.
+
+Beobachter (registriere_beobachter) erhalten jede Messung als (stufe, dauer_s), auch
+außerhalb eines Laufs, und das Ende eines Laufs als Stufe "rerun" (für metriken.py).
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+import pandas as pd
+
+from .konfiguration import MESSUNG_LAEUFE
+
+_laeufe = deque(maxlen=MESSUNG_LAEUFE)
+_laeufe_sperre = threading.Lock()
+_aktuell = threading.local()
+_beobachter = []
+
+
+class Lauf:
+    """Messwerte eines Reruns: Summe und Anzahl je Stufe"""
+
+    def __init__(self, bezeichnung=""):
+        self.bezeichnung = bezeichnung
+        self.beginn = datetime.now()
+        self.start = time.perf_counter()
+        self.letzte_messung = self.start
+        self.stufen = {}  # stufe -> [summe_s, anzahl]
+
+    def erfasse(self, stufe, dauer):
+        eintrag = self.stufen.setdefault(stufe, [0.0, 0])
+        eintrag[0] += dauer
+        eintrag[1] += 1
+        self.letzte_messung = time.perf_counter()
+
+    def als_dict(self, ende, vollstaendig):
+        return {
+            "beginn": self.beginn.isoformat(timespec="seconds"),
+            "bezeichnung": self.bezeichnung,
+            "dauer_s": ende - self.start,
+            "vollstaendig": vollstaendig,
+            "stufen": {stufe: {"dauer_s": summe, "anzahl": anzahl} for stufe, (summe, anzahl) in self.stufen.items()},
+        }
+
+
+def _abschliessen(lauf, vollstaendig):
+    # Unterbrochene Läufe (st.rerun, st.stop, Fehler) enden mit ihrer letzten Messung
+    ende = time.perf_counter() if vollstaendig else lauf.letzte_messung
+    with _laeufe_sperre:
+        _laeufe.append(lauf.als_dict(ende, vollstaendig))
+    for beobachter in _beobachter:
+        beobachter("rerun", ende - lauf.start)
+
+def registriere_beobachter(funktion):
+    """funktion(stufe, dauer_s) wird nach jeder Messung und jedem abgeschlossenen Lauf aufgerufen"""
+    _beobachter.append(funktion)
+
+def beginne_lauf(bezeichnung=""):
+    """
+    Startet einen neuen Lauf für den aktuellen Thread. Ein noch offener Lauf des Threads
+    (Rerun per st.rerun/st.stop abgebrochen) wird als unvollständig abgeschlossen.
+    """
+    vorher = getattr(_aktuell, "lauf", None)
+    if vorher is not None:
+        _abschliessen(vorher, vollstaendig=False)
+    _aktuell.lauf = Lauf(bezeichnung)
+    return _aktuell.lauf
+
+def beende_lauf():
+    """Schließt den Lauf des aktuellen Threads ab und legt ihn im Ringpuffer ab"""
+    lauf = getattr(_aktuell, "lauf", None)
+    if lauf is not None:
+        _aktuell.lauf = None
+        _abschliessen(lauf, vollstaendig=True)
+
+@contextmanager
+def messe(stufe):
+    """Misst die Laufzeit des Blocks als Stufe `stufe` des aktuellen Laufs"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        dauer = time.perf_counter() - start
+        lauf = getattr(_aktuell, "lauf", None)
+        if lauf is not None:
+            lauf.erfasse(stufe, dauer)
+        for beobachter in _beobachter:
+            beobachter(stufe, dauer)
+
+def gemessen(stufe):
+    """Dekorator: jeder Aufruf der Funktion wird als Stufe `stufe` gemessen"""
+    def dekorator(funktion):
+        @wraps(funktion)
+        def wrapper(*args, **kwargs):
+            with messe(stufe):
+                return funktion(*args, **kwargs)
+        return wrapper
+    return dekorator
+
+def letzte_laeufe():
+    """Abgeschlossene Läufe, neueste zuerst"""
+    with _laeufe_sperre:
+        return list(reversed(_laeufe))
+
+def stufen_statistik(laeufe):
+    """
+    Je Stufe über die Läufe: Anzahl der Läufe mit der Stufe, Median/Max der Dauer pro Lauf
+    und Aufrufe pro Lauf (Millisekunden), sortiert nach Median.
+    """
+    zeilen = [
+        {"stufe": stufe, "dauer_ms": werte["dauer_s"] * 1000, "anzahl": werte["anzahl"]}
+        for lauf in laeufe for stufe, werte in lauf["stufen"].items()
+    ]
+    zeilen += [{"stufe": "gesamt", "dauer_ms": lauf["dauer_s"] * 1000, "anzahl": 1} for lauf in laeufe]
+    if not zeilen:
+        return pd.DataFrame(columns=["stufe", "laeufe", "median_ms", "max_ms", "aufrufe"])
+    gruppen = pd.DataFrame(zeilen).groupby("stufe")
+    statistik = pd.DataFrame({
+        "laeufe": gruppen.size(),
+        "median_ms": gruppen["dauer_ms"].median(),
+        "max_ms": gruppen["dauer_ms"].max(),
+        "aufrufe": gruppen["anzahl"].mean(),
+    })
+    return statistik.sort_values("median_ms", ascending=False).reset_index()
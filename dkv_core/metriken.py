@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Metriken im Prometheus-Textformat auf einem eigenen lokalen Port
+
+Zähler, Gauges und Histogramme werden im Prozess gesammelt und von einem kleinen
+HTTP-Server unter /metrics im Text-Expositionsformat (0.0.4) ausgeliefert:
+
+  dkv_rerun_dauer_sekunden                    Histogramm  Dauer der Streamlit-Reruns
+  dkv_parse_dauer_sekunden{dateityp}          Histogramm  Parsen von DKV-CSV/-PDF
+  dkv_speichern_dauer_sekunden                Histogramm  speichere_historie
+  dkv_importierte_zeilen_total                Zähler      neu übernommene Tankvorgänge
+  dkv_duplikate_uebersprungen_total           Zähler      beim Import übersprungene Duplikate
+  dkv_emails_total{ergebnis}                  Zähler      gesendete/fehlgeschlagene E-Mails
+  dkv_historie_tankvorgaenge                  Gauge       Tankvorgänge in historie.json
+  dkv_historie_bytes                          Gauge       Größe von historie.json
+  dkv_auffaelligkeiten{schwere,status}        Gauge       laut gespeichertem Prüfstand
+
+Die Laufzeiten kommen aus der Laufzeitmessung (messung.py), auch außerhalb eines Reruns
+(Import-Aufträge). Gauges, deren Wert erst beim Abruf ermittelt wird, liefern registrierte
+Sammler (registriere_sammler). Alle Werte gelten pro Prozess und beginnen beim Start bei null.
+
+Aktiv, wenn DKV_METRIKEN_PORT gesetzt ist (z. B. 9108); der Server bindet an
+DKV_METRIKEN_ADRESSE (Standard 127.0.0.1, also nur lokal bzw. im Container erreichbar).
+Kommt ohne zusätzliche Abhängigkeit aus (http.server).
+"""
+
+import logging
+import math
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .messung import registriere_beobachter
+
+logger = logging.getLogger(__name__)
+
+# Obergrenzen der Histogramm-Buckets in Sekunden (PDF-Parsen kann Minuten dauern)
+HISTOGRAMM_GRENZEN = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# Name -> (Typ, Hilfetext); Reihenfolge = Reihenfolge der Ausgabe
+METRIKEN = {
+    "dkv_rerun_dauer_sekunden": ("histogram", "Dauer der Streamlit-Reruns"),
+    "dkv_parse_dauer_sekunden": ("histogram", "Dauer des Parsens einer DKV-Datei"),
+    "dkv_speichern_dauer_sekunden": ("histogram", "Dauer von speichere_historie"),
+    "dkv_importierte_zeilen_total": ("counter", "Neu in die Historie übernommene Tankvorgänge"),
+    "dkv_duplikate_uebersprungen_total": ("counter", "Beim Import übersprungene Duplikate"),
+    "dkv_emails_total": ("counter", "Benachrichtigungs-E-Mails nach Ergebnis"),
+    "dkv_historie_tankvorgaenge": ("gauge", "Tankvorgänge in der Historie"),
+    "dkv_historie_bytes": ("gauge", "Größe von historie.json in Bytes"),
+    "dkv_auffaelligkeiten": ("gauge", "Gespeicherte Auffälligkeiten nach Schwere und Status"),
+}
+
+# Gemessene Stufen (messung.py), die als Histogramm erscheinen: stufe -> (metrik, labels)
+_STUFEN = {
+    "rerun": ("dkv_rerun_dauer_sekunden", {}),
+    "parsen.csv": ("dkv_parse_dauer_sekunden", {"dateityp": "csv"}),
+    "parsen.pdf": ("dkv_parse_dauer_sekunden", {"dateityp": "pdf"}),
+    "speicher.speichern": ("dkv_speichern_dauer_sekunden", {}),
+}
+
+_sperre = threading.Lock()
+_werte = {}  # (name, labels) -> Wert (Zähler und Gauges)
+_histogramme = {}  # (name, labels) -> [Anzahl je Bucket, Summe, Anzahl]
+_sammler = []
+
+
+def _schluessel(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def zaehle(name, wert=1, **labels):
+    """Zähler `name` um `wert` erhöhen"""
+    schluessel = _schluessel(name, labels)
+    with _sperre:
+        _werte[schluessel] = _werte.get(schluessel, 0) + wert
+
+def setze(name, wert, **labels):
+    """Gauge `name` auf `wert` setzen"""
+    with _sperre:
+        _werte[_schluessel(name, labels)] = wert
+
+def beobachte(name, wert, **labels):
+    """Messwert `wert` in das Histogramm `name` eintragen"""
+    schluessel = _schluessel(name, labels)
+    with _sperre:
+        histogramm = _histogramme.setdefault(schluessel, [[0] * (len(HISTOGRAMM_GRENZEN) + 1), 0.0, 0])
+        histogramm[0][bisect_left(HISTOGRAMM_GRENZEN, wert)] += 1
+        histogramm[1] += wert
+        histogramm[2] += 1
+
+def registriere_sammler(funktion):
+    """funktion() liefert beim Abruf Gauge-Werte als Liste von (name, labels, wert)"""
+    _sammler.append(funktion)
+
+def _beobachte_stufe(stufe, dauer):
+    if stufe in _STUFEN:
+        name, labels = _STUFEN[stufe]
+        beobachte(name, dauer, **labels)
+
+registriere_beobachter(_beobachte_stufe)
+
+def _zahl(wert):
+    if math.isinf(wert):
+        return "+Inf" if wert > 0 else "-Inf"
+    return repr(float(wert)) if isinstance(wert, float) else str(wert)
+
+def _labels_text(labels):
+    if not labels:
+        return ""
+    teile = []
+    for schluessel, wert in labels:
+        wert = str(wert).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        teile.append(f'{schluessel}="{wert}"')
+    return "{" + ",".join(teile) + "}"
+
+def exposition():
+    """Alle Metriken im Prometheus-Textformat"""
+    werte = {}
+    for sammler in _sammler:
+        try:
+            for name, labels, wert in sammler():
+                werte[_schluessel(name, labels)] = wert
+        except Exception:
+            logger.exception("Metrik-Sammler %s fehlgeschlagen", getattr(sammler, "__name__", sammler))
+    with _sperre:
+        werte.update(_werte)
+        histogramme = {schluessel: (list(h[0]), h[1], h[2]) for schluessel, h in _histogramme.items()}
+
+    zeilen = []
+    for name, (typ, hilfe) in METRIKEN.items():
+        zeilen.append(f"# HELP {name} {hilfe}")
+        zeilen.append(f"# TYPE {name} {typ}")
+        if typ == "histogram":
+            for (_, labels), (buckets, summe, anzahl) in sorted(i for i in histogramme.items() if i[0][0] == name):
+                kumuliert = 0
+                for grenze, bucket in zip(HISTOGRAMM_GRENZEN + (math.inf,), buckets):
+                    kumuliert += bucket
+                    zeilen.append(f"{name}_bucket{_labels_text(labels + (('le', _zahl(grenze)),))} {kumuliert}")
+                zeilen.append(f"{name}_sum{_labels_text(labels)} {_zahl(summe)}")
+                zeilen.append(f"{name}_count{_labels_text(labels)} {anzahl}")
+        else:
+            for (_, labels), wert in sorted(i for i in werte.items() if i[0][0] == name):
+                zeilen.append(f"{name}{_labels_text(labels)} {_zahl(wert)}")
+    return "\n".join(zeilen) + "\n"
+
+
+class _MetrikenHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        inhalt = exposition().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(inhalt)))
+        self.end_headers()
+        self.wfile.write(inhalt)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class MetrikenServer:
+    """HTTP-Server für /metrics in einem Daemon-Thread"""
+
+    def __init__(self, adresse="127.0.0.1", port=9108):
+        self.adresse = adresse
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def starte_im_hintergrund(self):
+        """Server starten; False, wenn der Port nicht gebunden werden kann (App läuft weiter)"""
+        if self._thread is not None:
+            return True
+        try:
+            self._server = ThreadingHTTPServer((self.adresse, self.port), _MetrikenHandler)
+        except OSError as e:
+            logger.warning("Metriken-Server auf %s:%s nicht gestartet: %s", self.adresse, self.port, e)
+            return False
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="dkv-metriken", daemon=True)
+        self._thread.start()
+        logger.info("Metriken unter http://%s:%s/metrics", self.adresse, self.port)
+        return True
+
+    def stoppe(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+            self._thread = None
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Parser für DKV-Abrechnungen (CSV und PDF)
+"""
+
+import re
+from io import StringIO, BytesIO
+from itertools import islice
+
+import pandas as pd
+import pdfplumber
+
+from .messung import gemessen
+
+
+def parse_german_number(value):
+    """Deutsche Zahlen umwandeln (1.234,56 -> 1234.56)"""
+    if pd.isna(value) or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value).strip()
+    value = value.replace(".", "").replace(",", ".")
+    try:
+        return float(value)
+    except:
+        return None
+
+@gemessen("parsen.csv")
+def parse_dkv_csv(content):
+    """
+    DKV-CSV parsen und DataFrame zurückgeben
+
+    content: Text oder zeilenweise lesbares Textdatei-Handle (wird gestreamt, nur die
+    Datenzeilen werden für pandas zwischengespeichert)
+    """
+    zeilen = StringIO(content) if isinstance(content, str) else content
+    header = next(zeilen, "").rstrip("\n")
+    clean_csv = StringIO()
+    clean_csv.write(header + "\n")
+    # Zeilen 1-4 sind Kopfbereich der DKV-Abrechnung
+    for line in islice(zeilen, 4, None):
+        if line.strip() and ";" in line and not line.startswith(" "):
+            clean_csv.write(line.rstrip("\n") + "\n")
+    clean_csv.seek(0)
+
+    df = pd.read_csv(clean_csv, delimiter=";", dtype=str)
+
+    df_clean = pd.DataFrame()
+    df_clean["Kennzeichen"] = df["Kennzeichen"].str.strip()
+    df_clean["km_Stand"] = df["km-Stand"].apply(parse_german_number)
+    df_clean["Datum"] = pd.to_datetime(df["Lieferdatum"], format="%d.%m.%Y", errors="coerce")
+    df_clean["Zeit"] = df["Lieferzeit"].str.strip()
+    df_clean["Menge_Liter"] = df["Menge"].apply(parse_german_number)
+    df_clean["Warenart"] = df["Warenart"].str.strip()
+    df_clean["Betrag_EUR"] = df["Wert incl. USt"].apply(parse_german_number)
+    df_clean["Tankstelle"] = df["Name"].str.strip()
+
+    return df_clean.sort_values(["Kennzeichen", "Datum", "Zeit"]).reset_index(drop=True)
+
+@gemessen("parsen.pdf")
+def parse_dkv_pdf(pdf_quelle, fortschritt=None):
+    """
+    DKV-PDF parsen und DataFrame zurückgeben (pdf_quelle: Bytes, Pfad oder Binär-Dateihandle)
+
+    fortschritt: optionaler Callback fortschritt(seite, seiten_gesamt), wird vor jeder Seite
+    aufgerufen (Fortschrittsanzeige; eine Exception im Callback bricht das Parsen ab)
+    """
+    records = []
+    current_vehicle = None
+
+    if isinstance(pdf_quelle, bytes):
+        pdf_quelle = BytesIO(pdf_quelle)
+
+    with pdfplumber.open(pdf_quelle) as pdf:
+        for seite, page in enumerate(pdf.pages, start=1):
+            if fortschritt:
+                fortschritt(seite, len(pdf.pages))
+            tables = page.extract_tables()
+
+            for table in tables:
+                for row in table:
+                    if not row or not row[0]:
+                        continue
+
+                    first_cell = str(row[0])
+
+                    # Fahrzeug-Header erkennen
+                    vehicle_match = re.search(r"VEHICLE:\s*([A-Z]{2,3}-[A-Z]{1,2}\s*\d+[A-Z]?)\s+CARD", first_cell)
+                    if vehicle_match:
+                        current_vehicle = vehicle_match.group(1).replace(" ", "")
+                        continue
+
+                    # TOTAL-Zeilen und Header überspringen
+                    if "TOTAL:" in first_cell or "Gesamtsummen" in first_cell or "Lieferdatum" in first_cell:
+                        continue
+
+                    # Datenzeilen verarbeiten (können mehrere Einträge mit \n enthalten)
+                    if re.match(r"\d{2}\.\d{2}\.\d{4}", first_cell) and current_vehicle:
+                        # Zellen in Zeilen aufteilen
+                        lines_col0 = first_cell.split("\n")
+                        lines_col1 = (row[1] or "").split("\n") if len(row) > 1 else [""] * len(lines_col0)
+                        lines_col3 = (row[3] or "").split("\n") if len(row) > 3 else [""] * len(lines_col0)
+                        lines_col10 = (row[10] or "").split("\n") if len(row) > 10 else [""] * len(lines_col0)
+
+                        for i, line in enumerate(lines_col0):
+                            # Datum extrahieren
+                            datum_match = re.match(r"(\d{2}\.\d{2}\.\d{4})\s+(.+)", line)
+                            if not datum_match:
+                                continue
+
+                            datum = datum_match.group(1)
+                            rest_line = datum_match.group(2)
+
+                            # Zeit aus der Zeile extrahieren (Format HH:MM)
+                            zeit = ""
+                            zeit_match = re.search(r"(\d{2}:\d{2})", rest_line)
+                            if zeit_match:
+                                zeit = zeit_match.group(1)
+
+                            # km-Stand: Zahl nach der Zeit
+                            km_stand = None
+                            if zeit:
+                                after_time = rest_line[rest_line.index(zeit) + 5:].strip()
+                                km_match = re.match(r"(\d+)", after_time)
+                                if km_match:
+                                    km_stand = km_match.group(1)
+
+                            # Tankstelle: Text zwischen Datum und Stationsnummer
+                            station_match = re.search(r"(\d{7})", rest_line)
+                            tankstelle = ""
+                            if station_match:
+                                tankstelle = rest_line[:station_match.start()].strip()
+
+                            # Produkt aus Spalte 1
+                            produkt = ""
+                            if i < len(lines_col1):
+                                prod_match = re.match(r"([A-Z0-9\s\(\)]+)\s+\d{4}", lines_col1[i])
+                                if prod_match:
+                                    produkt = prod_match.group(1).strip()
+
+                            # Menge aus Spalte 3
+                            menge = None
+                            if i < len(lines_col3):
+                                menge = parse_german_number(lines_col3[i].strip())
+
+                            # Betrag aus Spalte 10 (Gesamtwert brutto)
+                            betrag = None
+                            if i < len(lines_col10):
+                                betrag = parse_german_number(lines_col10[i].strip())
+
+                            if menge and menge > 0:
+                                records.append({
+                                    "Kennzeichen": current_vehicle,
+                                    "Datum": datum,
+                                    "Tankstelle": tankstelle,
+                                    "Zeit": zeit,
+                                    "km_Stand": parse_german_number(km_stand) if km_stand else None,
+                                    "Warenart": produkt,
+                                    "Menge_Liter": menge,
+                                    "Betrag_EUR": betrag
+                                })
+
+    if not records:
+        return pd.DataFrame()
+
+    df = pd.DataFrame(records)
+    df["Datum"] = pd.to_datetime(df["Datum"], format="%d.%m.%Y", errors="coerce")
+
+    return df.sort_values(["Kennzeichen", "Datum", "Zeit"]).reset_index(drop=True)
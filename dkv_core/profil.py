@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+Profilierung auf Abruf: cProfile, Stack-Stichproben und tracemalloc ohne Neustart
+
+Ein Administrator startet einen Auftrag (starte_profilierung) für die nächsten N Abschnitte
+einer Art:
+  "rerun"   ein Streamlit-Rerun (die App ruft beginne_abschnitt/beende_abschnitt),
+            gleich welcher Sitzung
+  "import"  eine geparste Datei (parse_datei ist mit @profiliert("import") versehen; ein
+            laufender Import-Auftrag wird ab seiner nächsten Datei erfasst)
+
+Pro Abschnitt laufen im betroffenen Thread cProfile und ein Stichproben-Thread, der alle
+STICHPROBEN_INTERVALL Sekunden dessen Stack abgreift. Profiliert wird immer nur ein
+Abschnitt zur Zeit, weitere Threads laufen ungemessen weiter. Optional zeichnet
+tracemalloc über den ganzen Auftrag die Speicherbelegungen auf (deutlich langsamer).
+
+Nach dem letzten Abschnitt liegen unter PROFIL_DIR/<zeitstempel>-<art>/:
+  profil.pstats   cProfile-Statistik aller Abschnitte (python -m pstats, snakeviz)
+  stapel.txt      gefaltete Stacks "a;b;c anzahl" (flamegraph.pl, speedscope)
+  speicher.txt    größte Speicherbelegungen und Zuwachs seit Auftragsbeginn (tracemalloc)
+  info.json       Auftrag, Dauer, Anzahl Stichproben
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from functools import wraps
+
+from .konfiguration import PROFIL_DIR
+
+ARTEN = ("rerun", "import")
+STICHPROBEN_INTERVALL = 0.005  # Sekunden zwischen zwei Stack-Stichproben
+SPEICHER_TIEFE = 1  # Frames pro Speicherbelegung (tracemalloc; 1 genügt für die Tabellen je Zeile)
+SPEICHER_TOP = 30  # Zeilen je Tabelle in speicher.txt
+
+_sperre = threading.Lock()
+_auftrag = None  # laufender Auftrag (höchstens einer pro Prozess)
+_lokal = threading.local()
+
+
+class _Stichproben:
+    """Greift in einem Daemon-Thread periodisch den Stack eines anderen Threads ab"""
+
+    def __init__(self, thread_id, intervall=STICHPROBEN_INTERVALL):
+        self.thread_id = thread_id
+        self.intervall = intervall
+        self.stapel = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._laufe, name="dkv-profil-stichproben", daemon=True)
+        self._thread.start()
+
+    def _laufe(self):
+        while not self._stop.wait(self.intervall):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return  # Thread beendet
+            namen = []
+            while frame is not None:
+                namen.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                frame = frame.f_back
+            self.stapel[";".join(reversed(namen))] += 1
+
+    def stoppe(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stapel
+
+
+class _Auftrag:
+    def __init__(self, art, anzahl, speicher, benutzer):
+        self.art = art
+        self.anzahl = anzahl
+        self.speicher = speicher
+        self.benutzer = benutzer
+        self.beginn = datetime.now()
+        self.erledigt = 0
+        self.dauer_s = 0.0
+        self.profile = []
+        self.stapel = Counter()
+        self.aktiv = None  # gerade profilierter Abschnitt
+        self.tracemalloc_gestartet = False
+        self.speicher_basis = None
+        if speicher:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(SPEICHER_TIEFE)
+                self.tracemalloc_gestartet = True
+            self.speicher_basis = tracemalloc.take_snapshot()
+
+    def status(self):
+        return {"art": self.art, "anzahl": self.anzahl, "erledigt": self.erledigt, "speicher": self.speicher,
+                "benutzer": self.benutzer, "beginn": self.beginn.isoformat(timespec="seconds")}
+
+    def beende_tracemalloc(self):
+        if self.tracemalloc_gestartet:
+            tracemalloc.stop()
+            self.tracemalloc_gestartet = False
+
+
+class _Abschnitt:
+    def __init__(self, auftrag):
+        self.auftrag = auftrag
+        self.thread = threading.current_thread()
+        self.start = time.perf_counter()
+        self.stichproben = _Stichproben(self.thread.ident)
+        self.profil = cProfile.Profile()
+        self.profil.enable()
+
+    def verwerfen(self):
+        # Für Abschnitte, deren Thread ohne Abschluss geendet hat. disable() vor der Freigabe:
+        # ein noch aktives Profile schaltet beim Freigeben das Profiling des freigebenden Threads ab
+        self.stichproben.stoppe()
+        self.profil.disable()
+
+
+def starte_profilierung(art, anzahl, speicher=True, benutzer=""):
+    """Profiliert die nächsten `anzahl` Abschnitte der Art `art` ("rerun" oder "import")"""
+    global _auftrag
+    if art not in ARTEN:
+        raise ValueError(f"Unbekannte Art: {art}")
+    with _sperre:
+        if _auftrag is not None:
+            return False
+        _auftrag = _Auftrag(art, max(int(anzahl), 1), speicher, benutzer)
+    return True
+
+def brich_profilierung_ab():
+    """Laufenden Auftrag verwerfen (ohne Ergebnis)"""
+    global _auftrag
+    with _sperre:
+        auftrag, _auftrag = _auftrag, None
+    if auftrag is not None:
+        if auftrag.aktiv is not None and not auftrag.aktiv.thread.is_alive():
+            auftrag.aktiv.verwerfen()  # ein noch lebender Thread schließt seinen Abschnitt selbst
+        auftrag.beende_tracemalloc()
+
+def profilierung_status():
+    """Stand des laufenden Auftrags oder None"""
+    with _sperre:
+        return _auftrag.status() if _auftrag is not None else None
+
+def beginne_abschnitt(art):
+    """
+    Beginnt im aktuellen Thread einen profilierten Abschnitt, falls ein Auftrag dieser Art läuft.
+    Ein noch offener Abschnitt des Threads (Rerun per st.rerun abgebrochen) wird vorher abgeschlossen.
+    """
+    beende_abschnitt()
+    with _sperre:
+        auftrag = _auftrag
+        if auftrag is None or auftrag.art != art:
+            return
+        if auftrag.aktiv is not None:
+            if auftrag.aktiv.thread.is_alive():
+                return  # ein Abschnitt zur Zeit
+            # Thread ohne Abschluss beendet (st.stop, Fehler im Skript): Abschnitt verwerfen
+            auftrag.aktiv.verwerfen()
+        auftrag.aktiv = _Abschnitt(auftrag)
+        _lokal.abschnitt = auftrag.aktiv
+
+def beende_abschnitt():
+    """Schließt den Abschnitt des aktuellen Threads ab; nach dem letzten wird das Ergebnis geschrieben"""
+    global _auftrag
+    abschnitt = getattr(_lokal, "abschnitt", None)
+    if abschnitt is None:
+        return
+    _lokal.abschnitt = None
+    abschnitt.profil.disable()
+    dauer = time.perf_counter() - abschnitt.start
+    stapel = abschnitt.stichproben.stoppe()
+    auftrag = abschnitt.auftrag
+    with _sperre:
+        if auftrag is not _auftrag or auftrag.aktiv is not abschnitt:
+            return  # abgebrochen oder verworfen
+        auftrag.aktiv = None
+        auftrag.profile.append(abschnitt.profil)
+        auftrag.stapel.update(stapel)
+        auftrag.dauer_s += dauer
+        auftrag.erledigt += 1
+        if auftrag.erledigt < auftrag.anzahl:
+            return
+        _auftrag = None
+    _schreibe_ergebnis(auftrag)
+
+def profiliert(art):
+    """Dekorator: jeder Aufruf ist ein Abschnitt der Art `art`, solange ein passender Auftrag läuft"""
+    def dekorator(funktion):
+        @wraps(funktion)
+        def wrapper(*args, **kwargs):
+            auftrag = _auftrag
+            if auftrag is None or auftrag.art != art or getattr(_lokal, "abschnitt", None) is not None:
+                return funktion(*args, **kwargs)
+            beginne_abschnitt(art)
+            try:
+                return funktion(*args, **kwargs)
+            finally:
+                beende_abschnitt()
+        return wrapper
+    return dekorator
+
+def _speicher_tabellen(auftrag):
+    # Belegungen des Profilers selbst ausblenden
+    ausblenden = [tracemalloc.Filter(False, datei) for datei in (tracemalloc.__file__, cProfile.__file__, pstats.__file__, __file__)]
+    ausblenden.append(tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"))
+    ende = tracemalloc.take_snapshot().filter_traces(ausblenden)
+    aktuell, spitze = tracemalloc.get_traced_memory()
+    zeilen = [
+        f"Speicherbelegung (tracemalloc), Auftrag {auftrag.art} x {auftrag.anzahl}",
+        f"Belegt am Ende: {aktuell / 1024 / 1024:.1f} MiB, Spitze: {spitze / 1024 / 1024:.1f} MiB",
+        "",
+        f"Größte Belegungen am Ende (Top {SPEICHER_TOP})",
+        f"{'KiB':>10} {'Anzahl':>9}  Stelle",
+    ]
+    for statistik in ende.statistics("lineno")[:SPEICHER_TOP]:
+        zeilen.append(f"{statistik.size / 1024:10.1f} {statistik.count:9d}  {statistik.traceback}")
+    zeilen += ["", f"Zuwachs seit Auftragsbeginn (Top {SPEICHER_TOP})", f"{'KiB':>10} {'Anzahl':>9}  Stelle"]
+    vergleich = ende.compare_to(auftrag.speicher_basis.filter_traces(ausblenden), "lineno")
+    for statistik in vergleich[:SPEICHER_TOP]:
+        zeilen.append(f"{statistik.size_diff / 1024:+10.1f} {statistik.count_diff:+9d}  {statistik.traceback}")
+    return "\n".join(zeilen) + "\n"
+
+def _schreibe_ergebnis(auftrag):
+    ordner = os.path.join(PROFIL_DIR, f"{auftrag.beginn:%Y%m%d-%H%M%S}-{auftrag.art}")
+    os.makedirs(ordner, exist_ok=True)
+    try:
+        pstats.Stats(*auftrag.profile).dump_stats(os.path.join(ordner, "profil.pstats"))
+        with open(os.path.join(ordner, "stapel.txt"), "w", encoding="utf-8") as f:
+            for stapel, anzahl in auftrag.stapel.most_common():
+                f.write(f"{stapel} {anzahl}\n")
+        if auftrag.speicher:
+            with open(os.path.join(ordner, "speicher.txt"), "w", encoding="utf-8") as f:
+                f.write(_speicher_tabellen(auftrag))
+    finally:
+        auftrag.beende_tracemalloc()
+    info = dict(auftrag.status(), dauer_s=round(auftrag.dauer_s, 3),
+                stichproben=sum(auftrag.stapel.values()), intervall_s=STICHPROBEN_INTERVALL)
+    with open(os.path.join(ordner, "info.json"), "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+
+def profil_ergebnisse():
+    """Gespeicherte Ergebnisse, neueste zuerst: {"name", "info", "dateien": {dateiname: pfad}}"""
+    if not os.path.isdir(PROFIL_DIR):
+        return []
+    ergebnisse = []
+    for eintrag in sorted(os.scandir(PROFIL_DIR), key=lambda e: e.name, reverse=True):
+        if not eintrag.is_dir():
+            continue
+        try:
+            with open(os.path.join(eintrag.path, "info.json"), "r", encoding="utf-8") as f:
+                info = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue  # unvollständig
+        dateien = {d.name: d.path for d in sorted(os.scandir(eintrag.path), key=lambda d: d.name)
+                   if d.is_file() and d.name != "info.json"}
+        ergebnisse.append({"name": eintrag.name, "info": info, "dateien": dateien})
+    return ergebnisse
+
+def loesche_profil_ergebnis(name):
+    """Gespeichertes Ergebnis entfernen"""
+    if os.path.basename(name) != name or name in ("", ".", ".."):
+        raise ValueError(f"Ungültiger Name: {name}")
+    shutil.rmtree(os.path.join(PROFIL_DIR, name), ignore_errors=True)
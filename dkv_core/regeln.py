@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Prüfregeln für Auffälligkeiten als Daten
+
+Jede Regel ist ein Dict mit
+  typ        Name der Auffälligkeit (Anzeige, Quittierung)
+  kurz       Kurzform für die Status-Spalte der Historie
+  schwere    "warnung" oder "fehler"
+  ausdruck   pandas-Ausdruck (DataFrame.eval) über die Spalten des Prüfrahmens
+  details    Vorlage für den Detailtext (str.format mit Spaltennamen)
+
+Verfügbare Spalten: kennzeichen, datum, zeit, km_stand (leer, wenn fehlend oder 0),
+km_vorher, km_differenz, menge_liter, betrag_eur, verbrauch, verbrauch_min, verbrauch_max, tankvolumen,
+tankungen_fenster (Tankvorgänge des Fahrzeugs in den letzten MEHRFACH_FENSTER_STUNDEN,
+einschließlich des geprüften), liter_fenster (getankte Liter in den letzten
+LITER_FENSTER_STUNDEN, einschließlich des geprüften), preis_liter (EUR/L),
+preis_referenz (mittlerer Literpreis derselben Tankstelle und Warenart in den
+PREIS_FENSTER_TAGEN davor), preis_abweichung (Prozent über/unter preis_referenz),
+verbrauch_median, verbrauch_mad (gleitender Median und mittlere absolute Abweichung der
+letzten VERBRAUCH_FENSTER Verbrauchswerte des Fahrzeugs), verbrauch_z (robuster z-Wert),
+km_nachher (km-Stand des folgenden Tankvorgangs), km_max (höchstens plausible km-Differenz
+nach vergangener Zeit und getankten Litern), km_ziffer_zuviel, km_ziffern_vertauscht
+(korrigierter km-Stand, wenn eine Ziffer zu viel bzw. zwei vertauschte Nachbarziffern den
+unplausiblen km-Stand erklären, sonst leer)
+
+Eigene Regeln können in DKV_DATA_DIR/pruefregeln.json (Liste im selben Format) ergänzt
+werden. Alle Regeln werden einmal kompiliert und gemeinsam als Masken über den ganzen
+Rahmen ausgewertet; eine zusätzliche Regel kostet eine Spaltenoperation, keine Schleife.
+Eigene Regeln werden beim Laden einmal gegen einen leeren Prüfrahmen ausgewertet; ungültige
+(oder eine unlesbare Datei) werden protokolliert und übersprungen, die eingebauten gelten
+weiter (pruefregeln_fehler() liefert die Meldungen für die Oberfläche).
+"""
+
+import json
+import logging
+import os
+import string
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .konfiguration import PRUEFREGELN_DATEI
+
+logger = logging.getLogger(__name__)
+
+SCHWEREGRADE = ["warnung", "fehler"]
+
+# Zeitfenster für Mehrfachbetankungen und getankte Liter (Hinweise auf Kartenmissbrauch)
+MEHRFACH_FENSTER_STUNDEN = 2
+LITER_FENSTER_STUNDEN = 24
+
+# Literpreis: Vergleich mit derselben Tankstelle und Warenart in den Tagen davor
+PREIS_FENSTER_TAGE = 30
+PREIS_MIN_VERGLEICHE = 3
+PREIS_TOLERANZ_PROZENT = 15      # darüber: überteuert
+PREIS_UNPLAUSIBEL_PROZENT = 50   # darüber: vermutlich andere Waren als Kraftstoff abgerechnet
+
+# Gelernter Verbrauch je Fahrzeug: Median/MAD der letzten Werte, Abweichung als robuster z-Wert
+VERBRAUCH_FENSTER = 20
+VERBRAUCH_MIN_WERTE = 5
+VERBRAUCH_Z_GRENZE = 3.5
+
+# km-Sprung: höchstens KM_MAX_PRO_STUNDE im Schnitt seit dem letzten Tankvorgang plus
+# KM_SPRUNG_SOCKEL (fehlende Uhrzeiten, Tankvorgänge am selben Tag), und nicht mehr als mit
+# den getankten Litern plus einem vollen Tank beim niedrigsten Verbrauch möglich ist
+KM_MAX_PRO_STUNDE = 100
+KM_SPRUNG_SOCKEL = 1000
+
+PRUEFREGELN = [
+    {
+        "typ": "Fehlender km-Stand",
+        "kurz": "km?",
+        "schwere": "warnung",
+        "ausdruck": "km_stand.isna() | (km_stand == 0)",
+        "details": "Tankvorgang ohne km-Angabe ({menge_liter:.1f} L)"
+    },
+    {
+        "typ": "km-Stand gesunken",
+        "kurz": "km↓",
+        "schwere": "fehler",
+        "ausdruck": "km_differenz < 0",
+        "details": "Differenz: {km_differenz:.0f} km (vorher: {km_vorher:.0f})"
+    },
+    {
+        "typ": "km-Sprung",
+        "kurz": "km↑",
+        "schwere": "fehler",
+        "ausdruck": "(km_differenz > km_max) & ~(km_ziffer_zuviel > 0) & ~(km_ziffern_vertauscht > 0)",
+        "details": "Differenz: {km_differenz:.0f} km (vorher: {km_vorher:.0f}, plausibel: höchstens {km_max:.0f} km)"
+    },
+    {
+        "typ": "km-Stand Ziffer zu viel",
+        "kurz": "km+",
+        "schwere": "warnung",
+        "ausdruck": "km_ziffer_zuviel > 0",
+        "details": "{km_stand:.0f} km, vermutlich {km_ziffer_zuviel:.0f} km (vorher: {km_vorher:.0f})"
+    },
+    {
+        "typ": "km-Stand Ziffern vertauscht",
+        "kurz": "km⇄",
+        "schwere": "warnung",
+        "ausdruck": "(km_ziffern_vertauscht > 0) & ~(km_ziffer_zuviel > 0)",
+        "details": "{km_stand:.0f} km, vermutlich {km_ziffern_vertauscht:.0f} km (vorher: {km_vorher:.0f})"
+    },
+    {
+        "typ": "Verbrauch zu niedrig",
+        "kurz": "L↓",
+        "schwere": "warnung",
+        "ausdruck": "verbrauch < verbrauch_min",
+        "details": "{verbrauch:.1f} L/100km (Grenze: {verbrauch_min:g} L/100km)"
+    },
+    {
+        "typ": "Verbrauch zu hoch",
+        "kurz": "L↑",
+        "schwere": "fehler",
+        "ausdruck": "(verbrauch > verbrauch_max) & ~(verbrauch < verbrauch_min)",
+        "details": "{verbrauch:.1f} L/100km (Grenze: {verbrauch_max:g} L/100km)"
+    },
+    {
+        "typ": "Verbrauch untypisch",
+        "kurz": "L~",
+        "schwere": "warnung",
+        "ausdruck": f"(abs(verbrauch_z) > {VERBRAUCH_Z_GRENZE}) & ~(verbrauch < verbrauch_min) & ~(verbrauch > verbrauch_max)",
+        "details": "{verbrauch:.1f} L/100km, üblich für das Fahrzeug: {verbrauch_median:.1f} ± {verbrauch_mad:.1f} L/100km"
+    },
+    {
+        "typ": "Mehrfachbetankung",
+        "kurz": "2×",
+        "schwere": "warnung",
+        "ausdruck": "tankungen_fenster > 1",
+        "details": f"{{tankungen_fenster:.0f}} Tankvorgänge innerhalb von {MEHRFACH_FENSTER_STUNDEN} Stunden"
+    },
+    {
+        "typ": "Tankvolumen überschritten",
+        "kurz": "L>",
+        "schwere": "fehler",
+        "ausdruck": "liter_fenster > tankvolumen",
+        "details": f"{{liter_fenster:.1f}} L innerhalb von {LITER_FENSTER_STUNDEN} Stunden (Tankvolumen: {{tankvolumen:g}} L)"
+    },
+    {
+        "typ": "Literpreis zu hoch",
+        "kurz": "€↑",
+        "schwere": "warnung",
+        "ausdruck": f"(preis_abweichung > {PREIS_TOLERANZ_PROZENT}) & ~(preis_abweichung > {PREIS_UNPLAUSIBEL_PROZENT})",
+        "details": "{preis_liter:.3f} EUR/L, {preis_abweichung:.0f} % über dem Schnitt der Tankstelle ({preis_referenz:.3f} EUR/L)"
+    },
+    {
+        "typ": "Literpreis unplausibel",
+        "kurz": "€!",
+        "schwere": "fehler",
+        "ausdruck": f"preis_abweichung > {PREIS_UNPLAUSIBEL_PROZENT}",
+        "details": "{preis_liter:.3f} EUR/L, {preis_abweichung:.0f} % über dem Schnitt der Tankstelle "
+                   "({preis_referenz:.3f} EUR/L) – andere Waren als Kraftstoff?"
+    },
+]
+
+# Spalten des Prüfrahmens in pruefe_tankvorgaenge (siehe oben)
+RAHMEN_SPALTEN = [
+    "kennzeichen", "datum", "zeit", "km_stand", "km_vorher", "km_differenz", "km_nachher", "km_max",
+    "km_ziffer_zuviel", "km_ziffern_vertauscht", "menge_liter", "betrag_eur", "verbrauch",
+    "verbrauch_min", "verbrauch_max", "tankvolumen", "tankungen_fenster", "liter_fenster",
+    "preis_liter", "preis_referenz", "preis_abweichung", "verbrauch_median", "verbrauch_mad", "verbrauch_z",
+]
+
+# Kompilierte Regel: Detailvorlage bereits in (Text, Spalte, Format) zerlegt
+Regel = namedtuple("Regel", ["typ", "kurz", "schwere", "ausdruck", "vorlage"])
+
+_KOMPILIERT = {"stempel": None, "regeln": None, "fehler": []}
+
+
+def kompiliere_regel(regel):
+    """Regel-Dict prüfen und in eine Regel umwandeln (ValueError bei ungültiger Regel)"""
+    for feld in ("typ", "schwere", "ausdruck"):
+        if not regel.get(feld):
+            raise ValueError(f"Prüfregel ohne '{feld}': {regel}")
+    if regel["schwere"] not in SCHWEREGRADE:
+        raise ValueError(f"Unbekannte Schwere '{regel['schwere']}' in Prüfregel '{regel['typ']}'")
+    vorlage = [(text, feld, spec) for text, feld, spec, _ in string.Formatter().parse(regel.get("details", ""))]
+    return Regel(regel["typ"], regel.get("kurz", "?"), regel["schwere"], regel["ausdruck"], vorlage)
+
+def teste_regel(regel):
+    """Kompilierte Regel einmal gegen einen leeren Prüfrahmen auswerten (ValueError, wenn das scheitert)"""
+    rahmen = pd.DataFrame({s: pd.Series(dtype=float) for s in RAHMEN_SPALTEN})
+    rahmen = rahmen.astype({"kennzeichen": object, "zeit": object, "datum": "datetime64[ns]"})
+    try:
+        maske = np.asarray(rahmen.eval(regel.ausdruck), dtype=bool)
+    except Exception as e:
+        raise ValueError(f"Ausdruck '{regel.ausdruck}' in Prüfregel '{regel.typ}' ungültig: {e}") from e
+    if maske.shape != (0,):
+        raise ValueError(f"Ausdruck '{regel.ausdruck}' in Prüfregel '{regel.typ}' liefert keine Spalte")
+    for _, feld, spec in regel.vorlage:
+        if feld is None:
+            continue
+        if feld not in RAHMEN_SPALTEN:
+            raise ValueError(f"Unbekannte Spalte '{feld}' in den Details der Prüfregel '{regel.typ}'")
+        try:
+            format(1.0, spec)
+        except ValueError as e:
+            raise ValueError(f"Format '{spec}' in den Details der Prüfregel '{regel.typ}' ungültig: {e}") from e
+
+def _lade_eigene_regeln():
+    """Gültige Regeln aus pruefregeln.json und Meldungen zu den übersprungenen"""
+    try:
+        with open(PRUEFREGELN_DATEI, "r", encoding="utf-8") as f:
+            eintraege = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        eintraege, fehler = [], [f"{os.path.basename(PRUEFREGELN_DATEI)} nicht lesbar: {e}"]
+    else:
+        fehler = []
+        if not isinstance(eintraege, list):
+            eintraege, fehler = [], [f"{os.path.basename(PRUEFREGELN_DATEI)}: Liste von Regeln erwartet"]
+
+    regeln = []
+    for nr, eintrag in enumerate(eintraege, start=1):
+        try:
+            if not isinstance(eintrag, dict):
+                raise ValueError(f"Prüfregel ist kein Objekt: {eintrag!r}")
+            regel = kompiliere_regel(eintrag)
+            teste_regel(regel)
+        except ValueError as e:
+            fehler.append(f"Regel {nr}: {e}")
+            continue
+        regeln.append(regel)
+    for meldung in fehler:
+        logger.warning("Eigene Prüfregel übersprungen: %s", meldung)
+    return regeln, fehler
+
+def lade_pruefregeln():
+    """Eingebaute und eigene Prüfregeln (kompiliert, neu geladen wenn sich pruefregeln.json ändert)"""
+    try:
+        info = os.stat(PRUEFREGELN_DATEI)
+        stempel = (info.st_mtime_ns, info.st_size)
+    except FileNotFoundError:
+        stempel = None
+
+    if _KOMPILIERT["regeln"] is None or _KOMPILIERT["stempel"] != stempel:
+        regeln = [kompiliere_regel(r) for r in PRUEFREGELN]
+        fehler = []
+        if stempel is not None:
+            eigene, fehler = _lade_eigene_regeln()
+            regeln += eigene
+        _KOMPILIERT.update(stempel=stempel, regeln=regeln, fehler=fehler)
+    return _KOMPILIERT["regeln"]
+
+def pruefregeln_fehler():
+    """Meldungen zu übersprungenen eigenen Prüfregeln (leer, wenn alle gültig sind)"""
+    lade_pruefregeln()
+    return list(_KOMPILIERT["fehler"])
+
+def kurzformen(regeln=None):
+    """Typ -> Kurzform für die Status-Spalte"""
+    return {r.typ: r.kurz for r in (regeln or lade_pruefregeln())}
+
+def werte_regeln_aus(rahmen, regeln):
+    """
+    Alle Regeln als Masken über den Rahmen auswerten.
+
+    Returns:
+        (positionen, regel_nummern) aller Treffer, sortiert nach Zeile und Regelreihenfolge
+    """
+    masken = np.column_stack([
+        np.asarray(rahmen.eval(r.ausdruck), dtype=bool) for r in regeln
+    ]) if regeln else np.zeros((len(rahmen), 0), dtype=bool)
+    return np.nonzero(masken)
+
+def formatiere_details(regel, treffer):
+    """Detailtexte einer Regel für die getroffenen Zeilen (nur diese werden formatiert)"""
+    text = pd.Series("", index=treffer.index, dtype=object)
+    for literal, feld, spec in regel.vorlage:
+        text = text + literal
+        if feld is not None:
+            text = text + treffer[feld].map(lambda w, spec=spec: format(w, spec))
+    return text
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Persistenz: Historie, Fahrzeuge, SMTP-Konfiguration, E-Mail-Vorlage und Datensicherung
+(JSON-Dateien im Datenverzeichnis)
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime
+from io import BytesIO, TextIOWrapper
+
+try:
+    import fcntl
+except ImportError:  # Windows: keine prozessübergreifende Sperre
+    fcntl = None
+
+from .analyse import berechne_verbrauch_historie
+from .konfiguration import (
+    BENUTZER_DATEI,
+    DEFAULT_EMAIL_VORLAGE,
+    EMAIL_VORLAGE_DATEI,
+    FAHRZEUGE_DATEI,
+    HISTORIE_DATEI,
+    SMTP_CONFIG_DATEI,
+)
+from .messung import gemessen
+from .metriken import setze
+
+
+def _schreibe_json_atomar(pfad, daten, indent=2):
+    """JSON über temporäre Datei + os.replace schreiben, damit Leser nie eine halbe Datei sehen
+
+    indent=None schreibt kompakt (schneller, für große, nur maschinell gelesene Dateien)
+    """
+    fd, tmp_pfad = tempfile.mkstemp(dir=os.path.dirname(pfad) or ".", prefix=".tmp_", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps(daten, ensure_ascii=False, indent=indent))  # dumps nutzt ohne indent den C-Encoder
+        os.replace(tmp_pfad, pfad)
+    except BaseException:
+        if os.path.exists(tmp_pfad):
+            os.remove(tmp_pfad)
+        raise
+
+@contextmanager
+def historie_sperre():
+    """Prozessübergreifende Sperre für Lesen-Ändern-Schreiben der Historie (Upload, CLI, Hotfolder)"""
+    with open(HISTORIE_DATEI + ".lock", "a") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def historie_stempel():
+    """Änderungsstempel von historie.json (None, wenn es sie nicht gibt); vor lade_historie abfragen"""
+    try:
+        info = os.stat(HISTORIE_DATEI)
+    except FileNotFoundError:
+        return None
+    return (info.st_ino, info.st_mtime_ns, info.st_size)
+
+@gemessen("speicher.laden")
+def lade_historie():
+    """Historie aus JSON laden"""
+    if os.path.exists(HISTORIE_DATEI):
+        with open(HISTORIE_DATEI, "r", encoding="utf-8") as f:
+            historie = json.load(f)
+            # Sicherstellen dass alle Felder existieren
+            for t in historie.get("tankvorgaenge", []):
+                if "km_differenz" not in t:
+                    t["km_differenz"] = None
+                if "verbrauch" not in t:
+                    t["verbrauch"] = None
+                if "km_geschaetzt" not in t:
+                    t["km_geschaetzt"] = None  # Schätzung für fehlenden km-Stand
+                if "quelldatei" not in t:
+                    t["quelldatei"] = ""  # Ältere Einträge ohne Quelldatei
+                # Quittierungs-Felder
+                if "quittiert" not in t:
+                    t["quittiert"] = False
+                if "quittiert_kommentar" not in t:
+                    t["quittiert_kommentar"] = ""
+                if "quittiert_von" not in t:
+                    t["quittiert_von"] = ""
+                if "quittiert_am" not in t:
+                    t["quittiert_am"] = ""
+            setze("dkv_historie_tankvorgaenge", len(historie.get("tankvorgaenge", [])))
+            setze("dkv_historie_bytes", os.fstat(f.fileno()).st_size)
+            return historie
+    return {"tankvorgaenge": [], "importe": []}
+
+@gemessen("speicher.speichern")
+def speichere_historie(historie, neu_berechnen=True):
+    """Historie in JSON speichern, optional Verbrauch neu berechnen"""
+    if neu_berechnen and historie["tankvorgaenge"]:
+        historie = berechne_verbrauch_historie(historie)
+    _schreibe_json_atomar(HISTORIE_DATEI, historie)
+    setze("dkv_historie_tankvorgaenge", len(historie["tankvorgaenge"]))
+    setze("dkv_historie_bytes", os.path.getsize(HISTORIE_DATEI))
+
+def lade_fahrzeuge():
+    """Fahrzeug-Besitzer-Zuordnung aus JSON laden"""
+    if os.path.exists(FAHRZEUGE_DATEI):
+        with open(FAHRZEUGE_DATEI, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"fahrzeuge": []}
+
+def speichere_fahrzeuge(fahrzeuge):
+    """Fahrzeug-Besitzer-Zuordnung in JSON speichern"""
+    with open(FAHRZEUGE_DATEI, "w", encoding="utf-8") as f:
+        json.dump(fahrzeuge, f, ensure_ascii=False, indent=2)
+
+def lade_smtp_config():
+    """SMTP-Konfiguration aus JSON laden"""
+    if os.path.exists(SMTP_CONFIG_DATEI):
+        with open(SMTP_CONFIG_DATEI, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {
+        "server": "",
+        "port": 587,
+        "benutzer": "",
+        "passwort": "",
+        "absender_name": "DKV Checker",
+        "absender_email": "",
+        "tls": True
+    }
+
+def speichere_smtp_config(config):
+    """SMTP-Konfiguration in JSON speichern"""
+    with open(SMTP_CONFIG_DATEI, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+def lade_email_vorlage():
+    """E-Mail-Vorlage aus JSON laden"""
+    if os.path.exists(EMAIL_VORLAGE_DATEI):
+        with open(EMAIL_VORLAGE_DATEI, "r", encoding="utf-8") as f:
+            vorlage = json.load(f)
+            # Fehlende Felder mit Defaults ergänzen
+            for key, value in DEFAULT_EMAIL_VORLAGE.items():
+                if key not in vorlage:
+                    vorlage[key] = value
+            return vorlage
+    return DEFAULT_EMAIL_VORLAGE.copy()
+
+def speichere_email_vorlage(vorlage):
+    """E-Mail-Vorlage in JSON speichern"""
+    with open(EMAIL_VORLAGE_DATEI, "w", encoding="utf-8") as f:
+        json.dump(vorlage, f, ensure_ascii=False, indent=2)
+
+# --- Datensicherung ---
+BACKUP_DATEIEN = {
+    "historie.json": HISTORIE_DATEI,
+    "fahrzeuge.json": FAHRZEUGE_DATEI,
+    "smtp_config.json": SMTP_CONFIG_DATEI,
+    "email_vorlage.json": EMAIL_VORLAGE_DATEI,
+    "benutzer.json": BENUTZER_DATEI
+}
+
+def erstelle_backup():
+    """Erstellt ZIP-Datei mit allen Konfigurationsdateien"""
+    zip_buffer = BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for dateiname, dateipfad in BACKUP_DATEIEN.items():
+            if os.path.exists(dateipfad):
+                with open(dateipfad, "r", encoding="utf-8") as f:
+                    zf.writestr(dateiname, f.read())
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
+    backup_name = f"dkv_backup_{timestamp}.zip"
+    return zip_buffer.getvalue(), backup_name
+
+def stelle_backup_wieder_her(zip_quelle):
+    """
+    Stellt Backup aus ZIP-Datei wieder her
+
+    zip_quelle: Bytes, Pfad oder Binär-Dateihandle (z. B. Streamlit-Upload); die Einträge
+    werden gestreamt geprüft und über temporäre Dateien im Datenverzeichnis ersetzt
+    """
+    try:
+        if isinstance(zip_quelle, bytes):
+            zip_quelle = BytesIO(zip_quelle)
+        with zipfile.ZipFile(zip_quelle, "r") as zf:
+            # Prüfen welche Dateien im ZIP vorhanden sind
+            zip_dateien = zf.namelist()
+            gefundene_dateien = []
+
+            # JSON-Struktur validieren
+            for dateiname in zip_dateien:
+                if dateiname in BACKUP_DATEIEN:
+                    try:
+                        with zf.open(dateiname) as f:
+                            json.load(TextIOWrapper(f, encoding="utf-8"))  # Validierung
+                        gefundene_dateien.append(dateiname)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        return False, f"Ungültige JSON-Struktur in '{dateiname}'"
+
+            if not gefundene_dateien:
+                return False, "Keine gültigen Backup-Dateien im ZIP gefunden"
+
+            # Dateien extrahieren und speichern
+            for dateiname in gefundene_dateien:
+                dateipfad = BACKUP_DATEIEN[dateiname]
+                fd, tmp_pfad = tempfile.mkstemp(dir=os.path.dirname(dateipfad) or ".", prefix=".tmp_", suffix=".json")
+                try:
+                    with zf.open(dateiname) as quelle, os.fdopen(fd, "wb") as ziel:
+                        shutil.copyfileobj(quelle, ziel)
+                    os.replace(tmp_pfad, dateipfad)
+                except BaseException:
+                    if os.path.exists(tmp_pfad):
+                        os.remove(tmp_pfad)
+                    raise
+
+            return True, f"{len(gefundene_dateien)} Datei(en) wiederhergestellt: {', '.join(gefundene_dateien)}"
+
+    except zipfile.BadZipFile:
+        return False, "Ungültige ZIP-Datei"
+    except Exception as e:
+        return False, f"Fehler beim Wiederherstellen: {str(e)}"
+
+def hole_besitzer_fuer_kennzeichen(fahrzeuge, kennzeichen):
+    """Gibt Besitzer-Daten für ein Kennzeichen zurück oder None"""
+    for f in fahrzeuge.get("fahrzeuge", []):
+        if f["kennzeichen"] == kennzeichen:
+            return f
+    return None
+
+def speichere_manuellen_tankvorgang(historie, eintrag):
+    """Speichert einen manuell erfassten Tankvorgang"""
+    eintrag["quelldatei"] = "MANUELL"
+    # Quittierungs-Felder initialisieren
+    eintrag["quittiert"] = False
+    eintrag["quittiert_kommentar"] = ""
+    eintrag["quittiert_von"] = ""
+    eintrag["quittiert_am"] = ""
+    historie["tankvorgaenge"].append(eintrag)
+    speichere_historie(historie)
+    return True
+
+def hole_alle_kennzeichen_aus_historie(historie):
+    """Gibt alle eindeutigen Kennzeichen aus der Historie zurück"""
+    kennzeichen = set()
+    for t in historie.get("tankvorgaenge", []):
+        if t.get("kennzeichen"):
+            kennzeichen.add(t["kennzeichen"])
+    return sorted(list(kennzeichen))
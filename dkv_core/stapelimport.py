@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Stapelimport: alle DKV-Dateien (CSV/PDF) eines Verzeichnisses ohne Oberfläche importieren
+
+Die Dateien werden parallel in Worker-Prozessen geparst, anschließend in einem
+Durchlauf gegen die Historie dedupliziert und gespeichert.
+
+Aufruf:  python -m dkv_core.stapelimport /pfad/zu/rechnungen [--worker 4] [--rekursiv] [--trockenlauf]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .importer import (
+    bekannte_inhalte,
+    berechne_datei_hash,
+    filtere_kraftstoff,
+    parse_datei_pfad,
+    uebernehme_in_historie,
+)
+from .speicher import historie_sperre, lade_historie, speichere_historie
+
+DATEIENDUNGEN = (".csv", ".pdf")
+
+
+def finde_dateien(verzeichnis, rekursiv=False):
+    """Alle CSV/PDF-Dateien eines Verzeichnisses (sortiert)"""
+    if rekursiv:
+        pfade = [os.path.join(wurzel, name) for wurzel, _, namen in os.walk(verzeichnis) for name in namen]
+    else:
+        pfade = [e.path for e in os.scandir(verzeichnis) if e.is_file()]
+    return sorted(p for p in pfade if p.lower().endswith(DATEIENDUNGEN))
+
+def importiere_verzeichnis(verzeichnis, worker=None, rekursiv=False, trockenlauf=False, ausgabe=print):
+    """
+    Importiert alle neuen DKV-Dateien eines Verzeichnisses in die Historie.
+
+    Dateien, deren Inhalt (SHA-256) bereits in historie["importe"] steht, werden vor dem
+    Parsen übersprungen, ebenso inhaltsgleiche Dateien innerhalb des Verzeichnisses.
+
+    Returns:
+        Liste mit einem Ergebnis-Dict pro Datei
+    """
+    bekannt = bekannte_inhalte(lade_historie())
+
+    pfade = finde_dateien(verzeichnis, rekursiv)
+    hashes = {}
+    gesehen = {}
+    ergebnisse = {}
+    for pfad in pfade:
+        inhalts_hash = berechne_datei_hash(pfad)
+        if inhalts_hash in bekannt or inhalts_hash in gesehen:
+            vorher = bekannt[inhalts_hash]["dateiname"] if inhalts_hash in bekannt else gesehen[inhalts_hash]
+            status = "bereits importiert" + (f" (als {vorher})" if vorher and vorher != os.path.basename(pfad) else "")
+            ergebnisse[pfad] = {"datei": os.path.basename(pfad), "status": status, "zeilen": 0,
+                                "kraftstoff": 0, "neu": 0, "duplikate": 0, "dauer": 0.0}
+        else:
+            hashes[pfad] = inhalts_hash
+            gesehen[inhalts_hash] = os.path.basename(pfad)
+    neue_pfade = list(hashes)
+
+    start = time.perf_counter()
+    dateien = []
+    dateien_pfade = []
+    with ProcessPoolExecutor(max_workers=worker) as pool:
+        for pfad, df_clean, fehler, dauer in pool.map(parse_datei_pfad, neue_pfade):
+            ergebnis = {"datei": os.path.basename(pfad), "status": "ok", "zeilen": 0,
+                        "kraftstoff": 0, "neu": 0, "duplikate": 0, "dauer": dauer}
+            if fehler:
+                ergebnis["status"] = f"Fehler: {fehler}"
+            else:
+                df_fuel = filtere_kraftstoff(df_clean)
+                ergebnis["zeilen"] = len(df_clean)
+                ergebnis["kraftstoff"] = len(df_fuel)
+                dateien.append((ergebnis["datei"], df_fuel, hashes[pfad]))
+                dateien_pfade.append(pfad)
+            ergebnisse[pfad] = ergebnis
+    parse_dauer = time.perf_counter() - start
+
+    # Übernahme unter Sperre auf frisch geladener Historie (App/Hotfolder könnten inzwischen gespeichert haben)
+    start = time.perf_counter()
+    with historie_sperre():
+        historie = lade_historie()
+        uebernommen = uebernehme_in_historie(historie, dateien)
+        if dateien and not trockenlauf:
+            speichere_historie(historie)
+    for pfad, e in zip(dateien_pfade, uebernommen):
+        ergebnisse[pfad]["neu"] = e["neu"]
+        ergebnisse[pfad]["duplikate"] = e["duplikate"]
+    speicher_dauer = time.perf_counter() - start
+
+    ergebnis_liste = [ergebnisse[p] for p in pfade]
+    ausgabe(f"{'Datei':<40} {'Zeilen':>7} {'Kraftst.':>8} {'Neu':>6} {'Dupl.':>6} {'Zeit':>8}  Status")
+    for e in ergebnis_liste:
+        ausgabe(f"{e['datei'][:40]:<40} {e['zeilen']:>7} {e['kraftstoff']:>8} {e['neu']:>6} "
+                f"{e['duplikate']:>6} {e['dauer']:>7.2f}s  {e['status']}")
+    ausgabe(f"{len(neue_pfade)} Datei(en) geparst in {parse_dauer:.2f}s, "
+            f"{sum(e['neu'] for e in ergebnis_liste)} neue Tankvorgänge, "
+            f"{sum(e['duplikate'] for e in ergebnis_liste)} Duplikate, "
+            f"Übernahme/Speichern {speicher_dauer:.2f}s"
+            + (" (Trockenlauf, nichts gespeichert)" if trockenlauf else ""))
+    return ergebnis_liste
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DKV-Dateien eines Verzeichnisses in die Historie importieren")
+    parser.add_argument("verzeichnis", help="Verzeichnis mit DKV-CSV/PDF-Dateien")
+    parser.add_argument("--worker", type=int, default=None, help="Anzahl paralleler Parser-Prozesse (Standard: CPU-Kerne)")
+    parser.add_argument("--rekursiv", action="store_true", help="Unterverzeichnisse einbeziehen")
+    parser.add_argument("--trockenlauf", action="store_true", help="Nur parsen und auswerten, nichts speichern")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.verzeichnis):
+        parser.error(f"Verzeichnis nicht gefunden: {args.verzeichnis}")
+
+    ergebnisse = importiere_verzeichnis(args.verzeichnis, args.worker, args.rekursiv, args.trockenlauf)
+    return 1 if any(e["status"].startswith("Fehler") for e in ergebnisse) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Gemeinsame Fixtures der Tests
+
+Die Tests laufen in einem temporären Datenverzeichnis (DKV_DATA_DIR wird vor dem Import
+von dkv_core gesetzt). Für die Leistungstests gibt es einen festen synthetischen
+Datensatz und den Abgleich mit der gespeicherten Basis (leistung_basis.json):
+
+  DKV_LEISTUNG_BASIS=aktualisieren   Messwerte als neue Basis speichern statt prüfen
+  DKV_LEISTUNG_TOLERANZ=1.0          erlaubte Verschlechterung der Laufzeit (Anteil)
+  DKV_LEISTUNG_TOLERANZ_SPEICHER=0.25  erlaubte Verschlechterung des Spitzenspeichers
+
+Laufzeiten werden vor dem Vergleich mit einer festen Kalibrierungsaufgabe, gemessen direkt
+vor der jeweiligen Messung, auf die aktuelle Geschwindigkeit des Rechners umgerechnet; so
+gilt die Basis auch auf anderen (oder gerade ausgelasteten) Rechnern. Der Spitzenspeicher
+unter tracemalloc hängt nicht vom Rechner ab und wird direkt verglichen.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pytest
+
+PROJEKT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJEKT_DIR)
+DATEN_DIR = tempfile.mkdtemp(prefix="dkv-tests-")
+os.environ["DKV_DATA_DIR"] = DATEN_DIR
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from benchmarks.daten import STICHTAG, als_csv, als_historie, erzeuge_flotte  # noqa: E402
+from dkv_core import filtere_kraftstoff, parse_dkv_csv  # noqa: E402
+
+BASIS_DATEI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "leistung_basis.json")
+BASIS_AKTUALISIEREN = os.environ.get("DKV_LEISTUNG_BASIS", "") == "aktualisieren"
+TOLERANZ = float(os.environ.get("DKV_LEISTUNG_TOLERANZ", "1.0"))
+TOLERANZ_SPEICHER = float(os.environ.get("DKV_LEISTUNG_TOLERANZ_SPEICHER", "0.25"))
+
+# Fester Datensatz: 200 Fahrzeuge mit je 24 Tankvorgängen, Import = letzter Monat
+FAHRZEUGE = 200
+TANKUNGEN = 24
+WIEDERHOLUNGEN = 5
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(DATEN_DIR, ignore_errors=True)
+
+def _kalibrierungsaufgabe():
+    """Feste Mischung aus Python-Schleife, JSON und numpy-Sortierung (wie die Hot Paths)"""
+    zeilen = [{"kennzeichen": f"HH-AB {i % 500}", "km": i * 7, "liter": i % 60 + 0.5} for i in range(10_000)]
+    json.dumps(zeilen)
+    np.sort(np.random.default_rng(0).random(100_000))
+
+def messe(funktion, wiederholungen=WIEDERHOLUNGEN):
+    """
+    Beste Laufzeit aus mehreren Läufen (perf_counter, ohne tracemalloc) und Spitzenspeicher
+    eines weiteren Laufs unter tracemalloc (Bytes über dem Stand vor dem Aufruf).
+    """
+    dauern = []
+    for _ in range(wiederholungen):
+        start = time.perf_counter()
+        funktion()
+        dauern.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        vorher = tracemalloc.get_traced_memory()[0]
+        funktion()
+        spitze = tracemalloc.get_traced_memory()[1] - vorher
+    finally:
+        tracemalloc.stop()
+    return min(dauern), spitze
+
+def kalibrierung():
+    """Laufzeit der Kalibrierungsaufgabe gerade jetzt (Sekunden, bester von zehn Läufen)"""
+    return messe(_kalibrierungsaufgabe, wiederholungen=10)[0]
+
+@pytest.fixture(scope="session")
+def leistungsbasis():
+    """
+    Prüffunktion pruefe(name, zeit_s, speicher_bytes) gegen die gespeicherte Basis.
+
+    Im Modus DKV_LEISTUNG_BASIS=aktualisieren werden die Werte samt Kalibrierung gesammelt
+    und am Ende in leistung_basis.json geschrieben.
+    """
+    if os.path.exists(BASIS_DATEI):
+        with open(BASIS_DATEI, "r", encoding="utf-8") as f:
+            basis = json.load(f)
+    else:
+        basis = {"messungen": {}}
+    neu = {}
+
+    def pruefe(name, zeit_s, speicher_bytes):
+        if BASIS_AKTUALISIEREN:
+            neu[name] = {"zeit_s": round(zeit_s, 6), "speicher_bytes": int(speicher_bytes),
+                         "kalibrierung_s": round(kalibrierung(), 6)}
+            return
+        eintrag = basis["messungen"].get(name)
+        if eintrag is None:
+            pytest.skip(f"Keine Basis für '{name}' (DKV_LEISTUNG_BASIS=aktualisieren)")
+        faktor = kalibrierung() / eintrag["kalibrierung_s"]
+        zeit_budget = eintrag["zeit_s"] * faktor * (1 + TOLERANZ)
+        speicher_budget = eintrag["speicher_bytes"] * (1 + TOLERANZ_SPEICHER)
+        assert zeit_s <= zeit_budget, (
+            f"{name}: {zeit_s * 1000:.1f} ms, Budget {zeit_budget * 1000:.1f} ms "
+            f"(Basis {eintrag['zeit_s'] * 1000:.1f} ms × Rechnerfaktor {faktor:.2f} + {TOLERANZ:.0%})")
+        assert speicher_bytes <= speicher_budget, (
+            f"{name}: Spitzenspeicher {speicher_bytes / 1e6:.1f} MB, Budget {speicher_budget / 1e6:.1f} MB "
+            f"(Basis {eintrag['speicher_bytes'] / 1e6:.1f} MB + {TOLERANZ_SPEICHER:.0%})")
+
+    yield pruefe
+
+    if BASIS_AKTUALISIEREN and neu:
+        basis["messungen"].update(neu)
+        basis["messungen"] = dict(sorted(basis["messungen"].items()))
+        with open(BASIS_DATEI, "w", encoding="utf-8") as f:
+            json.dump(basis, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+@pytest.fixture(scope="session")
+def flotte():
+    """(zeilen, fahrzeuge_config) des festen synthetischen Datensatzes"""
+    return erzeuge_flotte(FAHRZEUGE, TANKUNGEN, seed=1)
+
+@pytest.fixture
+def historie(flotte):
+    """Frisch aufgebaute Historie des Datensatzes (Tests dürfen sie verändern)"""
+    return als_historie(flotte[0])
+
+@pytest.fixture(scope="session")
+def import_stapel(flotte):
+    """Kraftstoffzeilen des letzten Monats, wie aus einer DKV-CSV geparst"""
+    zeilen = flotte[0]
+    return filtere_kraftstoff(parse_dkv_csv(als_csv(zeilen[zeilen["Datum"] >= pd.Timestamp(STICHTAG - 30)])))
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Inkrementell gepflegte Auffälligkeiten (auffaelligkeiten.py) gegen eine vollständige Neuprüfung
+
+Jeder Schritt läuft wie in der App: Historie speichern, Stempel abfragen, laden, aktualisieren.
+Die Tabelle muss danach genau der von ermittle_auffaelligkeiten entsprechen, und neu geprüft
+werden nur die betroffenen Fahrzeuge.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import dkv_core.auffaelligkeiten as auffaelligkeiten_modul
+from benchmarks.daten import als_historie, erzeuge_flotte
+from dkv_core import (
+    AUFFAELLIGKEITEN_DATEI,
+    aktualisiere_auffaelligkeiten,
+    anzahl_offene_auffaelligkeiten,
+    ermittle_auffaelligkeiten,
+    historie_stempel,
+    lade_historie,
+    speichere_historie,
+)
+
+
+@pytest.fixture
+def flotte_klein():
+    """(historie, fahrzeuge_config): 12 Fahrzeuge, 24 Tankvorgänge, 5 % fehlende km und Tippfehler"""
+    zeilen, fahrzeuge_config = erzeuge_flotte(12, 24, seed=3, fehlerquote=0.05)
+    return als_historie(zeilen), fahrzeuge_config
+
+@pytest.fixture
+def neu_geprueft(monkeypatch):
+    """Leerer gespeicherter Stand; Liste der Fahrzeugmengen je Neuprüfung"""
+    if os.path.exists(AUFFAELLIGKEITEN_DATEI):
+        os.remove(AUFFAELLIGKEITEN_DATEI)
+    aufrufe = []
+    pruefe_tankvorgaenge = auffaelligkeiten_modul.pruefe_tankvorgaenge
+
+    def mitschreiben(df, *args, **kwargs):
+        aufrufe.append(set(df["kennzeichen"]))
+        return pruefe_tankvorgaenge(df, *args, **kwargs)
+
+    monkeypatch.setattr(auffaelligkeiten_modul, "pruefe_tankvorgaenge", mitschreiben)
+    return aufrufe
+
+def aktualisiere(historie, fahrzeuge_config):
+    """Speichern und inkrementell aktualisieren wie ein Rerun; Ergebnis gegen die volle Prüfung"""
+    speichere_historie(historie)
+    stempel = historie_stempel()
+    historie = lade_historie()
+    tabelle = aktualisiere_auffaelligkeiten(historie, fahrzeuge_config, stempel)
+    pd.testing.assert_frame_equal(tabelle, ermittle_auffaelligkeiten(historie, fahrzeuge_config))
+    assert anzahl_offene_auffaelligkeiten() == int((~tabelle["quittiert"]).sum())
+    return historie, tabelle
+
+def fahrzeuge_an(historie, gruppen):
+    """Fahrzeuge mit mindestens einem Tankvorgang in einer der Gruppen (tankstelle, warenart)"""
+    return {t["kennzeichen"] for t in historie["tankvorgaenge"] if (t["tankstelle"], t["warenart"]) in gruppen}
+
+
+def test_nach_anhaengen(flotte_klein, neu_geprueft):
+    historie, fahrzeuge_config = flotte_klein
+    historie, tabelle = aktualisiere(historie, fahrzeuge_config)
+    assert not tabelle.empty
+    assert neu_geprueft == [{t["kennzeichen"] for t in historie["tankvorgaenge"]}]
+
+    # Unveränderte Historie: gespeicherter Stand ohne Neuprüfung
+    neu_geprueft.clear()
+    aktualisiere(historie, fahrzeuge_config)
+    assert neu_geprueft == []
+
+    # Zwei neue Tankvorgänge eines Fahrzeugs an einer eigenen Tankstelle, der zweite mit
+    # gesunkenem km-Stand
+    letzter = max((t for t in historie["tankvorgaenge"] if t["kennzeichen"] == tabelle["fahrzeug"].iloc[0]),
+                  key=lambda t: t["datum"])
+    datum = (pd.Timestamp(letzter["datum"]) + pd.Timedelta(days=3)).strftime("%Y-%m-%d")
+    for zeit, km in (("09:00", 600), ("17:00", -100)):
+        historie["tankvorgaenge"].append(dict(letzter, datum=datum, zeit=zeit, km_stand=letzter["km_stand"] + km,
+                                              tankstelle="Neue Tankstelle", quittiert=False))
+    historie, tabelle = aktualisiere(historie, fahrzeuge_config)
+    assert neu_geprueft == [{letzter["kennzeichen"]}]
+    assert f"{letzter['kennzeichen']}_{datum}_17:00" in set(tabelle["id"])
+
+def test_nach_preisgruppenwechsel(flotte_klein, neu_geprueft):
+    historie, fahrzeuge_config = flotte_klein
+    historie, _ = aktualisiere(historie, fahrzeuge_config)
+
+    # Ein Tankvorgang wechselt die Tankstelle (und damit die Vergleichsgruppe der Literpreise)
+    # und ist dort deutlich teurer: neu geprüft werden alle Fahrzeuge an alter und neuer Gruppe
+    tankvorgang = historie["tankvorgaenge"][5]
+    andere = next(t for t in historie["tankvorgaenge"]
+                  if t["warenart"] == tankvorgang["warenart"] and t["tankstelle"] != tankvorgang["tankstelle"]
+                  and t["kennzeichen"] != tankvorgang["kennzeichen"])
+    gruppen = {(tankvorgang["tankstelle"], tankvorgang["warenart"]), (andere["tankstelle"], andere["warenart"])}
+    betroffen = fahrzeuge_an(historie, gruppen)
+    tankvorgang.update(tankstelle=andere["tankstelle"], betrag_eur=round(tankvorgang["betrag_eur"] * 1.4, 2))
+
+    neu_geprueft.clear()
+    aktualisiere(historie, fahrzeuge_config)
+    assert neu_geprueft == [betroffen]
+    assert len(betroffen) > 1
+
+def test_nach_quittieren(flotte_klein, neu_geprueft):
+    historie, fahrzeuge_config = flotte_klein
+    historie, tabelle = aktualisiere(historie, fahrzeuge_config)
+    offen = anzahl_offene_auffaelligkeiten()
+
+    # Wie die App: Tankvorgang zur ID suchen und die Quittierungsfelder setzen
+    auffaelligkeit = tabelle.iloc[0]
+    tankvorgang = historie["tankvorgaenge"][auffaelligkeit["zeile"]]
+    tankvorgang.update(quittiert=True, quittiert_kommentar="Tachofehler bekannt", quittiert_von="admin",
+                       quittiert_am="01.01.2026 12:00")
+
+    neu_geprueft.clear()
+    _, tabelle = aktualisiere(historie, fahrzeuge_config)
+    assert neu_geprueft == [{auffaelligkeit["fahrzeug"]}]
+    quittiert = tabelle[tabelle["id"] == auffaelligkeit["id"]]
+    assert quittiert["quittiert"].all()
+    assert (quittiert["quittiert_kommentar"] == "Tachofehler bekannt").all()
+    assert anzahl_offene_auffaelligkeiten() == offen - len(quittiert)
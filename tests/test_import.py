@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Import-Vorschau (vergleiche_mit_historie) und Übernahme (uebernehme_in_historie)
+
+Die Vorschau teilt jede Zeile in neu, Duplikat oder Konflikt ein; die Übernahme muss genau
+die "neu"-Zeilen anhängen und alle übrigen als Duplikate zählen.
+"""
+
+import pandas as pd
+
+from dkv_core import uebernehme_in_historie, vergleiche_mit_historie
+
+
+def zeile(kennzeichen, datum, zeit, km_stand, menge_liter=50.0):
+    return {"Kennzeichen": kennzeichen, "Datum": pd.Timestamp(datum), "Zeit": zeit, "km_Stand": km_stand,
+            "Menge_Liter": menge_liter, "Betrag_EUR": round(menge_liter * 1.70, 2), "Tankstelle": "Hamburg",
+            "Warenart": "Diesel"}
+
+def historie_aus(df_fuel):
+    """Historie, die genau die Zeilen von df_fuel enthält"""
+    historie = {"tankvorgaenge": [], "importe": []}
+    uebernehme_in_historie(historie, [("alt.csv", df_fuel, "alt")])
+    return historie
+
+def vorschau_und_uebernahme(historie, df_fuel):
+    """(Importstatus je Zeile, Ergebnis der Übernahme, neu angehängte Schlüssel)"""
+    status = list(vergleiche_mit_historie(historie, df_fuel)["Importstatus"])
+    vorher = len(historie["tankvorgaenge"])
+    ergebnis = uebernehme_in_historie(historie, [("neu.csv", df_fuel, "neu")])[0]
+    angehaengt = [(t["kennzeichen"], t["datum"], t["zeit"]) for t in historie["tankvorgaenge"][vorher:]]
+    return status, ergebnis, angehaengt
+
+
+def test_vorschau_teilt_ein_und_uebernahme_stimmt_ueberein():
+    historie = historie_aus(pd.DataFrame([
+        zeile("HH-AB 1", "2024-03-01", "08:00", 50000),
+        zeile("HH-AB 1", "2024-03-08", "08:00", 50600),
+    ]))
+    stapel = pd.DataFrame([
+        zeile("HH-AB 1", "2024-03-01", "08:00", 50000),           # unverändert
+        zeile("HH-AB 1", "2024-03-08", "08:00", 50700),           # anderer km-Stand
+        zeile("HH-AB 1", "2024-03-15", "08:00", 51200),           # neu
+        zeile("HH-AB 1", "2024-03-15", "08:00", 51200),           # doppelt im Stapel
+        zeile("HH-CD 2", "2024-03-01", "08:00", 80000, 40.0),     # anderes Fahrzeug
+    ])
+    status, ergebnis, angehaengt = vorschau_und_uebernahme(historie, stapel)
+    assert status == ["duplikat", "konflikt", "neu", "duplikat", "neu"]
+    assert ergebnis == {"dateiname": "neu.csv", "neu": 2, "duplikate": 3}
+    assert angehaengt == [("HH-AB 1", "2024-03-15", "08:00"), ("HH-CD 2", "2024-03-01", "08:00")]
+    # Der Konflikt lässt den vorhandenen Eintrag stehen
+    assert historie["tankvorgaenge"][1]["km_stand"] == 50600
+
+def test_erneuter_import_nach_loeschen():
+    # Gleicher Inhalt wie ein früherer Import (gleicher Zeilen-Fingerprint), die Tankvorgänge
+    # wurden aber aus der Historie gelöscht: Vorschau und Übernahme sehen sie als neu
+    stapel = pd.DataFrame([zeile("HH-AB 1", "2024-03-01", "08:00", 50000),
+                           zeile("HH-AB 1", "2024-03-08", "08:00", 50600)])
+    historie = historie_aus(stapel)
+    del historie["tankvorgaenge"][1]
+
+    status, ergebnis, angehaengt = vorschau_und_uebernahme(historie, stapel)
+    assert status == ["duplikat", "neu"]
+    assert (ergebnis["neu"], ergebnis["duplikate"]) == (1, 1)
+    assert angehaengt == [("HH-AB 1", "2024-03-08", "08:00")]
+    assert historie["importe"][0]["fingerprint"] == historie["importe"][1]["fingerprint"]
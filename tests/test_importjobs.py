@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Import-Aufträge: Zuordnung zum Benutzer und Aufräumen alter Aufträge
+"""
+
+import os
+import shutil
+import time
+
+import pytest
+
+from dkv_core.importjobs import (
+    _job_dir,
+    _speichere_job,
+    erstelle_job,
+    lade_job,
+    offene_hashes,
+    offene_jobs,
+    raeume_alte_jobs,
+)
+from dkv_core.konfiguration import IMPORT_JOBS_DIR
+
+
+@pytest.fixture(autouse=True)
+def leere_auftraege():
+    shutil.rmtree(IMPORT_JOBS_DIR, ignore_errors=True)
+
+def auftrag(benutzer, inhalts_hash, status="wartend", alter_tage=0):
+    job_id = erstelle_job([(f"{inhalts_hash}.csv", b"x;y\n1;2\n", inhalts_hash)], benutzer)
+    job = lade_job(job_id)
+    job["status"] = status
+    _speichere_job(job)
+    if alter_tage:
+        zeitpunkt = time.time() - alter_tage * 86400
+        os.utime(os.path.join(_job_dir(job_id), "job.json"), (zeitpunkt, zeitpunkt))
+    return job_id
+
+
+def test_auftraege_und_hashes_je_benutzer():
+    a1 = auftrag("anna", "a1")
+    a2 = auftrag("anna", "a2", status="abgebrochen")
+    b1 = auftrag("bernd", "b1", status="fertig")
+
+    assert {j["id"] for j in offene_jobs("anna")} == {a1, a2}
+    assert {j["id"] for j in offene_jobs()} == {a1, a2, b1}
+    # Abgebrochene und fremde Aufträge sperren den Inhalt nicht
+    assert offene_hashes("anna") == {"a1"}
+    assert offene_hashes("bernd") == {"b1"}
+
+def test_alte_auftraege_werden_entfernt():
+    alt = auftrag("anna", "a1", status="fertig", alter_tage=10)
+    alt_abgebrochen = auftrag("anna", "a2", status="abgebrochen", alter_tage=10)
+    laufend = auftrag("anna", "a3", status="laeuft", alter_tage=10)
+    neu = auftrag("bernd", "b1", status="fertig", alter_tage=1)
+
+    assert raeume_alte_jobs(tage=7) == 2
+    assert lade_job(alt) is None and lade_job(alt_abgebrochen) is None
+    assert lade_job(laufend) is not None and lade_job(neu) is not None
+    assert raeume_alte_jobs(tage=0) == 0
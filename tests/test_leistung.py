@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Leistungstests: Laufzeit- und Speicherbudgets der Hot Paths auf festen synthetischen Daten
+
+Jeder Test misst eine Funktion mit messe() (beste Laufzeit, Spitzenspeicher) und vergleicht
+mit leistung_basis.json (siehe conftest.py). Neue Basis nach gewollten Änderungen:
+
+    DKV_LEISTUNG_BASIS=aktualisieren python -m pytest tests/test_leistung.py
+"""
+
+from conftest import FAHRZEUGE, TANKUNGEN, messe
+
+from dkv_core import (
+    berechne_verbrauch_historie,
+    ermittle_auffaelligkeiten,
+    historie_tabelle,
+    lade_historie,
+    markiere_auffaelligkeiten,
+    speichere_historie,
+    uebernehme_in_historie,
+    vergleiche_mit_historie,
+)
+
+
+def test_historie_speichern(historie, leistungsbasis):
+    zeit, speicher = messe(lambda: speichere_historie(historie))
+    leistungsbasis("historie_speichern", zeit, speicher)
+
+def test_historie_laden(historie, leistungsbasis):
+    speichere_historie(historie)
+    zeit, speicher = messe(lade_historie)
+    assert len(lade_historie()["tankvorgaenge"]) == len(historie["tankvorgaenge"])
+    leistungsbasis("historie_laden", zeit, speicher)
+
+def test_duplikate_vorschau(historie, import_stapel, leistungsbasis):
+    zeit, speicher = messe(lambda: vergleiche_mit_historie(historie, import_stapel))
+    assert (vergleiche_mit_historie(historie, import_stapel)["Importstatus"] == "duplikat").all()
+    leistungsbasis("duplikate_vorschau", zeit, speicher)
+
+def test_duplikate_uebernahme(historie, import_stapel, leistungsbasis):
+    def uebernehmen():
+        kopie = {"tankvorgaenge": list(historie["tankvorgaenge"]), "importe": list(historie["importe"])}
+        return uebernehme_in_historie(kopie, [("dkv.csv", import_stapel, "")])
+    zeit, speicher = messe(uebernehmen)
+    assert uebernehmen()[0]["neu"] == 0
+    leistungsbasis("duplikate_uebernahme", zeit, speicher)
+
+def test_verbrauch_neu_berechnen(historie, leistungsbasis):
+    assert len(historie["tankvorgaenge"]) == FAHRZEUGE * TANKUNGEN
+    zeit, speicher = messe(lambda: berechne_verbrauch_historie(historie))
+    leistungsbasis("verbrauch_neu_berechnen", zeit, speicher)
+
+def test_auffaelligkeiten(historie, flotte, leistungsbasis):
+    zeit, speicher = messe(lambda: ermittle_auffaelligkeiten(historie, flotte[1]))
+    leistungsbasis("auffaelligkeiten", zeit, speicher)
+
+def test_historie_tabelle(historie, flotte, leistungsbasis):
+    auffaelligkeiten = ermittle_auffaelligkeiten(historie, flotte[1])
+
+    def tabelle():
+        df = historie_tabelle(historie["tankvorgaenge"]).reset_index(drop=True)
+        return df.join(markiere_auffaelligkeiten(df, auffaelligkeiten))
+    zeit, speicher = messe(tabelle)
+    assert tabelle()["_ist_auffaellig"].sum() > 0
+    leistungsbasis("historie_tabelle", zeit, speicher)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Eigene Prüfregeln (pruefregeln.json): ungültige Dateien und Regeln werden übersprungen
+
+Die eingebauten Regeln gelten immer; gültige eigene Regeln kommen hinzu, zu allen anderen
+liefert pruefregeln_fehler() eine Meldung.
+"""
+
+import json
+import os
+
+import pytest
+
+import dkv_core.analyse as analyse_modul
+import dkv_core.regeln as regeln_modul
+from dkv_core import PRUEFREGELN, lade_pruefregeln, pruefe_tankvorgaenge, pruefregeln_fehler, tankvorgaenge_rahmen
+from dkv_core.konfiguration import PRUEFREGELN_DATEI
+
+GUELTIG = {"typ": "Große Menge", "kurz": "GM", "schwere": "warnung", "ausdruck": "menge_liter > 40",
+           "details": "{menge_liter:.1f} L"}
+TANKVORGAENGE = [{"kennzeichen": "HH-AB 1", "datum": "2024-03-01", "zeit": "08:00", "km_stand": 50000,
+                  "menge_liter": 45.0, "betrag_eur": 76.5, "tankstelle": "Hamburg", "warenart": "Diesel"}]
+
+
+@pytest.fixture(autouse=True)
+def regeldatei(monkeypatch):
+    """Schreibt pruefregeln.json (Text oder JSON-Wert) und verwirft die kompilierten Regeln"""
+    def schreibe(inhalt):
+        with open(PRUEFREGELN_DATEI, "w", encoding="utf-8") as f:
+            f.write(inhalt if isinstance(inhalt, str) else json.dumps(inhalt))
+        monkeypatch.setitem(regeln_modul._KOMPILIERT, "regeln", None)
+
+    yield schreibe
+    if os.path.exists(PRUEFREGELN_DATEI):
+        os.remove(PRUEFREGELN_DATEI)
+    regeln_modul._KOMPILIERT["regeln"] = None
+
+def typen():
+    return [r.typ for r in lade_pruefregeln()]
+
+def eingebaute():
+    return [r["typ"] for r in PRUEFREGELN]
+
+
+def test_eingebaute_regeln_passen_zum_pruefrahmen(monkeypatch):
+    for regel in lade_pruefregeln():
+        regeln_modul.teste_regel(regel)
+
+    # RAHMEN_SPALTEN beschreibt genau den Rahmen, den pruefe_tankvorgaenge auswertet
+    rahmen_spalten = []
+    werte_regeln_aus = analyse_modul.werte_regeln_aus
+
+    def mitschreiben(rahmen, regeln):
+        rahmen_spalten.extend(rahmen.columns)
+        return werte_regeln_aus(rahmen, regeln)
+
+    monkeypatch.setattr(analyse_modul, "werte_regeln_aus", mitschreiben)
+    pruefe_tankvorgaenge(tankvorgaenge_rahmen(TANKVORGAENGE))
+    assert set(rahmen_spalten) == set(regeln_modul.RAHMEN_SPALTEN)
+
+@pytest.mark.parametrize("inhalt", ['[{"typ": "Kaputt",', {"typ": "Keine Liste"}])
+def test_unlesbare_datei(regeldatei, inhalt):
+    regeldatei(inhalt)
+    assert typen() == eingebaute()
+    assert len(pruefregeln_fehler()) == 1
+
+def test_ungueltige_regeln_werden_uebersprungen(regeldatei):
+    regeldatei([
+        GUELTIG,
+        "keine Regel",
+        {"typ": "Ohne Ausdruck", "schwere": "warnung"},
+        {"typ": "Falsche Schwere", "schwere": "kritisch", "ausdruck": "menge_liter > 40"},
+        {"typ": "Unbekannte Spalte", "schwere": "warnung", "ausdruck": "liter > 40"},
+        {"typ": "Syntaxfehler", "schwere": "warnung", "ausdruck": "menge_liter >"},
+        {"typ": "Kein Vergleich", "schwere": "warnung", "ausdruck": "1"},
+        {"typ": "Falsches Detail", "schwere": "warnung", "ausdruck": "menge_liter > 40", "details": "{liter}"},
+        {"typ": "Falsches Format", "schwere": "warnung", "ausdruck": "menge_liter > 40", "details": "{menge_liter:q}"},
+    ])
+    assert typen() == eingebaute() + ["Große Menge"]
+    fehler = pruefregeln_fehler()
+    assert [f.split(":")[0] for f in fehler] == [f"Regel {nr}" for nr in range(2, 10)]
+
+    # Die Prüfung läuft mit den gültigen Regeln
+    tabelle = pruefe_tankvorgaenge(tankvorgaenge_rahmen(TANKVORGAENGE))
+    assert list(tabelle["details"][tabelle["typ"] == "Große Menge"]) == ["45.0 L"]
+
+def test_gueltige_datei_ohne_fehler(regeldatei):
+    regeldatei([GUELTIG])
+    assert typen() == eingebaute() + ["Große Menge"]
+    assert pruefregeln_fehler() == []
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Verhaltenstests der Prüfregeln (pruefe_tankvorgaenge) auf kleinen, von Hand gebauten Historien
+
+Grundlage ist ein unauffälliges Fahrzeug: alle 7 Tage 600 km und 45 L (7,5 L/100km) an
+derselben Tankstelle zu 1,70 EUR/L. Jeder Test verändert einzelne Tankvorgänge und vergleicht
+die vollständige Ausgabe (ID, Typ, Schwere, Details) mit der erwarteten.
+"""
+
+from datetime import date, timedelta
+
+from dkv_core import lese_verbrauchsgrenzen, pruefe_tankvorgaenge, tankvorgaenge_rahmen
+
+
+def tankvorgang(datum, km_stand, menge_liter=50.0, zeit="08:00", kennzeichen="HH-AB 1", **weitere):
+    return dict({"kennzeichen": kennzeichen, "datum": datum, "zeit": zeit, "km_stand": km_stand,
+                 "menge_liter": menge_liter, "betrag_eur": round(menge_liter * 1.70, 2),
+                 "tankstelle": "Hamburg", "warenart": "Diesel"}, **weitere)
+
+def fahrzeug(anzahl=6, kennzeichen="HH-AB 1", km=50000, km_je_woche=600, liter=45.0, zeit="08:00"):
+    """Wöchentliche Tankvorgänge ab dem 01.03.2024 mit gleichbleibendem Verbrauch"""
+    return [tankvorgang(str(date(2024, 3, 1) + timedelta(days=7 * i)), km + km_je_woche * i, liter, zeit,
+                        kennzeichen, verbrauch=None if i == 0 else liter / km_je_woche * 100)
+            for i in range(anzahl)]
+
+def pruefe(tankvorgaenge, fahrzeug_grenzen=None):
+    """Auffälligkeiten als Liste von (id, typ, schwere, details)"""
+    tabelle = pruefe_tankvorgaenge(tankvorgaenge_rahmen(tankvorgaenge), fahrzeug_grenzen)
+    return list(zip(tabelle["id"], tabelle["typ"].astype(str), tabelle["schwere"].astype(str), tabelle["details"]))
+
+
+def test_unauffaellige_historie():
+    assert pruefe(fahrzeug()) == []
+
+def test_fehlender_km_stand_und_fehlende_zeit():
+    tankvorgaenge = fahrzeug()
+    # ohne km-Stand und ohne Uhrzeit; der folgende Tankvorgang hat keinen Vorgänger-km
+    tankvorgaenge[2].update(zeit=None, km_stand=None, verbrauch=None)
+    tankvorgaenge[3].update(verbrauch=None)
+    # ohne Uhrzeit, sonst unauffällig
+    tankvorgaenge[4].update(zeit=None)
+    assert pruefe(tankvorgaenge) == [
+        ("HH-AB 1_2024-03-15_None", "Fehlender km-Stand", "warnung", "Tankvorgang ohne km-Angabe (45.0 L)"),
+    ]
+
+def test_km_stand_null_zwischen_gueltigen():
+    # 0 steht für einen fehlenden km-Stand: kein km-Sprung, kein Tippfehler und kein
+    # gesunkener km-Stand gegen 0 bei den Nachbarn
+    treffer = pruefe([
+        tankvorgang("2024-03-01", 100000),
+        tankvorgang("2024-03-05", 0),
+        tankvorgang("2024-03-09", 102100),
+    ])
+    assert treffer == [
+        ("HH-AB 1_2024-03-05_08:00", "Fehlender km-Stand", "warnung", "Tankvorgang ohne km-Angabe (50.0 L)"),
+    ]
+
+def test_km_stand_gesunken():
+    tankvorgaenge = fahrzeug()
+    tankvorgaenge[3]["km_stand"] = 51000
+    assert pruefe(tankvorgaenge) == [
+        ("HH-AB 1_2024-03-22_08:00", "km-Stand gesunken", "fehler", "Differenz: -200 km (vorher: 51200)"),
+    ]
+
+def test_km_sprung():
+    # Obergrenze: 1000 km Sockel plus 100 km je Stunde, höchstens (45 L + 80 L Tank) bei 3 L/100km
+    tankvorgaenge = fahrzeug()
+    tankvorgaenge[3]["km_stand"] = 56800
+    assert pruefe(tankvorgaenge, {"HH-AB 1": (3.0, 25.0, 80.0)}) == [
+        ("HH-AB 1_2024-03-22_08:00", "km-Sprung", "fehler",
+         "Differenz: 5600 km (vorher: 51200, plausibel: höchstens 4167 km)"),
+        ("HH-AB 1_2024-03-29_08:00", "km-Stand gesunken", "fehler", "Differenz: -4400 km (vorher: 56800)"),
+    ]
+
+    # Ohne Tankvolumen gilt nur die Grenze nach Zeit (7 Tage: 17800 km)
+    assert pruefe(tankvorgaenge) == [
+        ("HH-AB 1_2024-03-29_08:00", "km-Stand gesunken", "fehler", "Differenz: -4400 km (vorher: 56800)"),
+    ]
+    tankvorgaenge[3]["km_stand"] = 70000
+    assert pruefe(tankvorgaenge)[0] == (
+        "HH-AB 1_2024-03-22_08:00", "km-Sprung", "fehler",
+        "Differenz: 18800 km (vorher: 51200, plausibel: höchstens 17800 km)")
+
+def test_km_tippfehler():
+    ziffer_zuviel = fahrzeug()
+    ziffer_zuviel[3]["km_stand"] = 518000
+    assert pruefe(ziffer_zuviel) == [
+        ("HH-AB 1_2024-03-22_08:00", "km-Stand Ziffer zu viel", "warnung",
+         "518000 km, vermutlich 51800 km (vorher: 51200)"),
+        ("HH-AB 1_2024-03-29_08:00", "km-Stand gesunken", "fehler", "Differenz: -465600 km (vorher: 518000)"),
+    ]
+
+    vertauscht = fahrzeug()
+    vertauscht[3]["km_stand"] = 58100
+    assert pruefe(vertauscht) == [
+        ("HH-AB 1_2024-03-22_08:00", "km-Stand Ziffern vertauscht", "warnung",
+         "58100 km, vermutlich 51800 km (vorher: 51200)"),
+        ("HH-AB 1_2024-03-29_08:00", "km-Stand gesunken", "fehler", "Differenz: -5700 km (vorher: 58100)"),
+    ]
+
+def test_verbrauchsgrenzen():
+    tankvorgaenge = fahrzeug()
+    tankvorgaenge[2]["verbrauch"] = 2.0
+    tankvorgaenge[4]["verbrauch"] = 30.0
+    assert pruefe(tankvorgaenge) == [
+        ("HH-AB 1_2024-03-15_08:00", "Verbrauch zu niedrig", "warnung", "2.0 L/100km (Grenze: 3 L/100km)"),
+        ("HH-AB 1_2024-03-29_08:00", "Verbrauch zu hoch", "fehler", "30.0 L/100km (Grenze: 25 L/100km)"),
+    ]
+
+    # Grenzen aus fahrzeuge.json gelten nur für ihr Fahrzeug
+    tankvorgaenge = fahrzeug(3) + fahrzeug(3, kennzeichen="HH-CD 2")
+    assert pruefe(tankvorgaenge, {"HH-CD 2": (8.0, 12.0, 80)}) == [
+        ("HH-CD 2_2024-03-08_08:00", "Verbrauch zu niedrig", "warnung", "7.5 L/100km (Grenze: 8 L/100km)"),
+        ("HH-CD 2_2024-03-15_08:00", "Verbrauch zu niedrig", "warnung", "7.5 L/100km (Grenze: 8 L/100km)"),
+    ]
+
+def test_verbrauch_untypisch():
+    tankvorgaenge = fahrzeug(9)
+    for eintrag, verbrauch in zip(tankvorgaenge[1:], [7.2, 7.8, 7.4, 7.6, 7.5, 7.3, 7.7, 12.0]):
+        eintrag["verbrauch"] = verbrauch
+    assert pruefe(tankvorgaenge) == [
+        ("HH-AB 1_2024-04-26_08:00", "Verbrauch untypisch", "warnung",
+         "12.0 L/100km, üblich für das Fahrzeug: 7.5 ± 0.2 L/100km"),
+    ]
+
+def test_mehrfachbetankung_und_tankvolumen():
+    tankvorgaenge = fahrzeug() + [
+        tankvorgang("2024-04-12", 53600, 30.0, zeit="09:00"),
+        tankvorgang("2024-04-12", 53600, 20.0, zeit="09:30"),
+        tankvorgang("2024-04-19", 54200, 50.0, zeit="09:00"),
+        tankvorgang("2024-04-19", 54250, 40.0, zeit="15:00"),
+    ]
+    assert pruefe(tankvorgaenge, {"HH-AB 1": (3.0, 25.0, 80.0)}) == [
+        ("HH-AB 1_2024-04-12_09:30", "Mehrfachbetankung", "warnung", "2 Tankvorgänge innerhalb von 2 Stunden"),
+        ("HH-AB 1_2024-04-19_15:00", "Tankvolumen überschritten", "fehler",
+         "90.0 L innerhalb von 24 Stunden (Tankvolumen: 80 L)"),
+    ]
+
+    # Ohne hinterlegtes Tankvolumen (nicht in fahrzeuge.json oder leer) keine Tankvolumen-Prüfung
+    nur_mehrfach = [("HH-AB 1_2024-04-12_09:30", "Mehrfachbetankung", "warnung", "2 Tankvorgänge innerhalb von 2 Stunden")]
+    assert pruefe(tankvorgaenge) == nur_mehrfach
+    assert pruefe(tankvorgaenge, lese_verbrauchsgrenzen({"fahrzeuge": [{"kennzeichen": "HH-AB 1"}]})) == nur_mehrfach
+
+def test_literpreis():
+    # Referenz ist der Schnitt derselben Tankstelle und Warenart über alle Fahrzeuge
+    tankvorgaenge = fahrzeug() + fahrzeug(kennzeichen="HH-CD 2", km=80000, km_je_woche=500, liter=40.0, zeit="10:00")
+    tankvorgaenge[4]["betrag_eur"] = round(45 * 1.70 * 1.3, 2)
+    tankvorgaenge[11]["betrag_eur"] = round(40 * 1.70 * 1.8, 2)
+    assert pruefe(tankvorgaenge) == [
+        ("HH-AB 1_2024-03-29_08:00", "Literpreis zu hoch", "warnung",
+         "2.210 EUR/L, 30 % über dem Schnitt der Tankstelle (1.700 EUR/L)"),
+        ("HH-CD 2_2024-04-05_10:00", "Literpreis unplausibel", "fehler",
+         "3.060 EUR/L, 74 % über dem Schnitt der Tankstelle (1.757 EUR/L) – andere Waren als Kraftstoff?"),
+    ]